@@ -0,0 +1,63 @@
+import secrets
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+# 读接口的缓存失效依据：数据“代数”（generation）。
+# 用一条专门的只读连接读 PRAGMA data_version：任何其它连接（本进程连接池、抓取进程、推送进程）
+# 提交写事务后它都会变化；读它只看 WAL 共享内存里的头部，不读数据页。
+# epoch 每次新建（进程重启、换库）都不同，避免新连接的 data_version 从头计数时撞上旧 ETag。
+
+
+class DataGeneration:
+    def __init__(self, db_path: str):
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._lock = threading.Lock()
+        self.epoch = secrets.token_hex(4)
+
+    def current(self) -> str:
+        with self._lock:
+            version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+        return f"{self.epoch}.{version}"
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class LRUCache:
+    """线程安全的小型 LRU：FastAPI 同步 handler 在线程池里并发读写。"""
+
+    def __init__(self, maxsize: int = 128):
+        self.maxsize = max(1, int(maxsize))
+        self._data: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            try:
+                value = self._data.pop(key)
+            except KeyError:
+                self.misses += 1
+                return None
+            self._data[key] = value
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+            self._data[key] = value
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"size": len(self._data), "hits": self.hits, "misses": self.misses}
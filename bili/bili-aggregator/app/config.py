@@ -1,7 +1,8 @@
 from __future__ import annotations
 
+import threading
 from pathlib import Path
-from typing import Any
+from typing import Any, Callable, Optional
 
 import yaml
 
@@ -37,3 +38,108 @@ def load_config() -> dict[str, Any]:
     base = _read_yaml(BASE_CONFIG_PATH)
     local = _read_yaml(LOCAL_CONFIG_PATH)
     return deep_merge(base, local)
+
+
+ConfigListener = Callable[[dict[str, Any], dict[str, Any]], None]
+
+_cache_lock = threading.Lock()
+_cached: Optional[dict[str, Any]] = None
+_cached_mtimes: Optional[tuple] = None
+_pinned = False
+_listeners: list[ConfigListener] = []
+
+KNOWN_SOURCES = {"stub", "rsshub", "bili_api", "bili_dynamic"}
+
+
+def validate_config(config: dict[str, Any]) -> dict[str, Any]:
+    """只校验启动/热加载时一旦出错就会在别处崩掉的字段；校验失败抛 ValueError。"""
+    app_cfg = config.get("app") or {}
+    if not isinstance(app_cfg.get("db_path", ""), str) or not app_cfg.get("db_path"):
+        raise ValueError("app.db_path must be a non-empty string")
+
+    fetch_cfg = config.get("fetch") or {}
+    source = fetch_cfg.get("source")
+    if source is not None and source not in KNOWN_SOURCES:
+        raise ValueError(f"fetch.source must be one of {sorted(KNOWN_SOURCES)}, got {source!r}")
+
+    creators = config.get("creators") or []
+    if not isinstance(creators, list):
+        raise ValueError("creators must be a list")
+    for i, c in enumerate(creators):
+        if not isinstance(c, dict) or "uid" not in c:
+            raise ValueError(f"creators[{i}] must be a mapping with uid")
+        try:
+            int(c["uid"])
+        except (TypeError, ValueError):
+            raise ValueError(f"creators[{i}].uid must be an integer, got {c['uid']!r}")
+
+    for section in ("db", "http", "push", "bilibili"):
+        if config.get(section) is not None and not isinstance(config[section], dict):
+            raise ValueError(f"{section} must be a mapping")
+    return config
+
+
+def _config_mtimes() -> tuple:
+    out = []
+    for path in (BASE_CONFIG_PATH, LOCAL_CONFIG_PATH):
+        try:
+            out.append(path.stat().st_mtime_ns)
+        except FileNotFoundError:
+            out.append(None)
+    return tuple(out)
+
+
+def get_config() -> dict[str, Any]:
+    """
+    进程级配置缓存：只有 config.yaml / config.local.yaml 的 mtime 变化时才重新解析并校验，
+    平时只有两次 stat，可以放在请求路径上。
+    返回的 dict 在进程内共享，调用方只读、不要修改。
+    热加载时新配置校验失败：保留旧配置并打印原因（首次加载失败则直接抛出）。
+    """
+    global _cached, _cached_mtimes
+    if _pinned:
+        return _cached
+    mtimes = _config_mtimes()
+    if _cached is not None and mtimes == _cached_mtimes:
+        return _cached
+
+    with _cache_lock:
+        if _cached is not None and mtimes == _cached_mtimes:
+            return _cached
+        old = _cached
+        try:
+            new = validate_config(load_config())
+        except (ValueError, TypeError, yaml.YAMLError) as exc:
+            if old is None:
+                raise
+            print("CONFIG RELOAD FAILED, keep previous config:", repr(exc))
+            _cached_mtimes = mtimes
+            return old
+        _cached, _cached_mtimes = new, mtimes
+        listeners = list(_listeners) if old is not None else []
+
+    for fn in listeners:
+        try:
+            fn(old, new)
+        except Exception as exc:
+            print("CONFIG LISTENER FAILED:", getattr(fn, "__name__", fn), repr(exc))
+    return new
+
+
+def set_config(config: dict[str, Any]) -> dict[str, Any]:
+    """
+    进程内直接指定配置（压测等工具用，例如把 app.db_path 指向生成的库）：
+    校验后固定下来，之后 get_config() 不再读配置文件，也不触发变更回调。
+    """
+    global _cached, _cached_mtimes, _pinned
+    config = validate_config(config)
+    with _cache_lock:
+        _cached, _cached_mtimes, _pinned = config, None, True
+    return config
+
+
+def on_config_change(fn: ConfigListener) -> ConfigListener:
+    """注册配置变更回调 fn(old, new)；首次加载不触发。可当装饰器用。"""
+    with _cache_lock:
+        _listeners.append(fn)
+    return fn
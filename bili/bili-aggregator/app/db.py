@@ -1,10 +1,14 @@
 import os
+import queue
 import sqlite3
+import threading
+import time
+from contextlib import contextmanager
 from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
 
+# v1 基线 schema：全部 IF NOT EXISTS，对老库（没有 user_version 的库）也能安全重放
 DDL = r"""
-PRAGMA journal_mode=WAL;
-
 CREATE TABLE IF NOT EXISTS creators (
   uid INTEGER PRIMARY KEY,
   name TEXT,
@@ -13,7 +17,9 @@ CREATE TABLE IF NOT EXISTS creators (
   enabled INTEGER NOT NULL DEFAULT 1,
   priority INTEGER NOT NULL DEFAULT 0,
   weight INTEGER NOT NULL DEFAULT 1,
-  last_fetch_at TEXT
+  last_fetch_at TEXT,
+  hwm_pub_ts INTEGER,
+  hwm_bvid TEXT
 );
 
 CREATE TABLE IF NOT EXISTS videos (
@@ -68,18 +74,749 @@ CREATE TABLE IF NOT EXISTS push_log (
   channel TEXT NOT NULL,
   pushed_ts INTEGER NOT NULL
 );
+
+CREATE TABLE IF NOT EXISTS tag_queue (
+  bvid TEXT PRIMARY KEY,
+  aid INTEGER NOT NULL,
+  attempts INTEGER NOT NULL DEFAULT 0,
+  next_try_ts INTEGER NOT NULL,
+  last_error TEXT,
+  enqueued_ts INTEGER NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_tag_queue_next ON tag_queue(next_try_ts);
+
+CREATE TABLE IF NOT EXISTS fetch_state (
+  key TEXT PRIMARY KEY,
+  value TEXT,
+  updated_ts INTEGER NOT NULL
+);
+"""
+
+# 全文检索：title / desc / tags 建两张 FTS5 索引，行号都取 video_fts_ids.docid（按 bvid 分配的
+# INTEGER PRIMARY KEY，VACUUM 不会重排；videos 以 TEXT bvid 为主键，它的隐式 rowid 会被 VACUUM 重排）。
+# - video_fts：trigram 分词，任意 3 字以上子串可命中
+# - video_fts_bigram：同样三列，存的是字符二元组（"游戏机" -> "游戏 戏机"），unicode61 分词，
+#   2 字的词（大部分中文词）按整词命中，不必退回 LIKE 全表扫
+# 均由触发器与 videos / video_tags 保持同步。
+_BIGRAMS_SQL = (
+    "(WITH RECURSIVE g(n, s) AS (SELECT 1, {expr} UNION ALL SELECT n + 1, s FROM g WHERE n < length(s) - 1) "
+    "SELECT group_concat(substr(s, n, 2), ' ') FROM g "
+    "WHERE length(s) >= 2 AND substr(s, n, 2) NOT GLOB '*[' || char(9, 10, 13, 32) || ']*')"
+)
+
+
+def _bigrams(expr: str) -> str:
+    """SQL 标量表达式：expr 的全部相邻二字组（跨空白的跳过），空格分隔；expr 为 NULL 时为 NULL。"""
+    return _BIGRAMS_SQL.format(expr=expr)
+
+
+def _tags_of(bvid_expr: str) -> str:
+    return f"(SELECT group_concat(tag, ' ') FROM video_tags WHERE bvid = {bvid_expr})"
+
+
+def _docid_of(bvid_expr: str) -> str:
+    return f"(SELECT docid FROM video_fts_ids WHERE bvid = {bvid_expr})"
+
+
+FTS_DDL = f"""
+CREATE TABLE IF NOT EXISTS video_fts_ids (
+  docid INTEGER PRIMARY KEY,
+  bvid TEXT NOT NULL UNIQUE
+);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS video_fts USING fts5(
+  title, "desc", tags,
+  tokenize='trigram'
+);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS video_fts_bigram USING fts5(
+  title, "desc", tags,
+  tokenize='unicode61 remove_diacritics 0'
+);
+
+CREATE TRIGGER IF NOT EXISTS trg_videos_fts_ai AFTER INSERT ON videos BEGIN
+  INSERT INTO video_fts_ids(bvid) VALUES (new.bvid) ON CONFLICT(bvid) DO NOTHING;
+  INSERT INTO video_fts(rowid, title, "desc", tags)
+  SELECT i.docid, new.title, new."desc", {_tags_of("new.bvid")}
+  FROM video_fts_ids i WHERE i.bvid = new.bvid;
+  INSERT INTO video_fts_bigram(rowid, title, "desc", tags)
+  SELECT i.docid, {_bigrams("new.title")}, {_bigrams('new."desc"')}, {_bigrams(_tags_of("new.bvid"))}
+  FROM video_fts_ids i WHERE i.bvid = new.bvid;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_videos_fts_au AFTER UPDATE OF title, "desc" ON videos
+WHEN old.title IS NOT new.title OR old."desc" IS NOT new."desc"
+BEGIN
+  UPDATE video_fts SET title = new.title, "desc" = new."desc"
+  WHERE rowid = {_docid_of("new.bvid")};
+  UPDATE video_fts_bigram SET title = {_bigrams("new.title")}, "desc" = {_bigrams('new."desc"')}
+  WHERE rowid = {_docid_of("new.bvid")};
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_videos_fts_ad AFTER DELETE ON videos BEGIN
+  DELETE FROM video_fts WHERE rowid = {_docid_of("old.bvid")};
+  DELETE FROM video_fts_bigram WHERE rowid = {_docid_of("old.bvid")};
+  DELETE FROM video_fts_ids WHERE bvid = old.bvid;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_video_tags_fts_ai AFTER INSERT ON video_tags BEGIN
+  UPDATE video_fts SET tags = {_tags_of("new.bvid")}
+  WHERE rowid = {_docid_of("new.bvid")};
+  UPDATE video_fts_bigram SET tags = {_bigrams(_tags_of("new.bvid"))}
+  WHERE rowid = {_docid_of("new.bvid")};
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_video_tags_fts_ad AFTER DELETE ON video_tags BEGIN
+  UPDATE video_fts SET tags = {_tags_of("old.bvid")}
+  WHERE rowid = {_docid_of("old.bvid")};
+  UPDATE video_fts_bigram SET tags = {_bigrams(_tags_of("old.bvid"))}
+  WHERE rowid = {_docid_of("old.bvid")};
+END;
+"""
+
+
+# v5 统计预聚合：/api/stats/* 只读这些小表，不再按窗口 join push_log / videos / video_state。
+# 日桶为 UTC 日（ts / 86400），由触发器随推送 / 状态 / 入库写入同步维护：
+# - stats_push_daily：channel × 日 × creator × 分区 的推送数与最后推送时间（push_log 只追加，INSERT OR IGNORE）
+# - stats_push_recent：每个 channel × creator 最近 3 条推送（creator 统计里的 pushed_bvids_sample）
+# - stats_state_daily：日（video_state.updated_ts）× creator 的 HIDDEN / READ 当前行数
+# - stats_video_daily：日（pub_ts）× 未隐藏视频数
+# - stats_creator：每个 creator 未隐藏视频的最新 pub_ts
+# 推送按视频当前的 uid / 分区归类（改分区时触发器把推送挪到新分区）；videos.uid 入库后不会变。
+# 手工删改过 push_log / videos 后调用 rebuild_stats_rollups()。
+ROLLUP_DDL = r"""
+CREATE TABLE IF NOT EXISTS stats_push_daily (
+  channel TEXT NOT NULL,
+  day INTEGER NOT NULL,
+  uid INTEGER NOT NULL,
+  tname TEXT NOT NULL,
+  cnt INTEGER NOT NULL,
+  last_pushed_ts INTEGER NOT NULL,
+  PRIMARY KEY(channel, day, uid, tname)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS stats_push_recent (
+  channel TEXT NOT NULL,
+  uid INTEGER NOT NULL,
+  pushed_ts INTEGER NOT NULL,
+  bvid TEXT NOT NULL,
+  PRIMARY KEY(channel, uid, bvid)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS stats_state_daily (
+  day INTEGER NOT NULL,
+  uid INTEGER NOT NULL,
+  hidden_cnt INTEGER NOT NULL DEFAULT 0,
+  read_cnt INTEGER NOT NULL DEFAULT 0,
+  PRIMARY KEY(day, uid)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS stats_video_daily (
+  day INTEGER PRIMARY KEY,
+  visible_cnt INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS stats_creator (
+  uid INTEGER PRIMARY KEY,
+  last_pub_ts INTEGER
+);
+
+CREATE TRIGGER IF NOT EXISTS trg_push_log_stats_ai AFTER INSERT ON push_log BEGIN
+  INSERT INTO stats_push_daily(channel, day, uid, tname, cnt, last_pushed_ts)
+  SELECT new.channel, new.pushed_ts / 86400, v.uid, COALESCE(NULLIF(TRIM(v.tname), ''), '未分区'), 1, new.pushed_ts
+  FROM videos v WHERE v.bvid = new.bvid
+  ON CONFLICT(channel, day, uid, tname) DO UPDATE SET
+    cnt = cnt + 1,
+    last_pushed_ts = MAX(last_pushed_ts, excluded.last_pushed_ts);
+  INSERT OR REPLACE INTO stats_push_recent(channel, uid, pushed_ts, bvid)
+  SELECT new.channel, v.uid, new.pushed_ts, new.bvid FROM videos v WHERE v.bvid = new.bvid;
+  DELETE FROM stats_push_recent
+  WHERE channel = new.channel
+    AND uid = (SELECT uid FROM videos WHERE bvid = new.bvid)
+    AND bvid NOT IN (
+      SELECT r.bvid FROM stats_push_recent r
+      WHERE r.channel = new.channel AND r.uid = (SELECT uid FROM videos WHERE bvid = new.bvid)
+      ORDER BY r.pushed_ts DESC, r.bvid ASC
+      LIMIT 3
+    );
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_videos_stats_ai AFTER INSERT ON videos BEGIN
+  INSERT INTO stats_video_daily(day, visible_cnt)
+  SELECT new.pub_ts / 86400, 1
+  WHERE NOT EXISTS (SELECT 1 FROM video_state s WHERE s.bvid = new.bvid AND s.state = 'HIDDEN')
+  ON CONFLICT(day) DO UPDATE SET visible_cnt = visible_cnt + 1;
+  INSERT INTO stats_creator(uid, last_pub_ts)
+  SELECT new.uid, new.pub_ts
+  WHERE NOT EXISTS (SELECT 1 FROM video_state s WHERE s.bvid = new.bvid AND s.state = 'HIDDEN')
+  ON CONFLICT(uid) DO UPDATE SET last_pub_ts = MAX(COALESCE(last_pub_ts, 0), excluded.last_pub_ts);
+  -- 先有状态、后入库的视频：状态计数此时才能归到 creator
+  INSERT INTO stats_state_daily(day, uid, hidden_cnt, read_cnt)
+  SELECT s.updated_ts / 86400, new.uid, s.state = 'HIDDEN', s.state = 'READ'
+  FROM video_state s WHERE s.bvid = new.bvid AND s.state IN ('HIDDEN', 'READ')
+  ON CONFLICT(day, uid) DO UPDATE SET
+    hidden_cnt = hidden_cnt + excluded.hidden_cnt,
+    read_cnt = read_cnt + excluded.read_cnt;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_videos_stats_au AFTER UPDATE OF pub_ts ON videos
+WHEN old.pub_ts IS NOT new.pub_ts
+  AND NOT EXISTS (SELECT 1 FROM video_state s WHERE s.bvid = new.bvid AND s.state = 'HIDDEN')
+BEGIN
+  UPDATE stats_video_daily SET visible_cnt = visible_cnt - 1 WHERE day = old.pub_ts / 86400;
+  INSERT INTO stats_video_daily(day, visible_cnt) VALUES (new.pub_ts / 86400, 1)
+  ON CONFLICT(day) DO UPDATE SET visible_cnt = visible_cnt + 1;
+  INSERT INTO stats_creator(uid, last_pub_ts)
+  VALUES (new.uid, (
+    SELECT v.pub_ts FROM videos v
+    WHERE v.uid = new.uid
+      AND NOT EXISTS (SELECT 1 FROM video_state s WHERE s.bvid = v.bvid AND s.state = 'HIDDEN')
+    ORDER BY v.pub_ts DESC LIMIT 1
+  ))
+  ON CONFLICT(uid) DO UPDATE SET last_pub_ts = excluded.last_pub_ts;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_videos_stats_ad AFTER DELETE ON videos BEGIN
+  UPDATE stats_video_daily SET visible_cnt = visible_cnt - 1
+  WHERE day = old.pub_ts / 86400
+    AND NOT EXISTS (SELECT 1 FROM video_state s WHERE s.bvid = old.bvid AND s.state = 'HIDDEN');
+  INSERT INTO stats_creator(uid, last_pub_ts)
+  VALUES (old.uid, (
+    SELECT v.pub_ts FROM videos v
+    WHERE v.uid = old.uid
+      AND NOT EXISTS (SELECT 1 FROM video_state s WHERE s.bvid = v.bvid AND s.state = 'HIDDEN')
+    ORDER BY v.pub_ts DESC LIMIT 1
+  ))
+  ON CONFLICT(uid) DO UPDATE SET last_pub_ts = excluded.last_pub_ts;
+  UPDATE stats_state_daily SET
+    hidden_cnt = hidden_cnt - (SELECT COUNT(*) FROM video_state s WHERE s.bvid = old.bvid AND s.state = 'HIDDEN'),
+    read_cnt = read_cnt - (SELECT COUNT(*) FROM video_state s WHERE s.bvid = old.bvid AND s.state = 'READ')
+  WHERE uid = old.uid
+    AND day = (SELECT s.updated_ts / 86400 FROM video_state s WHERE s.bvid = old.bvid);
+END;
+
+-- 推送后视频改了分区：把这条推送从旧 (uid, tname) 日桶挪到新日桶（push_log 以 bvid 为主键，至多一行）
+CREATE TRIGGER IF NOT EXISTS trg_videos_push_tname_au AFTER UPDATE OF tname ON videos
+WHEN COALESCE(NULLIF(TRIM(old.tname), ''), '未分区') IS NOT COALESCE(NULLIF(TRIM(new.tname), ''), '未分区')
+BEGIN
+  UPDATE stats_push_daily SET
+    cnt = cnt - 1,
+    last_pushed_ts = COALESCE((
+      SELECT MAX(pl.pushed_ts) FROM push_log pl JOIN videos v ON v.bvid = pl.bvid
+      WHERE pl.channel = stats_push_daily.channel
+        AND pl.pushed_ts >= stats_push_daily.day * 86400 AND pl.pushed_ts < (stats_push_daily.day + 1) * 86400
+        AND v.uid = stats_push_daily.uid
+        AND COALESCE(NULLIF(TRIM(v.tname), ''), '未分区') = stats_push_daily.tname
+    ), last_pushed_ts)
+  WHERE (channel, day, uid, tname) IN (
+    SELECT pl.channel, pl.pushed_ts / 86400, old.uid, COALESCE(NULLIF(TRIM(old.tname), ''), '未分区')
+    FROM push_log pl WHERE pl.bvid = old.bvid
+  );
+  DELETE FROM stats_push_daily
+  WHERE cnt <= 0
+    AND (channel, day, uid, tname) IN (
+      SELECT pl.channel, pl.pushed_ts / 86400, old.uid, COALESCE(NULLIF(TRIM(old.tname), ''), '未分区')
+      FROM push_log pl WHERE pl.bvid = old.bvid
+    );
+  INSERT INTO stats_push_daily(channel, day, uid, tname, cnt, last_pushed_ts)
+  SELECT pl.channel, pl.pushed_ts / 86400, new.uid, COALESCE(NULLIF(TRIM(new.tname), ''), '未分区'), 1, pl.pushed_ts
+  FROM push_log pl WHERE pl.bvid = new.bvid
+  ON CONFLICT(channel, day, uid, tname) DO UPDATE SET
+    cnt = cnt + 1,
+    last_pushed_ts = MAX(last_pushed_ts, excluded.last_pushed_ts);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_video_state_stats_ai AFTER INSERT ON video_state BEGIN
+  INSERT INTO stats_state_daily(day, uid, hidden_cnt, read_cnt)
+  SELECT new.updated_ts / 86400, v.uid, new.state = 'HIDDEN', new.state = 'READ'
+  FROM videos v WHERE v.bvid = new.bvid AND new.state IN ('HIDDEN', 'READ')
+  ON CONFLICT(day, uid) DO UPDATE SET
+    hidden_cnt = hidden_cnt + excluded.hidden_cnt,
+    read_cnt = read_cnt + excluded.read_cnt;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_video_state_stats_au AFTER UPDATE ON video_state
+WHEN old.state IS NOT new.state OR old.updated_ts IS NOT new.updated_ts
+BEGIN
+  UPDATE stats_state_daily SET
+    hidden_cnt = hidden_cnt - (old.state = 'HIDDEN'),
+    read_cnt = read_cnt - (old.state = 'READ')
+  WHERE day = old.updated_ts / 86400
+    AND uid = (SELECT uid FROM videos WHERE bvid = old.bvid)
+    AND old.state IN ('HIDDEN', 'READ');
+  INSERT INTO stats_state_daily(day, uid, hidden_cnt, read_cnt)
+  SELECT new.updated_ts / 86400, v.uid, new.state = 'HIDDEN', new.state = 'READ'
+  FROM videos v WHERE v.bvid = new.bvid AND new.state IN ('HIDDEN', 'READ')
+  ON CONFLICT(day, uid) DO UPDATE SET
+    hidden_cnt = hidden_cnt + excluded.hidden_cnt,
+    read_cnt = read_cnt + excluded.read_cnt;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_video_state_stats_ad AFTER DELETE ON video_state BEGIN
+  UPDATE stats_state_daily SET
+    hidden_cnt = hidden_cnt - (old.state = 'HIDDEN'),
+    read_cnt = read_cnt - (old.state = 'READ')
+  WHERE day = old.updated_ts / 86400
+    AND uid = (SELECT uid FROM videos WHERE bvid = old.bvid)
+    AND old.state IN ('HIDDEN', 'READ');
+END;
+
+-- 进入 / 离开 HIDDEN：影响该视频发布日的可见数与 creator 最新可见 pub_ts
+CREATE TRIGGER IF NOT EXISTS trg_video_state_hidden_ai AFTER INSERT ON video_state
+WHEN new.state = 'HIDDEN'
+BEGIN
+  UPDATE stats_video_daily SET visible_cnt = visible_cnt - 1
+  WHERE day = (SELECT pub_ts / 86400 FROM videos WHERE bvid = new.bvid);
+  INSERT INTO stats_creator(uid, last_pub_ts)
+  SELECT v.uid, (
+    SELECT v2.pub_ts FROM videos v2
+    WHERE v2.uid = v.uid
+      AND NOT EXISTS (SELECT 1 FROM video_state s WHERE s.bvid = v2.bvid AND s.state = 'HIDDEN')
+    ORDER BY v2.pub_ts DESC LIMIT 1
+  )
+  FROM videos v WHERE v.bvid = new.bvid
+  ON CONFLICT(uid) DO UPDATE SET last_pub_ts = excluded.last_pub_ts;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_video_state_hidden_au AFTER UPDATE OF state ON video_state
+WHEN (old.state = 'HIDDEN') <> (new.state = 'HIDDEN')
+BEGIN
+  UPDATE stats_video_daily SET visible_cnt = visible_cnt - 1
+  WHERE new.state = 'HIDDEN'
+    AND day = (SELECT pub_ts / 86400 FROM videos WHERE bvid = new.bvid);
+  -- 取消隐藏：发布日可能还没有日桶（隐藏期间改过 pub_ts、或入库时就已隐藏），用 upsert 补上
+  INSERT INTO stats_video_daily(day, visible_cnt)
+  SELECT v.pub_ts / 86400, 1 FROM videos v
+  WHERE v.bvid = new.bvid AND new.state IS NOT 'HIDDEN'
+  ON CONFLICT(day) DO UPDATE SET visible_cnt = visible_cnt + 1;
+  INSERT INTO stats_creator(uid, last_pub_ts)
+  SELECT v.uid, (
+    SELECT v2.pub_ts FROM videos v2
+    WHERE v2.uid = v.uid
+      AND NOT EXISTS (SELECT 1 FROM video_state s WHERE s.bvid = v2.bvid AND s.state = 'HIDDEN')
+    ORDER BY v2.pub_ts DESC LIMIT 1
+  )
+  FROM videos v WHERE v.bvid = new.bvid
+  ON CONFLICT(uid) DO UPDATE SET last_pub_ts = excluded.last_pub_ts;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_video_state_hidden_ad AFTER DELETE ON video_state
+WHEN old.state = 'HIDDEN'
+BEGIN
+  INSERT INTO stats_video_daily(day, visible_cnt)
+  SELECT v.pub_ts / 86400, 1 FROM videos v WHERE v.bvid = old.bvid
+  ON CONFLICT(day) DO UPDATE SET visible_cnt = visible_cnt + 1;
+  INSERT INTO stats_creator(uid, last_pub_ts)
+  SELECT v.uid, (
+    SELECT v2.pub_ts FROM videos v2
+    WHERE v2.uid = v.uid
+      AND NOT EXISTS (SELECT 1 FROM video_state s WHERE s.bvid = v2.bvid AND s.state = 'HIDDEN')
+    ORDER BY v2.pub_ts DESC LIMIT 1
+  )
+  FROM videos v WHERE v.bvid = old.bvid
+  ON CONFLICT(uid) DO UPDATE SET last_pub_ts = excluded.last_pub_ts;
+END;
 """
 
-def connect(db_path: str) -> sqlite3.Connection:
+
+def connect(
+    db_path: str,
+    db_cfg: Optional[Dict] = None,
+    check_same_thread: bool = True,
+) -> sqlite3.Connection:
+    """db_cfg 为 config.yaml 的 db 段；给了就按它设置连接级 pragma 与语句缓存。"""
     Path(os.path.dirname(db_path) or ".").mkdir(parents=True, exist_ok=True)
-    conn = sqlite3.connect(db_path)
+    if db_cfg is None:
+        conn = sqlite3.connect(db_path, check_same_thread=check_same_thread)
+    else:
+        conn = sqlite3.connect(
+            db_path,
+            check_same_thread=check_same_thread,
+            cached_statements=max(0, int(db_cfg.get("cached_statements", 256))),
+        )
+        apply_pragmas(conn, db_cfg)
     conn.row_factory = sqlite3.Row
     return conn
 
-def init_db(conn: sqlite3.Connection) -> None:
-    conn.executescript(DDL)
+
+_SYNCHRONOUS = {"OFF", "NORMAL", "FULL", "EXTRA"}
+_TEMP_STORE = {"DEFAULT", "FILE", "MEMORY"}
+
+
+def apply_pragmas(conn: sqlite3.Connection, db_cfg: Dict) -> None:
+    """
+    连接级 pragma（不持久化，每个连接都要设一次）：
+    - synchronous=NORMAL：WAL 下安全，提交时不再每次 fsync
+    - cache_size：每个连接的页缓存（KiB），连接池复用后跨请求保持热缓存
+    - mmap_size：读走内存映射，少一次拷贝
+    - temp_store=MEMORY：排序/临时 b-tree 放内存
+    - busy_timeout：与抓取进程写库冲突时等待而不是立刻 "database is locked"
+    """
+    synchronous = str(db_cfg.get("synchronous", "NORMAL")).upper()
+    if synchronous not in _SYNCHRONOUS:
+        raise ValueError(f"db.synchronous must be one of {sorted(_SYNCHRONOUS)}")
+    temp_store = str(db_cfg.get("temp_store", "MEMORY")).upper()
+    if temp_store not in _TEMP_STORE:
+        raise ValueError(f"db.temp_store must be one of {sorted(_TEMP_STORE)}")
+
+    conn.execute(f"PRAGMA synchronous={synchronous}")
+    conn.execute(f"PRAGMA cache_size={-max(0, int(db_cfg.get('cache_size_kb', 16384)))}")
+    conn.execute(f"PRAGMA mmap_size={max(0, int(db_cfg.get('mmap_size_mb', 128))) * 1024 * 1024}")
+    conn.execute(f"PRAGMA temp_store={temp_store}")
+    conn.execute(f"PRAGMA busy_timeout={max(0, int(db_cfg.get('busy_timeout_ms', 5000)))}")
+
+
+class ConnectionPool:
+    """
+    API 进程共享的有界连接池：FastAPI 的同步 handler 跑在线程池里，
+    连接按需创建（最多 pool_size 个），用完放回而不是关闭，页缓存和语句缓存跨请求保留。
+    LIFO 取连接：最近用过的连接缓存最热。
+    """
+
+    def __init__(self, db_path: str, db_cfg: Optional[Dict] = None):
+        self.db_path = db_path
+        self.db_cfg = dict(db_cfg or {})
+        self.size = max(1, int(self.db_cfg.get("pool_size", 8)))
+        self.acquire_timeout_sec = float(self.db_cfg.get("acquire_timeout_sec", 30))
+        self._idle: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue(maxsize=self.size)
+        self._created = 0
+        self._lock = threading.Lock()
+        self._closed = False
+        # 新建连接时挂上的 sqlite3 trace 回调（tools/bench_api.py 统计每个请求的 SQL 条数）
+        self.trace_callback: Optional[Callable[[str], None]] = None
+
+    def acquire(self) -> sqlite3.Connection:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("connection pool is closed")
+            create = self._created < self.size
+            if create:
+                self._created += 1
+        if create:
+            try:
+                conn = connect(self.db_path, self.db_cfg, check_same_thread=False)
+                if self.trace_callback is not None:
+                    conn.set_trace_callback(self.trace_callback)
+                return conn
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                raise
+        try:
+            return self._idle.get(timeout=self.acquire_timeout_sec)
+        except queue.Empty:
+            raise RuntimeError(f"no sqlite connection available within {self.acquire_timeout_sec}s")
+
+    def release(self, conn: sqlite3.Connection) -> None:
+        # handler 忘记提交或中途抛异常：不把未结束的事务带给下一个请求
+        if conn.in_transaction:
+            conn.rollback()
+        if self._closed:
+            conn.close()
+            return
+        self._idle.put_nowait(conn)
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def close(self) -> None:
+        with self._lock:
+            self._closed = True
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+
+def get_fetch_state(conn: sqlite3.Connection, key: str) -> Optional[str]:
+    row = conn.execute("SELECT value FROM fetch_state WHERE key=?", (key,)).fetchone()
+    return row["value"] if row else None
+
+
+def set_fetch_state(conn: sqlite3.Connection, key: str, value: Optional[str]) -> None:
+    conn.execute(
+        """
+        INSERT INTO fetch_state(key, value, updated_ts)
+        VALUES (?, ?, ?)
+        ON CONFLICT(key) DO UPDATE SET
+          value=excluded.value,
+          updated_ts=excluded.updated_ts
+        """,
+        (key, value, int(time.time())),
+    )
+
+def upsert_creator(
+    conn: sqlite3.Connection,
+    uid: int,
+    name: str | None,
+    group_name: str | None,
+    enabled: bool,
+    priority: int = 0,
+    weight: int = 1,
+) -> None:
+    conn.execute(
+        """
+        INSERT INTO creators(uid, name, author_name, group_name, enabled, priority, weight)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(uid) DO UPDATE SET
+          name=excluded.name,
+          author_name=excluded.author_name,
+          group_name=excluded.group_name,
+          enabled=excluded.enabled,
+          priority=excluded.priority,
+          weight=excluded.weight
+        """,
+        (uid, name, name, group_name, 1 if enabled else 0, int(priority), max(1, int(weight))),
+    )
+
+def sync_creators(conn: sqlite3.Connection, creators: List[Dict]) -> int:
+    """把 config.yaml 的 creators 写入 creators 表并提交；抓取每轮开始时、API 进程配置变更时调用。"""
+    for c in creators:
+        upsert_creator(
+            conn,
+            c["uid"],
+            c.get("name"),
+            c.get("group"),
+            bool(c.get("enabled", True)),
+            int(c.get("priority", 0)),
+            max(1, int(c.get("weight", 1))),
+        )
+    conn.commit()
+    return len(creators)
+
+
+def _iter_statements(script: str) -> Iterator[str]:
+    """按完整语句切分 SQL 脚本（trigger 体内的分号不会被切断）。"""
+    buf = ""
+    for line in script.splitlines(keepends=True):
+        buf += line
+        if sqlite3.complete_statement(buf):
+            stmt = buf.strip()
+            buf = ""
+            if stmt.rstrip(";").strip():
+                yield stmt
+    if buf.strip():
+        yield buf.strip()
+
+
+def _exec_script(conn: sqlite3.Connection, script: str) -> None:
+    # 不用 executescript：它会先隐式 COMMIT，迁移就不在一个事务里了
+    for stmt in _iter_statements(script):
+        conn.execute(stmt)
+
+
+def _migration_1_baseline(conn: sqlite3.Connection) -> None:
+    _exec_script(conn, DDL)
     _migrate_creators_table(conn)
+
+
+def rebuild_fts(conn: sqlite3.Connection) -> None:
+    """按 videos / video_tags 全量重建 video_fts / video_fts_bigram（不提交）。已有视频的 docid 保持不变。"""
+    conn.execute("DELETE FROM video_fts")
+    conn.execute("DELETE FROM video_fts_bigram")
+    conn.execute("DELETE FROM video_fts_ids WHERE bvid NOT IN (SELECT bvid FROM videos)")
+    conn.execute("INSERT INTO video_fts_ids(bvid) SELECT bvid FROM videos WHERE true ON CONFLICT(bvid) DO NOTHING")
+    conn.execute(
+        f"""
+        INSERT INTO video_fts(rowid, title, "desc", tags)
+        SELECT i.docid, v.title, v."desc", {_tags_of("v.bvid")}
+        FROM videos v
+        JOIN video_fts_ids i ON i.bvid = v.bvid
+        """
+    )
+    conn.execute(
+        f"""
+        INSERT INTO video_fts_bigram(rowid, title, "desc", tags)
+        SELECT i.docid, {_bigrams("v.title")}, {_bigrams('v."desc"')}, {_bigrams(_tags_of("v.bvid"))}
+        FROM videos v
+        JOIN video_fts_ids i ON i.bvid = v.bvid
+        """
+    )
+
+
+def rebuild_stats_rollups(conn: sqlite3.Connection) -> None:
+    """按 push_log / video_state / videos 全量重建 stats_* 预聚合表（不提交）。"""
+    for table in ("stats_push_daily", "stats_push_recent", "stats_state_daily", "stats_video_daily", "stats_creator"):
+        conn.execute(f"DELETE FROM {table}")
+    conn.execute(
+        """
+        INSERT INTO stats_push_daily(channel, day, uid, tname, cnt, last_pushed_ts)
+        SELECT pl.channel, pl.pushed_ts / 86400, v.uid,
+               COALESCE(NULLIF(TRIM(v.tname), ''), '未分区'),
+               COUNT(*), MAX(pl.pushed_ts)
+        FROM push_log pl
+        JOIN videos v ON v.bvid = pl.bvid
+        GROUP BY pl.channel, pl.pushed_ts / 86400, v.uid, COALESCE(NULLIF(TRIM(v.tname), ''), '未分区')
+        """
+    )
+    conn.execute(
+        """
+        INSERT INTO stats_push_recent(channel, uid, pushed_ts, bvid)
+        SELECT channel, uid, pushed_ts, bvid
+        FROM (
+            SELECT pl.channel AS channel, v.uid AS uid, pl.pushed_ts AS pushed_ts, pl.bvid AS bvid,
+                   ROW_NUMBER() OVER (PARTITION BY pl.channel, v.uid ORDER BY pl.pushed_ts DESC, pl.bvid ASC) AS rn
+            FROM push_log pl
+            JOIN videos v ON v.bvid = pl.bvid
+        )
+        WHERE rn <= 3
+        """
+    )
+    conn.execute(
+        """
+        INSERT INTO stats_state_daily(day, uid, hidden_cnt, read_cnt)
+        SELECT s.updated_ts / 86400, v.uid,
+               SUM(s.state = 'HIDDEN'), SUM(s.state = 'READ')
+        FROM video_state s
+        JOIN videos v ON v.bvid = s.bvid
+        WHERE s.state IN ('HIDDEN', 'READ')
+        GROUP BY s.updated_ts / 86400, v.uid
+        """
+    )
+    conn.execute(
+        """
+        INSERT INTO stats_video_daily(day, visible_cnt)
+        SELECT v.pub_ts / 86400, COUNT(*)
+        FROM videos v
+        LEFT JOIN video_state hs ON hs.bvid = v.bvid AND hs.state = 'HIDDEN'
+        WHERE hs.bvid IS NULL
+        GROUP BY v.pub_ts / 86400
+        """
+    )
+    conn.execute(
+        """
+        INSERT INTO stats_creator(uid, last_pub_ts)
+        SELECT v.uid, MAX(v.pub_ts)
+        FROM videos v
+        LEFT JOIN video_state hs ON hs.bvid = v.bvid AND hs.state = 'HIDDEN'
+        WHERE hs.bvid IS NULL
+        GROUP BY v.uid
+        """
+    )
+
+
+
+@contextmanager
+def triggers_suspended(conn: sqlite3.Connection) -> Iterator[sqlite3.Connection]:
+    """
+    批量灌数据用（tools/gen_library.py）：先删掉全部触发器，逐行维护 video_fts / stats_* 太慢；
+    退出时按 sqlite_master 里原样的定义重建触发器，再全量重建 video_fts 与 stats_* 表并提交。
+    """
+    triggers = conn.execute("SELECT name, sql FROM sqlite_master WHERE type = 'trigger'").fetchall()
+    for name, _ in triggers:
+        conn.execute(f'DROP TRIGGER IF EXISTS "{name}"')
     conn.commit()
+    try:
+        yield conn
+    finally:
+        conn.commit()
+        for _, sql in triggers:
+            conn.execute(sql)
+        rebuild_fts(conn)
+        rebuild_stats_rollups(conn)
+        conn.commit()
+
+def _migration_2_fts(conn: sqlite3.Connection) -> None:
+    _exec_script(conn, FTS_DDL)
+    rebuild_fts(conn)
+
+
+def _migration_3_keyset_indexes(conn: sqlite3.Connection) -> None:
+    # /api/videos 的 cursor 翻页按 (排序键..., bvid) seek，索引需覆盖完整排序键
+    conn.execute("DROP INDEX IF EXISTS idx_videos_pub")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_videos_pub_bvid ON videos(pub_ts DESC, bvid DESC)")
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_videos_view_pub_bvid "
+        "ON videos(COALESCE(view, 0) DESC, pub_ts DESC, bvid DESC)"
+    )
+
+
+def _migration_4_daily_indexes(conn: sqlite3.Connection) -> None:
+    # /api/daily 按 creator 倒序 seek 最新视频：排序键带上 bvid，LIMIT 1 不需要临时排序
+    conn.execute("DROP INDEX IF EXISTS idx_videos_uid_pub")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_videos_uid_pub_bvid ON videos(uid, pub_ts DESC, bvid DESC)")
+    # 外层 creators 扫描（enabled / group 过滤 + priority / weight）只走索引
+    conn.execute("DROP INDEX IF EXISTS idx_creators_enabled")
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_creators_enabled_group "
+        "ON creators(enabled, group_name, priority, weight)"
+    )
+
+
+def _migration_5_stats_rollups(conn: sqlite3.Connection) -> None:
+    # 很早的库里 video_state 没有 updated_ts：补列，旧行记在 0 日（不落入任何时间窗）
+    cols = {row["name"] for row in conn.execute("PRAGMA table_info(video_state)").fetchall()}
+    if "updated_ts" not in cols:
+        conn.execute("ALTER TABLE video_state ADD COLUMN updated_ts INTEGER NOT NULL DEFAULT 0")
+    _exec_script(conn, ROLLUP_DDL)
+    rebuild_stats_rollups(conn)
+
+
+def _migration_6_window_indexes(conn: sqlite3.Connection) -> None:
+    # push_log 只有 bvid 主键：冷却期判定（load_recent_pushed_uid_set）与统计窗口的边界日都按
+    # channel + pushed_ts 取范围，带上 bvid 后 join videos 不必回表
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_push_log_channel_ts ON push_log(channel, pushed_ts, bvid)")
+    # 状态窗口统计按 state + updated_ts 取范围；以 state 开头，原 idx_video_state_state 可以去掉
+    conn.execute("DROP INDEX IF EXISTS idx_video_state_state")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_video_state_state_ts ON video_state(state, updated_ts, bvid)")
+    # GET /api/state 不带过滤时按 updated_ts 倒序分页
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_video_state_ts ON video_state(updated_ts)")
+
+
+# (版本号, 迁移函数)，按版本号递增追加；已发布的迁移不要再改
+MIGRATIONS: List[Tuple[int, Callable[[sqlite3.Connection], None]]] = [
+    (1, _migration_1_baseline),
+    (2, _migration_2_fts),
+    (3, _migration_3_keyset_indexes),
+    (4, _migration_4_daily_indexes),
+    (5, _migration_5_stats_rollups),
+    (6, _migration_6_window_indexes),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def schema_version(conn: sqlite3.Connection) -> int:
+    return int(conn.execute("PRAGMA user_version").fetchone()[0])
+
+
+def migrate(conn: sqlite3.Connection) -> int:
+    """
+    把数据库升级到 SCHEMA_VERSION，版本号记在 PRAGMA user_version。
+    只在进程启动时调用一次（web 启动、抓取/推送 CLI 开始时），请求处理路径上不再碰 DDL。
+    每个迁移单独一个 BEGIN IMMEDIATE 事务：多个进程同时启动时只有一个会真正执行。
+    返回迁移后的版本号。
+    """
+    # WAL 是持久化在库文件里的设置，不能放进事务
+    conn.execute("PRAGMA journal_mode=WAL")
+    if schema_version(conn) >= SCHEMA_VERSION:
+        return schema_version(conn)
+
+    for version, fn in MIGRATIONS:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # 拿到写锁后再读一次：别的进程可能刚迁移完
+            if schema_version(conn) >= version:
+                conn.rollback()
+                continue
+            fn(conn)
+            conn.execute(f"PRAGMA user_version = {int(version)}")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        print(f"db: migrated to schema v{version}")
+    return schema_version(conn)
 
 
 def _migrate_creators_table(conn: sqlite3.Connection) -> None:
@@ -94,6 +831,11 @@ def _migrate_creators_table(conn: sqlite3.Connection) -> None:
         conn.execute("ALTER TABLE creators ADD COLUMN priority INTEGER NOT NULL DEFAULT 0")
     if "weight" not in existing_columns:
         conn.execute("ALTER TABLE creators ADD COLUMN weight INTEGER NOT NULL DEFAULT 1")
+    # 增量抓取高水位：该 creator 已见过的最新视频
+    if "hwm_pub_ts" not in existing_columns:
+        conn.execute("ALTER TABLE creators ADD COLUMN hwm_pub_ts INTEGER")
+    if "hwm_bvid" not in existing_columns:
+        conn.execute("ALTER TABLE creators ADD COLUMN hwm_bvid TEXT")
 
     conn.execute(
         """
@@ -0,0 +1,184 @@
+"""
+视频库导出：videos 连同 tags / 状态 / creator 信息逐行输出为 NDJSON 或 CSV。
+
+    python -m app.export --format ndjson --out videos.ndjson
+    python -m app.export --format csv --out videos.csv --group 必看 --view-min 10000
+    python -m app.export --q 原神 --state STAR > star.ndjson
+
+筛选参数与 /api/videos 一致，区别是默认导出全部：不限白名单（--only-whitelist 打开），
+不排除 HIDDEN / READ（--hide-seen 打开）。HTTP 接口为 GET /api/export?format=ndjson|csv。
+
+一条 SELECT 在专用连接上边读边写（fetchmany），tags 按批 IN 查询，内存占用与导出行数无关；
+整个导出在同一个读快照里完成（WAL 下不阻塞抓取写入）。
+"""
+import argparse
+import contextlib
+import csv
+import io
+import json
+import sqlite3
+import sys
+from typing import Dict, Iterator, List, Optional
+
+from .config import get_config
+from .db import connect, migrate
+from .video_query import load_tags, video_filters, video_order
+
+EXPORT_FORMATS = {"ndjson": "application/x-ndjson", "csv": "text/csv; charset=utf-8"}
+
+# 导出列（CSV 表头顺序）；tags 在 NDJSON 里是数组，CSV 里用 | 连接
+EXPORT_COLUMNS = [
+    "bvid", "aid", "uid", "author_name", "title", "pub_ts", "duration_sec", "url", "cover_url", "desc",
+    "tid", "tname", "view", "like_cnt", "reply_cnt", "danmaku", "favorite", "coin", "share",
+    "fetched_ts", "stats_ts", "state", "state_updated_ts",
+    "creator_name", "group_name", "creator_enabled", "creator_priority", "creator_weight", "tags",
+]
+
+FETCH_ROWS = 500
+
+
+def open_export_connection(check_same_thread: bool = True) -> sqlite3.Connection:
+    """导出专用连接：长时间占着一个读快照，不从 API 连接池借。"""
+    cfg = get_config()
+    return connect(cfg["app"]["db_path"], cfg.get("db") or {}, check_same_thread=check_same_thread)
+
+
+def iter_export_rows(
+    conn: sqlite3.Connection,
+    q: Optional[str] = None,
+    uid: Optional[int] = None,
+    tid: Optional[int] = None,
+    tag: Optional[str] = None,
+    group: Optional[str] = None,
+    view_min: Optional[int] = None,
+    view_max: Optional[int] = None,
+    state: Optional[str] = None,
+    only_whitelist: bool = False,
+    hide_seen: bool = False,
+    sort: Optional[str] = None,
+) -> Iterator[Dict]:
+    """按 /api/videos 的筛选与排序逐行产出 dict（键为 EXPORT_COLUMNS）。"""
+    fts_join, fts_params, where, params = video_filters(
+        q=q,
+        uid=uid,
+        tid=tid,
+        tag=tag,
+        group=group,
+        view_min=view_min,
+        view_max=view_max,
+        state=state,
+        only_whitelist=only_whitelist,
+        hide_seen=hide_seen,
+    )
+    sort, order_sql = video_order(sort, bool(fts_join))
+    where_sql = ("WHERE " + " AND ".join(where)) if where else ""
+
+    cur = conn.execute(
+        f"""
+        SELECT v.bvid, v.aid, v.uid, v.author_name, v.title, v.pub_ts, v.duration_sec, v.url, v.cover_url,
+               v."desc" AS "desc", v.tid, v.tname, v.view, v.like_cnt, v.reply_cnt, v.danmaku, v.favorite,
+               v.coin, v.share, v.fetched_ts, v.stats_ts,
+               COALESCE(s.state, 'NEW') AS state, s.updated_ts AS state_updated_ts,
+               COALESCE(c.author_name, c.name) AS creator_name, c.group_name,
+               c.enabled AS creator_enabled, c.priority AS creator_priority, c.weight AS creator_weight
+        FROM videos v{fts_join}
+        LEFT JOIN creators c ON c.uid = v.uid
+        LEFT JOIN video_state s ON s.bvid = v.bvid
+        {where_sql}
+        {order_sql}
+        """,
+        (*fts_params, *params),
+    )
+    try:
+        while True:
+            rows = cur.fetchmany(FETCH_ROWS)
+            if not rows:
+                break
+            tags_by_bvid = load_tags(conn, [r["bvid"] for r in rows])
+            for r in rows:
+                item = dict(r)
+                item["tags"] = tags_by_bvid.get(r["bvid"], [])
+                yield item
+    finally:
+        cur.close()
+
+
+def iter_ndjson(rows: Iterator[Dict]) -> Iterator[str]:
+    for item in rows:
+        yield json.dumps(item, ensure_ascii=False) + "\n"
+
+
+def iter_csv(rows: Iterator[Dict], header: bool = True) -> Iterator[str]:
+    """每 FETCH_ROWS 行产出一段文本，缓冲区写完即清空。"""
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    if header:
+        writer.writerow(EXPORT_COLUMNS)
+    n = 0
+    for item in rows:
+        writer.writerow(["|".join(item["tags"]) if col == "tags" else item[col] for col in EXPORT_COLUMNS])
+        n += 1
+        if n % FETCH_ROWS == 0:
+            yield buf.getvalue()
+            buf.seek(0)
+            buf.truncate()
+    if buf.tell():
+        yield buf.getvalue()
+
+
+def stream_export(conn: sqlite3.Connection, fmt: str, close: bool = False, **filters) -> Iterator[str]:
+    """fmt 为 ndjson / csv；close=True 时导出结束（或中途被丢弃）后关闭 conn。"""
+    try:
+        rows = iter_export_rows(conn, **filters)
+        if fmt == "csv":
+            yield from iter_csv(rows)
+        else:
+            yield from iter_ndjson(rows)
+    finally:
+        if close:
+            conn.close()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Export the video library as NDJSON or CSV")
+    parser.add_argument("--format", choices=sorted(EXPORT_FORMATS), default="ndjson")
+    parser.add_argument("--out", default="-", help="output file (default: stdout)")
+    parser.add_argument("--q", default=None)
+    parser.add_argument("--uid", type=int, default=None)
+    parser.add_argument("--tid", type=int, default=None)
+    parser.add_argument("--tag", default=None)
+    parser.add_argument("--group", default=None)
+    parser.add_argument("--view-min", type=int, default=None)
+    parser.add_argument("--view-max", type=int, default=None)
+    parser.add_argument("--state", default=None, choices=["NEW", "READ", "LATER", "STAR", "WATCHED", "HIDDEN"])
+    parser.add_argument("--only-whitelist", action="store_true", help="only enabled creators (as /api/videos)")
+    parser.add_argument("--hide-seen", action="store_true", help="skip HIDDEN / READ when --state is not given")
+    parser.add_argument("--sort", default=None, choices=["pub", "view", "rank"])
+    args = parser.parse_args(argv)
+
+    filters = dict(
+        q=args.q, uid=args.uid, tid=args.tid, tag=args.tag, group=args.group,
+        view_min=args.view_min, view_max=args.view_max, state=args.state,
+        only_whitelist=args.only_whitelist, hide_seen=args.hide_seen, sort=args.sort,
+    )
+    conn = open_export_connection()
+    try:
+        # 与其它 CLI 一样先迁移（--q 依赖 video_fts*）；迁移日志走 stderr，不混进 stdout 上的导出内容
+        with contextlib.redirect_stdout(sys.stderr):
+            migrate(conn)
+    except Exception:
+        conn.close()
+        raise
+    # CSV 交给 csv 模块处理换行，文件以 newline="" 打开
+    out = sys.stdout if args.out == "-" else open(args.out, "w", encoding="utf-8", newline="")
+    try:
+        for chunk in stream_export(conn, args.format, close=True, **filters):
+            out.write(chunk)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
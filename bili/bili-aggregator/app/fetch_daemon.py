@@ -0,0 +1,33 @@
+import time
+
+from .config import get_config
+from .fetcher import run_fetch
+from .ratelimit import build_limiter
+from .sources.registry import SourceRegistry
+
+
+def main() -> int:
+    """
+    常驻抓取：source 客户端与 HTTP 连接池在整个进程里只构造一次，
+    每轮之间 sleep fetch.daemon_interval_sec 秒（配合 fetch.schedule 可以设得较短）。
+    """
+    config = get_config()
+    registry = SourceRegistry(config, build_limiter(config.get("fetch")))
+    interval = max(1, int((config.get("fetch") or {}).get("daemon_interval_sec", 600)))
+    try:
+        while True:
+            # creators / 调度参数：配置文件改过才重新解析；客户端与连接池沿用
+            config = get_config()
+            try:
+                print(run_fetch(config, registry=registry))
+            except Exception as exc:
+                print("FETCH RUN FAILED:", repr(exc))
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        return 0
+    finally:
+        registry.close()
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
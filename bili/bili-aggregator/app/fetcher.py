@@ -1,175 +1,368 @@
 import random
 import time
-from typing import Dict, List, Tuple
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, List, Optional, Tuple
 
 from . import db
-from .db import connect, init_db
+from .db import migrate, sync_creators
+from .ingest import ingest_videos
+from .ratelimit import build_limiter
+from .sources.registry import SourceRegistry
+from .sources.resilience import CircuitOpenError
+from .stats_refresh import refresh_recent_stats
+from .tag_enrich import drain_tag_queue
+from .scheduler import build_schedule, pop_due
 
 
-def upsert_creator(
-    conn,
+import os
+import time
+import random
+from typing import Dict, Tuple
+
+
+def _fetch_creator(
+    source: str,
     uid: int,
-    name: str | None,
-    group_name: str | None,
-    enabled: bool,
-    priority: int = 0,
-    weight: int = 1,
-) -> None:
-    conn.execute(
-        """
-        INSERT INTO creators(uid, name, author_name, group_name, enabled, priority, weight)
-        VALUES (?, ?, ?, ?, ?, ?, ?)
-        ON CONFLICT(uid) DO UPDATE SET
-          name=excluded.name,
-          author_name=excluded.author_name,
-          group_name=excluded.group_name,
-          enabled=excluded.enabled,
-          priority=excluded.priority,
-          weight=excluded.weight
-        """,
-        (uid, name, name, group_name, 1 if enabled else 0, int(priority), max(1, int(weight))),
-    )
+    limit: int,
+    config: Dict,
+    registry: SourceRegistry,
+    since_ts: Optional[int] = None,
+    since_bvid: Optional[str] = None,
+) -> List[Dict]:
+    """
+    按 source 拉取单个 creator 的视频列表。
+    并发模式下在 worker 线程里执行：只做网络请求与解析，不碰数据库。
+    since_ts / since_bvid 为该 creator 的高水位，source 碰到即停止翻页。
+    """
+    if source == "stub":
+        from .sources.stub import fetch_creator_videos
+        return fetch_creator_videos(uid, limit, since_ts=since_ts, since_bvid=since_bvid)
 
-def upsert_video(conn, v: Dict, fetched_ts: int) -> None:
-    stats = v.get("stats") or {}
-    conn.execute(
-        """
-        INSERT INTO videos(
-          bvid, aid, uid, author_name, title, pub_ts, duration_sec, url, cover_url, "desc",
-          tid, tname,
-          view, like_cnt, reply_cnt, danmaku, favorite, coin, share,
-          fetched_ts, stats_ts
+    if source == "rsshub":
+        from .sources.rsshub import fetch_creator_videos
+        rss_cfg = config["rsshub"]
+        registry.limiter.acquire()
+        return fetch_creator_videos(
+            uid, limit, rss_cfg["base_url"], rss_cfg["route_template"],
+            since_ts=since_ts, since_bvid=since_bvid,
+            session=registry.get("rsshub"),
+            timeout_sec=int((config.get("bilibili", {}) or {}).get("timeout_sec", 15)),
         )
-        VALUES(?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?)
-        ON CONFLICT(bvid) DO UPDATE SET
-          author_name=COALESCE(excluded.author_name, videos.author_name),
-          title=excluded.title,
-          pub_ts=excluded.pub_ts,
-          url=excluded.url,
-          cover_url=excluded.cover_url,
-          "desc"=excluded."desc",
-          tid=excluded.tid,
-          tname=excluded.tname,
-          view=COALESCE(excluded.view, videos.view),
-          like_cnt=COALESCE(excluded.like_cnt, videos.like_cnt),
-          reply_cnt=COALESCE(excluded.reply_cnt, videos.reply_cnt),
-          fetched_ts=excluded.fetched_ts,
-          stats_ts=COALESCE(excluded.stats_ts, videos.stats_ts)
-        """,
-        (
-           v["bvid"], v.get("aid"), v["uid"], v.get("author_name"), v["title"], v["pub_ts"], v.get("duration_sec"),
-           v["url"], v.get("cover_url"), v.get("desc"),
-           v.get("tid"), v.get("tname"),
-           stats.get("view"), stats.get("like"), stats.get("reply"),
-           stats.get("danmaku"), stats.get("favorite"), stats.get("coin"), stats.get("share"),
-           fetched_ts, fetched_ts if stats else None
+
+    if source == "bili_api":
+        client = registry.get("bili_api")
+        return client.fetch_creator_videos(
+            uid, limit,
+            since_ts=since_ts,
+            since_bvid=since_bvid,
+            page_size=int(config["fetch"].get("incremental_page_size", 5) or 5),
         )
 
+    raise RuntimeError(f"Unknown source: {source}")
+
+
+# 统计刷新 / tag 补全依赖 Bilibili 稿件接口，只对真实 source 开启
+BILI_ENRICH_SOURCES = ("bili_api", "bili_dynamic")
+
+FEED_BASELINE_KEY = "bili_dynamic.update_baseline"
+FEED_NEWEST_TS_KEY = "bili_dynamic.newest_pub_ts"
+# 翻满 feed_max_pages 仍没追上旧 baseline：记下续翻 offset 与这次追赶开始时的 feed 顶部，追上后才推进 baseline
+FEED_RESUME_OFFSET_KEY = "bili_dynamic.resume_offset"
+FEED_PENDING_BASELINE_KEY = "bili_dynamic.pending_baseline"
+FEED_PENDING_NEWEST_TS_KEY = "bili_dynamic.pending_newest_pub_ts"
+
+
+def _sync_following_feed(conn, config: Dict, registry: SourceRegistry, creators_rows) -> Dict[str, int]:
+    """
+    bili_dynamic：关注 feed 本身就覆盖了所有关注的 creator，
+    所以一轮只拉一次 feed（翻页到上一轮的 baseline 为止），再按 uid 分发写库。
+    请求数只取决于新动态的多少，与 creator 数量无关。
+    返回 ingest_videos 的写入计数。
+    """
+    client = registry.get("bili_dynamic")
+
+    since_id = db.get_fetch_state(conn, FEED_BASELINE_KEY)
+    since_ts_raw = db.get_fetch_state(conn, FEED_NEWEST_TS_KEY)
+    since_ts = int(since_ts_raw) if since_ts_raw else None
+    resume_offset = db.get_fetch_state(conn, FEED_RESUME_OFFSET_KEY)
+    pending_baseline = db.get_fetch_state(conn, FEED_PENDING_BASELINE_KEY) if resume_offset else None
+    pending_ts_raw = db.get_fetch_state(conn, FEED_PENDING_NEWEST_TS_KEY) if resume_offset else None
+    max_pages = int(config["fetch"].get("feed_max_pages", 10) or 10)
+
+    result = client.fetch_following_since(
+        since_id=since_id, since_ts=since_ts, max_pages=max_pages, offset=resume_offset
     )
 
-def replace_tags(conn, bvid: str, tags: List[str]) -> None:
-    conn.execute("DELETE FROM video_tags WHERE bvid=?", (bvid,))
-    for t in tags:
-        t2 = (t or "").strip()
-        if t2:
-            conn.execute("INSERT OR IGNORE INTO video_tags(bvid, tag) VALUES(?,?)", (bvid, t2))
+    # 续翻时本轮第一页在 feed 中段：新 baseline 仍取追赶开始那一轮的第一页
+    new_baseline = pending_baseline or result.get("update_baseline")
+    newest_candidates = [int(t) for t in (pending_ts_raw, result.get("newest_pub_ts")) if t]
+    newest = max(newest_candidates, default=None)
+
+    # baseline 与视频在同一个事务里提交：写库失败时下一轮会从旧 baseline / 旧 offset 重拉
+    if result["complete"]:
+        if new_baseline:
+            db.set_fetch_state(conn, FEED_BASELINE_KEY, str(new_baseline))
+        if newest is not None and (since_ts is None or newest > since_ts):
+            db.set_fetch_state(conn, FEED_NEWEST_TS_KEY, str(newest))
+        if resume_offset:
+            db.set_fetch_state(conn, FEED_RESUME_OFFSET_KEY, None)
+            db.set_fetch_state(conn, FEED_PENDING_BASELINE_KEY, None)
+            db.set_fetch_state(conn, FEED_PENDING_NEWEST_TS_KEY, None)
+    else:
+        # 没追上旧 baseline（首轮则是没翻到底）：baseline 不动，下一轮从这里接着翻，中间的视频不会被跳过
+        db.set_fetch_state(conn, FEED_RESUME_OFFSET_KEY, str(result["next_offset"]))
+        db.set_fetch_state(conn, FEED_PENDING_BASELINE_KEY, str(new_baseline) if new_baseline else None)
+        db.set_fetch_state(conn, FEED_PENDING_NEWEST_TS_KEY, str(newest) if newest is not None else None)
+
+    # feed 一次覆盖全部关注，所有 enabled creator 都算本轮已抓取
+    counts = ingest_videos(
+        conn,
+        result["videos"],
+        int(time.time()),
+        touch_uids=[int(r["uid"]) for r in creators_rows],
+    )
+
+    creators_touched = len({int(v["uid"]) for v in result["videos"]})
+    print(
+        f"feed_sync: pages={result['pages']}, videos={len(result['videos'])}, creators_touched={creators_touched}, "
+        f"complete={result['complete']}"
+    )
+    return counts
+
+
+def _daily_warm_params(config: Dict) -> List[Dict]:
+    """要预热的 /api/daily 参数：网页默认参数 + 推送用的 push.daily 参数（与 push.py 一致）。"""
+    daily_cfg = (config.get("push") or {}).get("daily") or {}
+    push_params = {
+        "group": daily_cfg.get("group", "必看") or None,
+        "hours": int(daily_cfg.get("hours", 24)),
+        "limit": int(daily_cfg.get("limit", 50)),
+        "sample": int(daily_cfg.get("sample", 5)),
+    }
+    return [{}, {k: v for k, v in push_params.items() if v is not None}]
+
+
+def warm_daily_cache(config: Dict) -> int:
+    """
+    抓取写库后请求一遍 web 服务的 /api/daily，让结果缓存在下一次打开页面/推送前就绪。
+    web 服务没在跑时静默跳过；返回成功预热的条数。
+    """
+    cache_cfg = (config.get("api") or {}).get("daily_cache") or {}
+    if not cache_cfg.get("enabled", True) or not cache_cfg.get("warm_after_fetch", True):
+        return 0
+    base_url = ((config.get("app") or {}).get("base_url") or "http://127.0.0.1:8000").rstrip("/")
+    warmed = 0
+    for params in _daily_warm_params(config):
+        query = urllib.parse.urlencode(params)
+        url = f"{base_url}/api/daily" + (f"?{query}" if query else "")
+        try:
+            with urllib.request.urlopen(url, timeout=5) as resp:
+                resp.read()
+            warmed += 1
+        except (OSError, ValueError):
+            break
+    return warmed
+
+
+def _report_resilience(guard) -> None:
+    print(
+        "resilience: "
+        f"retries={guard.stats['retries']}, "
+        f"throttled={guard.stats['throttled']}, "
+        f"circuit_trips={guard.stats['trips']}, "
+        f"stopped={guard.broken}"
+    )
+
+
+def _add_counts(totals: Dict[str, int], counts: Dict[str, int]) -> None:
+    for key, value in counts.items():
+        totals[key] = totals.get(key, 0) + value
+
+
+def _report_throughput(creators: int, failed: int, totals: Dict[str, int], requests: int, elapsed: float) -> None:
+    elapsed = max(elapsed, 1e-6)
+    print(
+        "fetch_stats: "
+        f"creators={creators}, "
+        f"failed={failed}, "
+        f"inserted={totals.get('inserted', 0)}, "
+        f"updated={totals.get('updated', 0)}, "
+        f"unchanged={totals.get('unchanged', 0)}, "
+        f"requests={requests}, "
+        f"elapsed={elapsed:.1f}s, "
+        f"creators_per_sec={creators / elapsed:.3f}, "
+        f"requests_per_sec={requests / elapsed:.3f}"
+    )
 
-import os
-import time
-import random
-from typing import Dict, Tuple
 
-def run_fetch(config: Dict) -> Tuple[int, int]:
+def run_fetch(config: Dict, registry: Optional[SourceRegistry] = None) -> Tuple[int, int]:
+    """
+    抓取一轮。registry 为空时本轮自建并在结束时关闭；
+    daemon 模式传入进程级 registry，客户端与连接池跨轮复用。
+    """
     # === 1. 统一数据库路径，只从 app.db_path 取 ===
     db_path = (config.get("app", {}) or {}).get("db_path", "data/app.db")
     
 
     # === 2. 建立连接（必须在函数最外层缩进） ===
     conn = db.connect(db_path)
-    init_db(conn)
+    migrate(conn)
 
     # === 3. upsert creators ===
-    creators = config.get("creators", [])
-    for c in creators:
-        upsert_creator(
-            conn,
-            c["uid"],
-            c.get("name"),
-            c.get("group"),
-            bool(c.get("enabled", True)),
-            int(c.get("priority", 0)),
-            max(1, int(c.get("weight", 1))),
-        )
-    conn.commit()
+    sync_creators(conn, config.get("creators", []))
 
     # === 4. fetch 配置 ===
-    source = config["fetch"]["source"]
-    print("FETCH SOURCE =", source)
-    limit = int(config["fetch"]["per_creator_limit"])
-    sleep_min, sleep_max = config["fetch"]["polite_sleep_ms"]
+    fetch_cfg = config["fetch"]
+    source = fetch_cfg["source"]
+    limit = int(fetch_cfg["per_creator_limit"])
+    sleep_min, sleep_max = fetch_cfg["polite_sleep_ms"]
+    # concurrency<=1：保持原来的串行 + polite sleep；>1：N 个 worker 共享一个令牌桶
+    concurrency = max(1, int(fetch_cfg.get("concurrency", 1) or 1))
+    own_registry = registry is None
+    if own_registry:
+        registry = SourceRegistry(config, build_limiter(fetch_cfg))
+    requests_before = registry.limiter.acquired
+    guard = registry.guard
+    guard.reset()
+    print("FETCH SOURCE =", source, "CONCURRENCY =", concurrency)
 
-    inserted_or_updated = 0
+    totals = {"inserted": 0, "updated": 0, "unchanged": 0}
+    failed = 0
+    # 并发模式下攒够这么多条视频才落一次库（一个事务）
+    write_batch_size = max(1, int(fetch_cfg.get("write_batch_size", 500) or 500))
+    # 最久没抓过的排在前面：熔断中止后，下一轮从上次没抓到的 creator 接着抓
     creators_rows = conn.execute(
-        "SELECT uid FROM creators WHERE enabled=1"
+        """
+        SELECT uid, hwm_pub_ts, hwm_bvid
+        FROM creators
+        WHERE enabled=1
+        ORDER BY last_fetch_at IS NOT NULL, last_fetch_at ASC, uid ASC
+        """
     ).fetchall()
 
+    sched_cfg = fetch_cfg.get("schedule") or {}
+    if sched_cfg.get("enabled") and source != "bili_dynamic":
+        # 自适应调度：只抓已到期的 creator（最早到期的先抓）
+        heap = build_schedule(conn, sched_cfg, int(time.time()))
+        due_uids = pop_due(heap, int(time.time()), int(sched_cfg.get("max_creators_per_run", 0) or 0))
+        rows_by_uid = {int(r["uid"]): r for r in creators_rows}
+        print(f"schedule: enabled={len(creators_rows)}, due={len(due_uids)}")
+        creators_rows = [rows_by_uid[uid] for uid in due_uids if uid in rows_by_uid]
+    started = time.monotonic()
+
     # === 5. 主抓取循环 ===
-    for r in creators_rows:
-        uid = int(r["uid"])
-        fetched_ts = int(time.time())
-
-        if source == "stub":
-            from .sources.stub import fetch_creator_videos
-            videos = fetch_creator_videos(uid, limit)
-
-        elif source == "rsshub":
-            from .sources.rsshub import fetch_creator_videos
-            rss_cfg = config["rsshub"]
-            videos = fetch_creator_videos(
-                uid, limit, rss_cfg["base_url"], rss_cfg["route_template"]
-            )
+    if source == "bili_dynamic":
+        # feed 型 source：整轮只拉一次，不走 per-creator 循环
+        try:
+            _add_counts(totals, _sync_following_feed(conn, config, registry, creators_rows))
+        except CircuitOpenError as exc:
+            # baseline 没有推进，下一轮从原处重拉
+            failed += 1
+            print("FETCH STOPPED:", repr(exc))
+    elif concurrency <= 1:
+        for r in creators_rows:
+            uid = int(r["uid"])
+            fetched_ts = int(time.time())
+            try:
+                videos = _fetch_creator(
+                    source, uid, limit, config, registry, r["hwm_pub_ts"], r["hwm_bvid"]
+                )
+            except CircuitOpenError as exc:
+                failed += 1
+                print("FETCH STOPPED uid=", uid, repr(exc))
+                break
+            except Exception as exc:
+                failed += 1
+                print("FETCH ERROR uid=", uid, repr(exc))
+                continue
 
-        elif source == "bili_api":
-            from .sources.bili_api import BiliClient
-            bcfg = config.get("bilibili", {}) or {}
-            client = BiliClient(
-                cookie=bcfg.get("cookie"),
-                timeout_sec=int(bcfg.get("timeout_sec", 15))
-            )
-            videos = client.fetch_creator_videos(uid, limit)
-
-        elif source == "bili_dynamic":
-            from .sources.bili_dynamic import BiliDynamicWebClient
-            bcfg = config.get("bilibili", {}) or {}
-            cookie = (bcfg.get("cookie") or "").strip()
-            if not cookie:
-                raise RuntimeError("bili_dynamic requires bilibili.cookie")
-
-            client = BiliDynamicWebClient(
-                cookie=cookie,
-                timeout_sec=int(bcfg.get("timeout_sec", 15))
-            )
-            result = client.fetch_following_videos(limit=limit)
-            videos = result["videos"]
+            # === 6. 写库 ===
+            _add_counts(totals, ingest_videos(conn, videos, fetched_ts, touch_uids=[uid]))
 
-        else:
-            raise RuntimeError(f"Unknown source: {source}")
+            time.sleep(
+                random.randint(int(sleep_min), int(sleep_max)) / 1000.0
+            )
+    else:
+        # 网络请求在线程池里并发，写库统一回到当前线程（sqlite 连接不跨线程）
+        pending_videos: List[Dict] = []
+        pending_uids: List[int] = []
+        pool = ThreadPoolExecutor(max_workers=concurrency)
+        try:
+            futures = {
+                pool.submit(
+                    _fetch_creator, source, int(r["uid"]), limit, config, registry,
+                    r["hwm_pub_ts"], r["hwm_bvid"],
+                ): int(r["uid"])
+                for r in creators_rows
+            }
+            for fut in as_completed(futures):
+                uid = futures[fut]
+                if fut.cancelled():
+                    continue
+                try:
+                    videos = fut.result()
+                except CircuitOpenError as exc:
+                    # 熔断用尽：还没开始的 creator 直接取消，已抓到的照常落库
+                    failed += 1
+                    print("FETCH STOPPED uid=", uid, repr(exc))
+                    pool.shutdown(wait=False, cancel_futures=True)
+                    continue
+                except Exception as exc:
+                    failed += 1
+                    print("FETCH ERROR uid=", uid, repr(exc))
+                    continue
+                pending_videos.extend(videos)
+                pending_uids.append(uid)
+                if len(pending_videos) >= write_batch_size:
+                    _add_counts(totals, ingest_videos(conn, pending_videos, int(time.time()), touch_uids=pending_uids))
+                    pending_videos, pending_uids = [], []
+        finally:
+            pool.shutdown(wait=True)
 
-        # === 6. 写库 ===
-        for v in videos:
-            upsert_video(conn, v, fetched_ts)
-            replace_tags(conn, v["bvid"], v.get("tags") or [])
-            inserted_or_updated += 1
+        if pending_uids:
+            _add_counts(totals, ingest_videos(conn, pending_videos, int(time.time()), touch_uids=pending_uids))
 
-        conn.execute(
-            "UPDATE creators SET last_fetch_at=datetime('now') WHERE uid=?",
-            (uid,)
+    # === 7. 近期视频统计刷新（与列表抓取共用限速器） ===
+    # 熔断用尽时不再发任何附加请求
+    if source in BILI_ENRICH_SOURCES and not guard.broken:
+        try:
+            refresh = refresh_recent_stats(conn, registry.get("bili_api"), fetch_cfg, concurrency)
+        except CircuitOpenError as exc:
+            refresh = {"candidates": 0, "refreshed": 0, "failed": 0}
+            print("STATS REFRESH STOPPED:", repr(exc))
+        print(
+            "stats_refresh: "
+            f"candidates={refresh['candidates']}, "
+            f"refreshed={refresh['refreshed']}, "
+            f"failed={refresh['failed']}"
         )
-        conn.commit()
 
-        time.sleep(
-            random.randint(int(sleep_min), int(sleep_max)) / 1000.0
+    # === 8. tag 补全队列（低优先级：独立请求预算 + 每轮上限，放在主抓取之后） ===
+    enrich_cfg = fetch_cfg.get("tag_enrich") or {}
+    if source in BILI_ENRICH_SOURCES and enrich_cfg.get("enabled", True) and not guard.broken:
+        enrich = drain_tag_queue(conn, registry.get("bili_api"), enrich_cfg)
+        print(
+            "tag_enrich: "
+            f"picked={enrich['picked']}, "
+            f"tagged={enrich['tagged']}, "
+            f"retry={enrich['retry']}, "
+            f"dropped={enrich['dropped']}"
         )
 
+    _report_throughput(
+        len(creators_rows), failed, totals,
+        registry.limiter.acquired - requests_before, time.monotonic() - started,
+    )
+    if source in BILI_ENRICH_SOURCES:
+        _report_resilience(guard)
+    if own_registry:
+        registry.close()
     conn.close()
-    return (len(creators_rows), inserted_or_updated)
+
+    # === 9. 预热 web 服务的 /api/daily 缓存（写入已提交，旧缓存已随数据代数失效） ===
+    warmed = warm_daily_cache(config)
+    if warmed:
+        print(f"daily_cache: warmed={warmed}")
+    return (len(creators_rows), totals["inserted"] + totals["updated"])
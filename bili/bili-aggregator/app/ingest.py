@@ -0,0 +1,230 @@
+import sqlite3
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+# 入库的唯一写路径；逐字段的合并语义：
+# - author_name / view / like_cnt / reply_cnt：新值为空时保留旧值
+# - 其余内容字段：直接覆盖
+# 比较时不看 fetched_ts / stats_ts，内容没变就整行跳过（不写库）
+_SELECT_CHUNK = 500
+
+_COMPARE_COLUMNS = (
+    "author_name", "title", "pub_ts", "url", "cover_url", "desc",
+    "tid", "tname", "view", "like_cnt", "reply_cnt",
+)
+_COALESCE_COLUMNS = {"author_name", "view", "like_cnt", "reply_cnt"}
+
+_INSERT_SQL = """
+    INSERT INTO videos(
+      bvid, aid, uid, author_name, title, pub_ts, duration_sec, url, cover_url, "desc",
+      tid, tname,
+      view, like_cnt, reply_cnt, danmaku, favorite, coin, share,
+      fetched_ts, stats_ts
+    )
+    VALUES(?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?)
+"""
+
+_UPDATE_SQL = """
+    UPDATE videos SET
+      author_name=?,
+      title=?,
+      pub_ts=?,
+      url=?,
+      cover_url=?,
+      "desc"=?,
+      tid=?,
+      tname=?,
+      view=?,
+      like_cnt=?,
+      reply_cnt=?,
+      fetched_ts=?,
+      stats_ts=COALESCE(?, stats_ts)
+    WHERE bvid=?
+"""
+
+
+def _chunks(seq: Sequence, size: int = _SELECT_CHUNK) -> Iterable[Sequence]:
+    for i in range(0, len(seq), size):
+        yield seq[i:i + size]
+
+
+def _normalize_tags(tags: Optional[List[str]]) -> List[str]:
+    out: List[str] = []
+    for t in tags or []:
+        t2 = (t or "").strip()
+        if t2 and t2 not in out:
+            out.append(t2)
+    return out
+
+
+def _video_fields(v: Dict) -> Dict:
+    stats = v.get("stats") or {}
+    return {
+        "bvid": v["bvid"],
+        "aid": v.get("aid"),
+        "uid": v["uid"],
+        "author_name": v.get("author_name"),
+        "title": v["title"],
+        "pub_ts": v["pub_ts"],
+        "duration_sec": v.get("duration_sec"),
+        "url": v["url"],
+        "cover_url": v.get("cover_url"),
+        "desc": v.get("desc"),
+        "tid": v.get("tid"),
+        "tname": v.get("tname"),
+        "view": stats.get("view"),
+        "like_cnt": stats.get("like"),
+        "reply_cnt": stats.get("reply"),
+        "danmaku": stats.get("danmaku"),
+        "favorite": stats.get("favorite"),
+        "coin": stats.get("coin"),
+        "share": stats.get("share"),
+        "has_stats": bool(stats),
+        "tags": _normalize_tags(v.get("tags")),
+    }
+
+
+def _load_existing(conn: sqlite3.Connection, bvids: List[str]) -> Tuple[Dict[str, sqlite3.Row], Dict[str, set]]:
+    rows: Dict[str, sqlite3.Row] = {}
+    tags: Dict[str, set] = {}
+    cols = ", ".join(f'"{c}"' if c == "desc" else c for c in _COMPARE_COLUMNS)
+    for chunk in _chunks(bvids):
+        placeholders = ",".join(["?"] * len(chunk))
+        for r in conn.execute(
+            f"SELECT bvid, {cols} FROM videos WHERE bvid IN ({placeholders})",
+            tuple(chunk),
+        ).fetchall():
+            rows[r["bvid"]] = r
+        for r in conn.execute(
+            f"SELECT bvid, tag FROM video_tags WHERE bvid IN ({placeholders})",
+            tuple(chunk),
+        ).fetchall():
+            tags.setdefault(r["bvid"], set()).add(r["tag"])
+    return rows, tags
+
+
+def ingest_videos(
+    conn: sqlite3.Connection,
+    videos: List[Dict],
+    fetched_ts: int,
+    touch_uids: Optional[Iterable[int]] = None,
+) -> Dict[str, int]:
+    """
+    批量写入一批视频（含 tags）并刷新 creators.last_fetch_at / 高水位，整批一个事务。
+    - videos：source 返回的视频 dict 列表（同 bvid 以最后一条为准）
+    - touch_uids：需要刷新 last_fetch_at 的 creator；默认取本批视频里出现的 uid
+    返回 {"inserted": n, "updated": n, "unchanged": n}
+    """
+    fields_by_bvid: Dict[str, Dict] = {}
+    for v in videos:
+        f = _video_fields(v)
+        fields_by_bvid[f["bvid"]] = f
+
+    bvids = list(fields_by_bvid)
+    existing, existing_tags = _load_existing(conn, bvids)
+
+    insert_rows: List[tuple] = []
+    update_rows: List[tuple] = []
+    tag_replace_bvids: List[str] = []
+    enqueue_rows: List[tuple] = []
+    counts = {"inserted": 0, "updated": 0, "unchanged": 0}
+
+    for bvid, f in fields_by_bvid.items():
+        old = existing.get(bvid)
+        stats_ts = fetched_ts if f["has_stats"] else None
+
+        if old is None:
+            insert_rows.append((
+                bvid, f["aid"], f["uid"], f["author_name"], f["title"], f["pub_ts"], f["duration_sec"],
+                f["url"], f["cover_url"], f["desc"],
+                f["tid"], f["tname"],
+                f["view"], f["like_cnt"], f["reply_cnt"],
+                f["danmaku"], f["favorite"], f["coin"], f["share"],
+                fetched_ts, stats_ts,
+            ))
+            if f["tags"]:
+                tag_replace_bvids.append(bvid)
+            elif f["aid"]:
+                # source 没给 tag：进补全队列，由 tag_enrich 低频慢慢补
+                enqueue_rows.append((bvid, int(f["aid"]), fetched_ts, fetched_ts))
+            counts["inserted"] += 1
+            continue
+
+        merged = {}
+        for col in _COMPARE_COLUMNS:
+            new_val = f[col]
+            if col in _COALESCE_COLUMNS and new_val is None:
+                new_val = old[col]
+            merged[col] = new_val
+
+        row_changed = any(merged[col] != old[col] for col in _COMPARE_COLUMNS)
+        # source 没给 tag 时保留已有 tag（可能是补全队列写进来的），不当作变化
+        tags_changed = bool(f["tags"]) and set(f["tags"]) != existing_tags.get(bvid, set())
+
+        if row_changed:
+            update_rows.append((
+                *(merged[col] for col in _COMPARE_COLUMNS),
+                fetched_ts, stats_ts, bvid,
+            ))
+        if tags_changed:
+            tag_replace_bvids.append(bvid)
+
+        if row_changed or tags_changed:
+            counts["updated"] += 1
+        else:
+            counts["unchanged"] += 1
+
+    if touch_uids is None:
+        touch_uids = {int(f["uid"]) for f in fields_by_bvid.values()}
+
+    # 每个 creator 本批最新的视频，用来推进高水位（只前进不后退）
+    newest_by_uid: Dict[int, Dict] = {}
+    for f in fields_by_bvid.values():
+        uid = int(f["uid"])
+        cur = newest_by_uid.get(uid)
+        if cur is None or int(f["pub_ts"]) > int(cur["pub_ts"]):
+            newest_by_uid[uid] = f
+
+    try:
+        if insert_rows:
+            conn.executemany(_INSERT_SQL, insert_rows)
+        if update_rows:
+            conn.executemany(_UPDATE_SQL, update_rows)
+        if tag_replace_bvids:
+            conn.executemany(
+                "DELETE FROM video_tags WHERE bvid=?",
+                [(b,) for b in tag_replace_bvids],
+            )
+            conn.executemany(
+                "INSERT OR IGNORE INTO video_tags(bvid, tag) VALUES(?,?)",
+                [(b, t) for b in tag_replace_bvids for t in fields_by_bvid[b]["tags"]],
+            )
+        if enqueue_rows:
+            conn.executemany(
+                """
+                INSERT OR IGNORE INTO tag_queue(bvid, aid, attempts, next_try_ts, enqueued_ts)
+                VALUES (?, ?, 0, ?, ?)
+                """,
+                enqueue_rows,
+            )
+        conn.executemany(
+            "UPDATE creators SET last_fetch_at=datetime('now') WHERE uid=?",
+            [(int(uid),) for uid in touch_uids],
+        )
+        if newest_by_uid:
+            conn.executemany(
+                """
+                UPDATE creators
+                SET hwm_pub_ts=?, hwm_bvid=?
+                WHERE uid=? AND (hwm_pub_ts IS NULL OR hwm_pub_ts < ?)
+                """,
+                [
+                    (int(f["pub_ts"]), f["bvid"], uid, int(f["pub_ts"]))
+                    for uid, f in newest_by_uid.items()
+                ],
+            )
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+    return counts
@@ -1,9 +1,22 @@
-from fastapi import FastAPI, Query
-from typing import List, Optional
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from typing import Dict, List, Optional
+import base64
+import binascii
+import hashlib
+import json
 import random
+import threading
 import time
-from .config import load_config
-from .db import connect, init_db
+from .cache import DataGeneration, LRUCache
+from .config import get_config, on_config_change
+from .db import ConnectionPool, migrate, sync_creators
+from .export import EXPORT_FORMATS, open_export_connection, stream_export
+from .rollup import count_visible_videos, pushed_window_sql, state_window_sql
+from .sampling import weighted_sample_without_replacement
+from .state_queue import StateWriteQueue
+from .video_query import load_tags, video_filters, video_order
 from .schemas import (
     CreatorOut,
     CreatorStatsOut,
@@ -18,43 +31,238 @@ from .schemas import (
     VideoStateUpdateIn,
 )
 
-app = FastAPI()
+_pool: Optional[ConnectionPool] = None
+_generation: Optional[DataGeneration] = None
+_pool_lock = threading.Lock()
+
+# /api/daily 结果缓存：key 里带数据代数，抓取进程/其它连接写库后旧条目自然失效；
+# 本进程内的写接口提交后再主动清空
+_daily_cache = LRUCache(maxsize=64)
+
+# 单条 / 批量状态写入共用的合并队列（见 app/state_queue.py），首次写入时按 api.state_queue 创建
+_state_writer: Optional[StateWriteQueue] = None
+_state_writer_lock = threading.Lock()
+
+# /api/state/batch 单次最多条数
+STATE_BATCH_MAX = 1000
+
+
+def get_pool() -> ConnectionPool:
+    """进程级连接池；push.py 等直接调用 handler 时也会按需创建。"""
+    global _pool
+    # get_config() 平时只做两次 stat；配置文件有变化时在这里触发下面的回调
+    cfg = get_config()
+    with _pool_lock:
+        if _pool is None:
+            _pool = ConnectionPool(cfg["app"]["db_path"], cfg.get("db") or {})
+        return _pool
+
+
+def get_generation() -> DataGeneration:
+    """当前库的数据代数（见 app/cache.py），随连接池一起创建、一起丢弃。"""
+    global _generation
+    pool = get_pool()
+    with _pool_lock:
+        if _generation is None:
+            _generation = DataGeneration(pool.db_path)
+        return _generation
+
+
+def db_connection():
+    return get_pool().connection()
+
+
+def close_pool() -> None:
+    global _pool, _generation
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+            _pool = None
+        if _generation is not None:
+            _generation.close()
+            _generation = None
+    _daily_cache.clear()
+
+
+def _write_states(items: Dict[str, tuple]) -> None:
+    """{bvid: (state, updated_ts)} 在一个事务里写入 video_state。"""
+    with db_connection() as conn:
+        conn.executemany(
+            """
+            INSERT INTO video_state (bvid, state, updated_ts)
+            VALUES (?, ?, ?)
+            ON CONFLICT(bvid) DO UPDATE SET
+              state=excluded.state,
+              updated_ts=excluded.updated_ts
+            """,
+            [(bvid, state, updated_ts) for bvid, (state, updated_ts) in items.items()],
+        )
+        conn.commit()
+    _daily_cache.clear()
+
+
+def get_state_writer() -> StateWriteQueue:
+    """window_ms 只在创建时读取，修改后重启 API 生效；0 表示不合并、每次请求直接提交。"""
+    global _state_writer
+    with _state_writer_lock:
+        if _state_writer is None:
+            queue_cfg = (get_config().get("api") or {}).get("state_queue") or {}
+            _state_writer = StateWriteQueue(_write_states, float(queue_cfg.get("window_ms", 50)) / 1000.0)
+        return _state_writer
+
+
+def close_state_writer() -> None:
+    """把还没提交的状态写完并停掉写线程。"""
+    global _state_writer
+    with _state_writer_lock:
+        writer, _state_writer = _state_writer, None
+    if writer is not None:
+        writer.close()
+
+
+@on_config_change
+def _reload_pool_on_config_change(old: dict, new: dict) -> None:
+    # db_path 或连接参数变了：丢弃旧池（借出中的连接归还时关闭），下次请求按新配置建池
+    if (old.get("app") or {}).get("db_path") != (new.get("app") or {}).get("db_path") or old.get("db") != new.get("db"):
+        print("config changed: rebuilding sqlite connection pool")
+        close_pool()
+        with db_connection() as conn:
+            migrate(conn)
+
+
+@on_config_change
+def _sync_creators_on_config_change(old: dict, new: dict) -> None:
+    if old.get("creators") != new.get("creators"):
+        with db_connection() as conn:
+            n = sync_creators(conn, new.get("creators") or [])
+        print(f"config changed: synced {n} creators")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # schema 迁移只在启动时跑一次；请求处理里只从连接池取连接，不再执行 DDL
+    with db_connection() as conn:
+        migrate(conn)
+    yield
+    close_state_writer()
+    close_pool()
+
+
+app = FastAPI(lifespan=lifespan)
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, StreamingResponse
 
 app.mount("/static", StaticFiles(directory="web"), name="static")
 
+# 带 ETag 的只读接口；True 表示结果依赖“当前时间”的窗口（hours / days），ETag 里再带上时间桶
+ETAG_PATHS = {
+    "/api/videos": False,
+    "/api/creators": False,
+    "/api/creator-groups": False,
+    "/api/state": False,
+    "/api/daily": True,
+    "/api/stats/overview": True,
+    "/api/stats/creators": True,
+}
 
-def _weighted_sample_without_replacement(
-    items: List[dict],
-    k: int,
-    rng: random.Random,
-) -> List[dict]:
-    """
-    Weighted sampling without replacement.
-    items: [{"uid": int, "weight": int, ...}, ...]
-    """
-    if k <= 0 or not items:
-        return []
 
-    pool = list(items)
-    chosen: List[dict] = []
+def _compute_etag(path: str, query: str, windowed: bool, api_cfg: dict) -> str:
+    parts = [get_generation().current(), hashlib.sha1(f"{path}?{query}".encode("utf-8")).hexdigest()[:16]]
+    if windowed:
+        bucket_sec = max(1, int(api_cfg.get("window_bucket_sec", 60)))
+        parts.append(str(int(time.time()) // bucket_sec))
+    return '"' + "-".join(parts) + '"'
+
 
-    while pool and len(chosen) < k:
-        total_weight = sum(max(1, int(it.get("weight", 1))) for it in pool)
-        pick = rng.uniform(0, total_weight)
-        acc = 0.0
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    return any(tag.strip() in (etag, "*") for tag in if_none_match.split(","))
 
-        chosen_index = len(pool) - 1
-        for idx, it in enumerate(pool):
-            acc += max(1, int(it.get("weight", 1)))
-            if acc >= pick:
-                chosen_index = idx
-                break
 
-        chosen.append(pool.pop(chosen_index))
+def _request_etag(path: str, query: str, windowed: bool) -> Optional[str]:
+    """读配置（可能 stat 文件、触发监听）+ 查 data_version，都是阻塞操作，放线程池里跑。"""
+    api_cfg = get_config().get("api") or {}
+    if not api_cfg.get("etag", True):
+        return None
+    return _compute_etag(path, query, windowed, api_cfg)
 
-    return chosen
+
+@app.middleware("http")
+async def etag_middleware(request: Request, call_next):
+    """
+    数据没变（data_version 相同、参数相同、同一时间桶）时，带 If-None-Match 的 GET 直接 304，
+    不进 handler、不查 SQL。Cache-Control: no-cache 让浏览器每次都带 ETag 来校验。
+    """
+    windowed = ETAG_PATHS.get(request.url.path)
+    if request.method != "GET" or windowed is None:
+        return await call_next(request)
+
+    etag = await run_in_threadpool(_request_etag, request.url.path, request.url.query, windowed)
+    if etag is None:
+        return await call_next(request)
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and _etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache"})
+
+    response = await call_next(request)
+    if response.status_code == 200:
+        response.headers["ETag"] = etag
+        response.headers["Cache-Control"] = "no-cache"
+    return response
+
+
+def _encode_cursor(sort: str, key) -> str:
+    raw = json.dumps({"s": sort, "k": key}, ensure_ascii=False, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def _decode_cursor(cursor: str, sort: str):
+    """cursor 是不透明字符串：base64url(JSON {"s": 排序方式, "k": 上一页最后一行的排序键})。"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")).decode("utf-8"))
+        key = data["k"]
+        if data["s"] != sort:
+            raise ValueError("sort mismatch")
+        if sort == "rank":
+            if not isinstance(key, int) or key < 0:
+                raise ValueError("bad offset")
+        elif sort == "view":
+            if not (isinstance(key, list) and len(key) == 3):
+                raise ValueError("bad key")
+            key = [int(key[0]), int(key[1]), str(key[2])]
+        else:
+            if not (isinstance(key, list) and len(key) == 2):
+                raise ValueError("bad key")
+            key = [int(key[0]), str(key[1])]
+        return key
+    except (ValueError, KeyError, TypeError, UnicodeDecodeError, binascii.Error):
+        raise HTTPException(status_code=400, detail="invalid cursor")
+
+
+def _hydrate_videos(conn, rows) -> List[VideoOut]:
+    """
+    查询结果行 -> VideoOut；rows 需包含 VideoOut 的基础列与 state。
+    tags 整页一次查询，查询数不随页大小增长。
+    """
+    tags_by_bvid = load_tags(conn, [r["bvid"] for r in rows])
+    return [
+        VideoOut(
+            bvid=r["bvid"],
+            uid=r["uid"],
+            author_name=r["author_name"],
+            title=r["title"],
+            pub_ts=r["pub_ts"],
+            duration_sec=r["duration_sec"],
+            state=r["state"],
+            url=r["url"],
+            cover_url=r["cover_url"],
+            tname=r["tname"],
+            view=r["view"],
+            tags=tags_by_bvid.get(r["bvid"], []),
+        )
+        for r in rows
+    ]
 
 
 @app.get("/")
@@ -79,102 +287,128 @@ def list_videos(
     view_max: Optional[int] = None,
     state: Optional[VideoState] = None,
     only_whitelist: bool = True,
-    sort: str = Query("pub", pattern="^(pub|view)$"),
+    sort: Optional[str] = Query(None, pattern="^(pub|view|rank)$"),
     limit: int = Query(50, ge=1, le=200),
     offset: int = Query(0, ge=0),
+    cursor: Optional[str] = None,
+    response: Response = None,
 ):
-    cfg = load_config()
-    conn = connect(cfg["app"]["db_path"])
-    init_db(conn)
-
-    where = []
-    params = []
-
-    if q:
-        where.append("v.title LIKE ?")
-        params.append(f"%{q}%")
-    if uid:
-        where.append("v.uid=?")
-        params.append(uid)
-    if tid:
-        where.append("v.tid=?")
-        params.append(tid)
-    if view_min is not None:
-        where.append("COALESCE(v.view,0) >= ?")
-        params.append(view_min)
-    if view_max is not None:
-        where.append("COALESCE(v.view,0) <= ?")
-        params.append(view_max)
-    if tag:
-        where.append("EXISTS (SELECT 1 FROM video_tags vt WHERE vt.bvid=v.bvid AND vt.tag=?)")
-        params.append(tag)
-    if only_whitelist:
-        where.append("c.enabled=1")
-    if group:
-        where.append("c.group_name=?")
-        params.append(group)
-
-    if state:
-        where.append("COALESCE(s.state, 'NEW')=?")
-        params.append(state)
-    else:
-        where.append("COALESCE(s.state, 'NEW') NOT IN ('HIDDEN', 'READ')")
-
-    where_sql = ("WHERE " + " AND ".join(where)) if where else ""
-    order_sql = "ORDER BY v.pub_ts DESC" if sort == "pub" else "ORDER BY COALESCE(v.view,0) DESC, v.pub_ts DESC"
-
-    sql = f"""
-      SELECT v.bvid, v.uid, v.author_name, v.title, v.pub_ts, v.duration_sec, v.url, v.cover_url, v.tname, v.view,
-             COALESCE(s.state, 'NEW') AS state
-      FROM videos v
-      LEFT JOIN creators c ON c.uid = v.uid
-      LEFT JOIN video_state s ON s.bvid = v.bvid
-      {where_sql}
-      {order_sql}
-      LIMIT ? OFFSET ?
     """
-    rows = conn.execute(sql, (*params, limit, offset)).fetchall()
-
-    out: List[VideoOut] = []
-    for r in rows:
-        tags = conn.execute("SELECT tag FROM video_tags WHERE bvid=? ORDER BY tag", (r["bvid"],)).fetchall()
-        out.append(
-            VideoOut(
-                bvid=r["bvid"],
-                uid=r["uid"],
-                author_name=r["author_name"],
-                title=r["title"],
-                pub_ts=r["pub_ts"],
-                duration_sec=r["duration_sec"],
-                state=r["state"],
-                url=r["url"],
-                cover_url=r["cover_url"],
-                tname=r["tname"],
-                view=r["view"],
-                tags=[t["tag"] for t in tags],
-            )
+    翻页：优先用 cursor（上一页响应头 X-Next-Cursor 原样带回），按索引 seek，第 N 页与第 1 页代价相同；
+    offset 仅为兼容保留，给了 cursor 时忽略。
+    """
+    with db_connection() as conn:
+        fts_join, fts_params, where, params = video_filters(
+            q=q,
+            uid=uid,
+            tid=tid,
+            tag=tag,
+            group=group,
+            view_min=view_min,
+            view_max=view_max,
+            state=state,
+            only_whitelist=only_whitelist,
         )
+        sort, order_sql = video_order(sort, bool(fts_join))
+
+        key = _decode_cursor(cursor, sort) if cursor else None
+        if key is not None and sort == "rank":
+            # bm25 分数会随库内容变化，相关度排序的 cursor 只记位置
+            offset = int(key)
+        elif key is not None:
+            offset = 0
+            if sort == "view":
+                # 单列的 <= 让 SQLite 在表达式索引上做范围 seek，行值比较再精确到 (pub_ts, bvid)
+                where.append("COALESCE(v.view,0) <= ? AND (COALESCE(v.view,0), v.pub_ts, v.bvid) < (?, ?, ?)")
+                params.append(key[0])
+            else:
+                where.append("(v.pub_ts, v.bvid) < (?, ?)")
+            params.extend(key)
+
+        where_sql = ("WHERE " + " AND ".join(where)) if where else ""
+
+        sql = f"""
+          SELECT v.bvid, v.uid, v.author_name, v.title, v.pub_ts, v.duration_sec, v.url, v.cover_url, v.tname, v.view,
+                 COALESCE(s.state, 'NEW') AS state
+          FROM videos v{fts_join}
+          LEFT JOIN creators c ON c.uid = v.uid
+          LEFT JOIN video_state s ON s.bvid = v.bvid
+          {where_sql}
+          {order_sql}
+          LIMIT ? OFFSET ?
+        """
+        rows = conn.execute(sql, (*fts_params, *params, limit, offset)).fetchall()
+
+        out = _hydrate_videos(conn, rows)
 
-    conn.close()
+    if response is not None and len(rows) == limit:
+        last = rows[-1]
+        if sort == "rank":
+            next_key = offset + limit
+        elif sort == "view":
+            next_key = [int(last["view"] or 0), int(last["pub_ts"]), last["bvid"]]
+        else:
+            next_key = [int(last["pub_ts"]), last["bvid"]]
+        response.headers["X-Next-Cursor"] = _encode_cursor(sort, next_key)
     return out
 
 
 
 
+@app.get("/api/export")
+def export_videos(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    q: Optional[str] = None,
+    uid: Optional[int] = None,
+    tid: Optional[int] = None,
+    tag: Optional[str] = None,
+    group: Optional[str] = None,
+    view_min: Optional[int] = None,
+    view_max: Optional[int] = None,
+    state: Optional[VideoState] = None,
+    only_whitelist: bool = False,
+    hide_seen: bool = False,
+    sort: Optional[str] = Query(None, pattern="^(pub|view|rank)$"),
+):
+    """
+    全库流式导出（见 app/export.py）：筛选参数同 /api/videos，但默认不限白名单、不排除 HIDDEN / READ。
+    专用连接边读边写，不占连接池，内存与行数无关。
+    """
+    # StreamingResponse 在线程池里逐块迭代，每块可能换一个线程
+    conn = open_export_connection(check_same_thread=False)
+    body = stream_export(
+        conn,
+        format,
+        close=True,
+        q=q,
+        uid=uid,
+        tid=tid,
+        tag=tag,
+        group=group,
+        view_min=view_min,
+        view_max=view_max,
+        state=state,
+        only_whitelist=only_whitelist,
+        hide_seen=hide_seen,
+        sort=sort,
+    )
+    return StreamingResponse(
+        body,
+        media_type=EXPORT_FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="videos.{format}"'},
+    )
+
+
 @app.get("/api/creators", response_model=List[CreatorOut])
 def list_creators():
-    cfg = load_config()
-    conn = connect(cfg["app"]["db_path"])
-    init_db(conn)
-
-    rows = conn.execute(
-        """
-        SELECT uid, COALESCE(author_name, name) AS author_name, enabled, priority, weight
-        FROM creators
-        ORDER BY uid
-        """
-    ).fetchall()
-    conn.close()
+    with db_connection() as conn:
+        rows = conn.execute(
+            """
+            SELECT uid, COALESCE(author_name, name) AS author_name, enabled, priority, weight
+            FROM creators
+            ORDER BY uid
+            """
+        ).fetchall()
 
     return [
         CreatorOut(
@@ -190,52 +424,49 @@ def list_creators():
 
 @app.post("/api/creators", response_model=List[CreatorOut])
 def update_creators(payload: List[CreatorUpdateIn]):
-    cfg = load_config()
-    conn = connect(cfg["app"]["db_path"])
-    init_db(conn)
+    with db_connection() as conn:
+        for item in payload:
+            current = conn.execute(
+                "SELECT uid, enabled, priority, weight FROM creators WHERE uid=?",
+                (item.uid,),
+            ).fetchone()
+            if not current:
+                conn.execute(
+                    """
+                    INSERT INTO creators(uid, author_name, name, enabled, priority, weight)
+                    VALUES (?, NULL, NULL, ?, ?, ?)
+                    """,
+                    (
+                        item.uid,
+                        1 if (item.enabled if item.enabled is not None else True) else 0,
+                        item.priority if item.priority is not None else 0,
+                        max(1, item.weight if item.weight is not None else 1),
+                    ),
+                )
+                continue
+
+            enabled = current["enabled"] if item.enabled is None else (1 if item.enabled else 0)
+            priority = current["priority"] if item.priority is None else item.priority
+            weight = current["weight"] if item.weight is None else max(1, item.weight)
 
-    for item in payload:
-        current = conn.execute(
-            "SELECT uid, enabled, priority, weight FROM creators WHERE uid=?",
-            (item.uid,),
-        ).fetchone()
-        if not current:
             conn.execute(
                 """
-                INSERT INTO creators(uid, author_name, name, enabled, priority, weight)
-                VALUES (?, NULL, NULL, ?, ?, ?)
+                UPDATE creators
+                SET enabled=?, priority=?, weight=?
+                WHERE uid=?
                 """,
-                (
-                    item.uid,
-                    1 if (item.enabled if item.enabled is not None else True) else 0,
-                    item.priority if item.priority is not None else 0,
-                    max(1, item.weight if item.weight is not None else 1),
-                ),
+                (enabled, priority, weight, item.uid),
             )
-            continue
-
-        enabled = current["enabled"] if item.enabled is None else (1 if item.enabled else 0)
-        priority = current["priority"] if item.priority is None else item.priority
-        weight = current["weight"] if item.weight is None else max(1, item.weight)
 
-        conn.execute(
+        conn.commit()
+        _daily_cache.clear()
+        rows = conn.execute(
             """
-            UPDATE creators
-            SET enabled=?, priority=?, weight=?
-            WHERE uid=?
-            """,
-            (enabled, priority, weight, item.uid),
-        )
-
-    conn.commit()
-    rows = conn.execute(
-        """
-        SELECT uid, COALESCE(author_name, name) AS author_name, enabled, priority, weight
-        FROM creators
-        ORDER BY uid
-        """
-    ).fetchall()
-    conn.close()
+            SELECT uid, COALESCE(author_name, name) AS author_name, enabled, priority, weight
+            FROM creators
+            ORDER BY uid
+            """
+        ).fetchall()
 
     return [
         CreatorOut(
@@ -250,26 +481,24 @@ def update_creators(payload: List[CreatorUpdateIn]):
 
 @app.post("/api/state", response_model=VideoStateOut)
 def set_state(payload: VideoStateUpdateIn):
-    cfg = load_config()
-    conn = connect(cfg["app"]["db_path"])
-    init_db(conn)
-
-    updated_ts = int(time.time())
-    conn.execute(
-        """
-        INSERT INTO video_state (bvid, state, updated_ts)
-        VALUES (?, ?, ?)
-        ON CONFLICT(bvid) DO UPDATE SET
-          state=excluded.state,
-          updated_ts=excluded.updated_ts
-        """,
-        (payload.bvid, payload.state, updated_ts),
-    )
-    conn.commit()
-    conn.close()
+    # 经合并队列写入：短时间内的多次点击合成一次提交，返回时本次改动已落盘
+    updated_ts = get_state_writer().submit([(payload.bvid, payload.state)])
     return VideoStateOut(bvid=payload.bvid, state=payload.state, updated_ts=updated_ts)
 
 
+@app.post("/api/state/batch", response_model=List[VideoStateOut])
+def set_state_batch(payload: List[VideoStateUpdateIn]):
+    """一次请求改多条状态，同一事务提交；同一 bvid 出现多次时以最后一条为准。"""
+    if len(payload) > STATE_BATCH_MAX:
+        raise HTTPException(status_code=400, detail=f"too many items (max {STATE_BATCH_MAX})")
+    latest: Dict[str, str] = {}
+    for item in payload:
+        latest.pop(item.bvid, None)
+        latest[item.bvid] = item.state
+    updated_ts = get_state_writer().submit(latest.items())
+    return [VideoStateOut(bvid=bvid, state=state, updated_ts=updated_ts) for bvid, state in latest.items()]
+
+
 @app.get("/api/state", response_model=List[VideoStateOut])
 def list_state(
     bvid: Optional[str] = None,
@@ -277,49 +506,42 @@ def list_state(
     limit: int = Query(200, ge=1, le=1000),
     offset: int = Query(0, ge=0),
 ):
-    cfg = load_config()
-    conn = connect(cfg["app"]["db_path"])
-    init_db(conn)
-
-    where = []
-    params = []
-    if bvid:
-        where.append("bvid=?")
-        params.append(bvid)
-    if state:
-        where.append("state=?")
-        params.append(state)
-
-    where_sql = ("WHERE " + " AND ".join(where)) if where else ""
-    rows = conn.execute(
-        f"""
-        SELECT bvid, state, updated_ts
-        FROM video_state
-        {where_sql}
-        ORDER BY updated_ts DESC
-        LIMIT ? OFFSET ?
-        """,
-        (*params, limit, offset),
-    ).fetchall()
-    conn.close()
+    with db_connection() as conn:
+        where = []
+        params = []
+        if bvid:
+            where.append("bvid=?")
+            params.append(bvid)
+        if state:
+            where.append("state=?")
+            params.append(state)
+
+        where_sql = ("WHERE " + " AND ".join(where)) if where else ""
+        rows = conn.execute(
+            f"""
+            SELECT bvid, state, updated_ts
+            FROM video_state
+            {where_sql}
+            ORDER BY updated_ts DESC
+            LIMIT ? OFFSET ?
+            """,
+            (*params, limit, offset),
+        ).fetchall()
     return [VideoStateOut(bvid=r["bvid"], state=r["state"], updated_ts=r["updated_ts"]) for r in rows]
 
 
 @app.get("/api/creator-groups", response_model=List[str])
 def list_creator_groups():
-    cfg = load_config()
-    conn = connect(cfg["app"]["db_path"])
-    init_db(conn)
-    rows = conn.execute(
-        """
-        SELECT DISTINCT group_name
-        FROM creators
-        WHERE group_name IS NOT NULL AND group_name != ''
-        ORDER BY group_name
-        """
-    ).fetchall()
-    groups = [r["group_name"] for r in rows]
-    conn.close()
+    with db_connection() as conn:
+        rows = conn.execute(
+            """
+            SELECT DISTINCT group_name
+            FROM creators
+            WHERE group_name IS NOT NULL AND group_name != ''
+            ORDER BY group_name
+            """
+        ).fetchall()
+        groups = [r["group_name"] for r in rows]
     return groups
 
 
@@ -331,105 +553,103 @@ def list_daily(
     sample: int = Query(1, ge=0, le=200),
     seed: Optional[int] = Query(None),
 ):
-    cfg = load_config()
-    conn = connect(cfg["app"]["db_path"])
-    init_db(conn)
-
-    if group:
-        row = conn.execute(
-            "SELECT 1 FROM creators WHERE enabled=1 AND group_name=? LIMIT 1",
-            (group,),
-        ).fetchone()
-        if not row:
-            group = None
-
-    cutoff = int(time.time()) - hours * 3600
-    where = ["c.enabled=1", "v.pub_ts >= ?", "COALESCE(s.state, 'NEW') NOT IN ('HIDDEN', 'READ')"]
-    params = [cutoff]
-    if group:
-        where.append("c.group_name=?")
-        params.append(group)
-
-    where_sql = "WHERE " + " AND ".join(where)
-    sql = f"""
-      SELECT v.bvid, v.uid, v.author_name, v.title, v.pub_ts, v.duration_sec, v.url, v.cover_url, v.tname, v.view,
-             COALESCE(s.state, 'NEW') AS state,
-             COALESCE(c.priority, 0) AS creator_priority,
-             COALESCE(c.weight, 1) AS creator_weight
-      FROM videos v
-      LEFT JOIN creators c ON c.uid = v.uid
-      LEFT JOIN video_state s ON s.bvid = v.bvid
-      {where_sql}
-      ORDER BY v.pub_ts DESC
-      LIMIT 2000
-    """
-    rows = conn.execute(sql, tuple(params)).fetchall()
-
-    # 每个 creator 仅保留最新一条（creator 粒度）
-    latest_by_creator = {}
-    for r in rows:
-        uid = int(r["uid"])
-        if uid not in latest_by_creator:
-            latest_by_creator[uid] = r
-
-    latest_rows = list(latest_by_creator.values())
-
-    # Phase 1: 必看 creator（priority > 0），按 priority DESC，再按最新时间
-    must_watch_rows = sorted(
-        [r for r in latest_rows if int(r["creator_priority"] or 0) > 0],
-        key=lambda r: (-int(r["creator_priority"] or 0), -int(r["pub_ts"] or 0)),
-    )
+    cache_cfg = (get_config().get("api") or {}).get("daily_cache") or {}
+    cache_key = None
+    if cache_cfg.get("enabled", True):
+        # 时间窗口按 bucket_sec 取整：同一个桶内 cutoff 视为不变（默认 1 小时）
+        bucket = int(time.time()) // max(1, int(cache_cfg.get("bucket_sec", 3600)))
+        cache_key = (group, hours, limit, sample, seed, bucket, get_generation().current())
+        cached = _daily_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+    with db_connection() as conn:
+        if group:
+            row = conn.execute(
+                "SELECT 1 FROM creators WHERE enabled=1 AND group_name=? LIMIT 1",
+                (group,),
+            ).fetchone()
+            if not row:
+                group = None
+
+        cutoff = int(time.time()) - hours * 3600
+        creator_where = ["c.enabled=1"]
+        creator_params = []
+        if group:
+            creator_where.append("c.group_name=?")
+            creator_params.append(group)
+
+        # 每个 creator 仅保留最新一条（creator 粒度）：对每个 enabled creator 在 idx_videos_uid_pub_bvid 上
+        # 倒序 seek，跳过已读/隐藏，取第一条；代价随 creator 数增长，与视频总量无关，也不会漏掉 creator
+        sql = f"""
+          WITH latest AS (
+            SELECT
+              c.uid AS uid,
+              COALESCE(c.priority, 0) AS creator_priority,
+              COALESCE(c.weight, 1) AS creator_weight,
+              (
+                SELECT lv.bvid
+                FROM videos lv
+                LEFT JOIN video_state ls ON ls.bvid = lv.bvid
+                WHERE lv.uid = c.uid
+                  AND lv.pub_ts >= ?
+                  AND COALESCE(ls.state, 'NEW') NOT IN ('HIDDEN', 'READ')
+                ORDER BY lv.pub_ts DESC, lv.bvid DESC
+                LIMIT 1
+              ) AS bvid
+            FROM creators c
+            WHERE {" AND ".join(creator_where)}
+          )
+          SELECT v.bvid, v.uid, v.author_name, v.title, v.pub_ts, v.duration_sec, v.url, v.cover_url, v.tname, v.view,
+                 COALESCE(s.state, 'NEW') AS state,
+                 l.creator_priority AS creator_priority,
+                 l.creator_weight AS creator_weight
+          FROM latest l
+          JOIN videos v ON v.bvid = l.bvid
+          LEFT JOIN video_state s ON s.bvid = v.bvid
+          ORDER BY v.pub_ts DESC, v.bvid DESC
+        """
+        latest_rows = conn.execute(sql, (cutoff, *creator_params)).fetchall()
 
-    selected_rows = must_watch_rows[:limit]
-    if len(selected_rows) >= limit:
-        final_rows = selected_rows
-    else:
-        # Phase 2 候选：普通 creator（priority=0）
-        normal_rows = [r for r in latest_rows if int(r["creator_priority"] or 0) <= 0]
-        remaining = limit - len(selected_rows)
-
-        if sample == 0:
-            # 关闭权重抽样：按时间顺序回退
-            normal_rows = sorted(normal_rows, key=lambda r: -int(r["pub_ts"] or 0))
-            selected_rows.extend(normal_rows[:remaining])
-        else:
-            rng = random.Random(seed)
-            weighted_pool = [
-                {
-                    "uid": int(r["uid"]),
-                    "weight": max(1, int(r["creator_weight"] or 1)),
-                    "row": r,
-                }
-                for r in normal_rows
-            ]
-            picked = _weighted_sample_without_replacement(weighted_pool, remaining, rng)
-            # 为结果稳定可读，抽样后按发布时间降序展示
-            picked_rows = sorted([it["row"] for it in picked], key=lambda r: -int(r["pub_ts"] or 0))
-            selected_rows.extend(picked_rows)
-
-        final_rows = selected_rows[:limit]
-
-    out: List[VideoOut] = []
-    for r in final_rows:
-        tags = conn.execute("SELECT tag FROM video_tags WHERE bvid=? ORDER BY tag", (r["bvid"],)).fetchall()
-        out.append(
-            VideoOut(
-                bvid=r["bvid"],
-                uid=r["uid"],
-                author_name=r["author_name"],
-                title=r["title"],
-                pub_ts=r["pub_ts"],
-                duration_sec=r["duration_sec"],
-                state=r["state"],
-                url=r["url"],
-                cover_url=r["cover_url"],
-                tname=r["tname"],
-                view=r["view"],
-                tags=[t["tag"] for t in tags],
-            )
+        # Phase 1: 必看 creator（priority > 0），按 priority DESC，再按最新时间
+        must_watch_rows = sorted(
+            [r for r in latest_rows if int(r["creator_priority"] or 0) > 0],
+            key=lambda r: (-int(r["creator_priority"] or 0), -int(r["pub_ts"] or 0)),
         )
 
-    conn.close()
+        selected_rows = must_watch_rows[:limit]
+        if len(selected_rows) >= limit:
+            final_rows = selected_rows
+        else:
+            # Phase 2 候选：普通 creator（priority=0）
+            normal_rows = [r for r in latest_rows if int(r["creator_priority"] or 0) <= 0]
+            remaining = limit - len(selected_rows)
+
+            if sample == 0:
+                # 关闭权重抽样：按时间顺序回退
+                normal_rows = sorted(normal_rows, key=lambda r: -int(r["pub_ts"] or 0))
+                selected_rows.extend(normal_rows[:remaining])
+            else:
+                rng = random.Random(seed)
+                weighted_pool = [
+                    {
+                        "uid": int(r["uid"]),
+                        "weight": max(1, int(r["creator_weight"] or 1)),
+                        "row": r,
+                    }
+                    for r in normal_rows
+                ]
+                picked = weighted_sample_without_replacement(weighted_pool, remaining, rng)
+                # 为结果稳定可读，抽样后按发布时间降序展示
+                picked_rows = sorted([it["row"] for it in picked], key=lambda r: -int(r["pub_ts"] or 0))
+                selected_rows.extend(picked_rows)
+
+            final_rows = selected_rows[:limit]
+
+        out = _hydrate_videos(conn, final_rows)
+
+    if cache_key is not None:
+        _daily_cache.put(cache_key, out)
     return out
 
 
@@ -438,104 +658,80 @@ def stats_page():
     return FileResponse("web/stats.html")
 
 
-def _has_video_state_updated_ts(conn) -> bool:
-    cols = {
-        row["name"]
-        for row in conn.execute("PRAGMA table_info(video_state)").fetchall()
-    }
-    return "updated_ts" in cols
-
-
 @app.get("/api/stats/overview", response_model=StatsOverviewOut)
 def stats_overview(
     days: int = Query(7, ge=1, le=3650),
     channel: str = Query("serverchan"),
 ):
-    cfg = load_config()
-    conn = connect(cfg["app"]["db_path"])
-    init_db(conn)
-
-    cutoff = int(time.time()) - days * 86400
-    note_parts: List[str] = []
+    # 时间窗统计读 stats_* 预聚合表（见 app/rollup.py），代价与历史长度和 days 无关
+    with db_connection() as conn:
+        cutoff = int(time.time()) - days * 86400
+        pushed_sql, pushed_params = pushed_window_sql(channel, cutoff)
 
-    total_creators = int(conn.execute("SELECT COUNT(*) AS c FROM creators").fetchone()["c"] or 0)
-    enabled_creators = int(conn.execute("SELECT COUNT(*) AS c FROM creators WHERE enabled=1").fetchone()["c"] or 0)
-    priority_creators = int(conn.execute("SELECT COUNT(*) AS c FROM creators WHERE priority>0").fetchone()["c"] or 0)
-
-    videos_in_window = int(
-        conn.execute(
+        counts = conn.execute(
             """
-            SELECT COUNT(*) AS c
-            FROM videos v
-            LEFT JOIN video_state hs ON hs.bvid=v.bvid AND hs.state='HIDDEN'
-            WHERE hs.bvid IS NULL
-              AND v.pub_ts >= ?
-            """,
-            (cutoff,),
-        ).fetchone()["c"]
-        or 0
-    )
+            SELECT COUNT(*) AS total,
+                   COALESCE(SUM(enabled=1), 0) AS enabled,
+                   COALESCE(SUM(priority>0), 0) AS priority
+            FROM creators
+            """
+        ).fetchone()
+        total_creators = int(counts["total"] or 0)
+        enabled_creators = int(counts["enabled"] or 0)
+        priority_creators = int(counts["priority"] or 0)
 
-    pushed_in_window = int(
-        conn.execute(
-            "SELECT COUNT(*) AS c FROM push_log WHERE channel=? AND pushed_ts>=?",
-            (channel, cutoff),
-        ).fetchone()["c"]
-        or 0
-    )
+        videos_in_window = count_visible_videos(conn, cutoff)
 
-    distinct_creators_pushed = int(
-        conn.execute(
-            """
-            SELECT COUNT(DISTINCT v.uid) AS c
-            FROM push_log pl
-            JOIN videos v ON v.bvid=pl.bvid
-            WHERE pl.channel=?
-              AND pl.pushed_ts>=?
+        pushed = conn.execute(
+            f"""
+            WITH pushed AS ({pushed_sql})
+            SELECT COALESCE(SUM(cnt), 0) AS pushed, COUNT(DISTINCT uid) AS creators
+            FROM pushed
             """,
-            (channel, cutoff),
-        ).fetchone()["c"]
-        or 0
-    )
+            pushed_params,
+        ).fetchone()
+        pushed_in_window = int(pushed["pushed"] or 0)
+        distinct_creators_pushed = int(pushed["creators"] or 0)
 
-    top_tname_rows = conn.execute(
-        """
-        SELECT COALESCE(NULLIF(TRIM(v.tname),''), '未分区') AS tname, COUNT(*) AS cnt
-        FROM push_log pl
-        JOIN videos v ON v.bvid=pl.bvid
-        WHERE pl.channel=?
-          AND pl.pushed_ts>=?
-        GROUP BY COALESCE(NULLIF(TRIM(v.tname),''), '未分区')
-        ORDER BY cnt DESC, tname ASC
-        LIMIT 5
-        """,
-        (channel, cutoff),
-    ).fetchall()
-    top_tnames_pushed = [StatsTnameCount(tname=r["tname"], cnt=int(r["cnt"] or 0)) for r in top_tname_rows]
-
-    top_creator_rows = conn.execute(
-        """
-        SELECT v.uid AS uid, COALESCE(c.author_name, c.name, v.author_name) AS author_name, COUNT(*) AS cnt
-        FROM push_log pl
-        JOIN videos v ON v.bvid=pl.bvid
-        LEFT JOIN creators c ON c.uid=v.uid
-        WHERE pl.channel=?
-          AND pl.pushed_ts>=?
-        GROUP BY v.uid, COALESCE(c.author_name, c.name, v.author_name)
-        ORDER BY cnt DESC, v.uid ASC
-        LIMIT 10
-        """,
-        (channel, cutoff),
-    ).fetchall()
-    top_creators_pushed = [
-        StatsCreatorCount(uid=int(r["uid"]), author_name=r["author_name"], cnt=int(r["cnt"] or 0))
-        for r in top_creator_rows
-    ]
+        top_tname_rows = conn.execute(
+            f"""
+            WITH pushed AS ({pushed_sql})
+            SELECT tname, SUM(cnt) AS cnt
+            FROM pushed
+            GROUP BY tname
+            ORDER BY cnt DESC, tname ASC
+            LIMIT 5
+            """,
+            pushed_params,
+        ).fetchall()
+        top_tnames_pushed = [StatsTnameCount(tname=r["tname"], cnt=int(r["cnt"] or 0)) for r in top_tname_rows]
 
-    if not _has_video_state_updated_ts(conn):
-        note_parts.append("video_state 无 updated_ts，read/hidden 时间窗统计将退化为全量")
+        top_creator_rows = conn.execute(
+            f"""
+            WITH pushed AS ({pushed_sql})
+            SELECT p.uid AS uid,
+                   COALESCE(
+                     c.author_name, c.name,
+                     (SELECT v.author_name FROM videos v WHERE v.uid = p.uid ORDER BY v.pub_ts DESC LIMIT 1)
+                   ) AS author_name,
+                   p.cnt AS cnt
+            FROM (
+                SELECT uid, SUM(cnt) AS cnt
+                FROM pushed
+                GROUP BY uid
+                ORDER BY cnt DESC, uid ASC
+                LIMIT 10
+            ) p
+            LEFT JOIN creators c ON c.uid = p.uid
+            ORDER BY p.cnt DESC, p.uid ASC
+            """,
+            pushed_params,
+        ).fetchall()
+        top_creators_pushed = [
+            StatsCreatorCount(uid=int(r["uid"]), author_name=r["author_name"], cnt=int(r["cnt"] or 0))
+            for r in top_creator_rows
+        ]
 
-    conn.close()
     return StatsOverviewOut(
         window_days=days,
         total_creators=total_creators,
@@ -546,7 +742,6 @@ def stats_overview(
         distinct_creators_pushed=distinct_creators_pushed,
         top_tnames_pushed=top_tnames_pushed,
         top_creators_pushed=top_creators_pushed,
-        note="; ".join(note_parts),
     )
 
 
@@ -556,194 +751,143 @@ def list_creator_stats(
     channel: str = Query("serverchan"),
     limit: int = Query(200, ge=1, le=2000),
 ):
-    cfg = load_config()
-    conn = connect(cfg["app"]["db_path"])
-    init_db(conn)
-
-    cutoff = int(time.time()) - days * 86400
-    has_updated_ts = _has_video_state_updated_ts(conn)
-    note = ""
+    with db_connection() as conn:
+        cutoff = int(time.time()) - days * 86400
+        pushed_sql, pushed_params = pushed_window_sql(channel, cutoff)
 
-    base_rows = conn.execute(
-        """
-        SELECT
-          c.uid AS uid,
-          COALESCE(c.author_name, c.name) AS author_name,
-          c.enabled AS enabled,
-          COALESCE(c.priority,0) AS priority,
-          COALESCE(c.weight,1) AS weight,
-          p.pushed_count AS pushed_count,
-          p.last_pushed_ts AS last_pushed_ts,
-          vp.last_pub_ts AS last_pub_ts
-        FROM creators c
-        LEFT JOIN (
-            SELECT v.uid AS uid, COUNT(*) AS pushed_count, MAX(pl.pushed_ts) AS last_pushed_ts
-            FROM push_log pl
-            JOIN videos v ON v.bvid=pl.bvid
-            WHERE pl.channel=?
-              AND pl.pushed_ts>=?
-            GROUP BY v.uid
-        ) p ON p.uid = c.uid
-        LEFT JOIN (
-            SELECT v.uid AS uid, MAX(v.pub_ts) AS last_pub_ts
-            FROM videos v
-            LEFT JOIN video_state hs ON hs.bvid=v.bvid AND hs.state='HIDDEN'
-            WHERE hs.bvid IS NULL
-            GROUP BY v.uid
-        ) vp ON vp.uid = c.uid
-        ORDER BY COALESCE(c.priority,0) DESC,
-                 c.enabled DESC,
-                 COALESCE(p.pushed_count,0) DESC,
-                 COALESCE(vp.last_pub_ts,0) DESC,
-                 c.uid ASC
-        LIMIT ?
-        """,
-        (channel, cutoff, limit),
-    ).fetchall()
-
-    uid_rows = [int(r["uid"]) for r in base_rows]
-
-    sample_map = {}
-    mix_map = {}
-    hidden_map = {}
-    read_map = {}
-
-    if uid_rows:
-        uid_placeholders = ",".join(["?"] * len(uid_rows))
-
-        sample_rows = conn.execute(
+        base_rows = conn.execute(
             f"""
-            SELECT x.uid, x.bvid
-            FROM (
-                SELECT v.uid AS uid, pl.bvid AS bvid, pl.pushed_ts AS pushed_ts,
-                       ROW_NUMBER() OVER (PARTITION BY v.uid ORDER BY pl.pushed_ts DESC, pl.bvid ASC) AS rn
-                FROM push_log pl
-                JOIN videos v ON v.bvid=pl.bvid
-                WHERE pl.channel=?
-                  AND pl.pushed_ts>=?
-                  AND v.uid IN ({uid_placeholders})
-            ) x
-            WHERE x.rn<=3
-            ORDER BY x.uid ASC, x.rn ASC
+            WITH pushed AS ({pushed_sql})
+            SELECT
+              c.uid AS uid,
+              COALESCE(c.author_name, c.name) AS author_name,
+              c.enabled AS enabled,
+              COALESCE(c.priority,0) AS priority,
+              COALESCE(c.weight,1) AS weight,
+              p.pushed_count AS pushed_count,
+              p.last_pushed_ts AS last_pushed_ts,
+              sc.last_pub_ts AS last_pub_ts
+            FROM creators c
+            LEFT JOIN (
+                SELECT uid, SUM(cnt) AS pushed_count, MAX(last_pushed_ts) AS last_pushed_ts
+                FROM pushed
+                GROUP BY uid
+            ) p ON p.uid = c.uid
+            LEFT JOIN stats_creator sc ON sc.uid = c.uid
+            ORDER BY COALESCE(c.priority,0) DESC,
+                     c.enabled DESC,
+                     COALESCE(p.pushed_count,0) DESC,
+                     COALESCE(sc.last_pub_ts,0) DESC,
+                     c.uid ASC
+            LIMIT ?
             """,
-            (channel, cutoff, *uid_rows),
+            (*pushed_params, limit),
         ).fetchall()
-        for r in sample_rows:
-            sample_map.setdefault(int(r["uid"]), []).append(r["bvid"])
 
-        mix_rows = conn.execute(
-            f"""
-            SELECT y.uid, y.tname, y.cnt
-            FROM (
-                SELECT v.uid AS uid,
-                       COALESCE(NULLIF(TRIM(v.tname),''), '未分区') AS tname,
-                       COUNT(*) AS cnt,
-                       ROW_NUMBER() OVER (
-                           PARTITION BY v.uid
-                           ORDER BY COUNT(*) DESC, COALESCE(NULLIF(TRIM(v.tname),''), '未分区') ASC
-                       ) AS rn
-                FROM push_log pl
-                JOIN videos v ON v.bvid=pl.bvid
-                WHERE pl.channel=?
-                  AND pl.pushed_ts>=?
-                  AND v.uid IN ({uid_placeholders})
-                GROUP BY v.uid, COALESCE(NULLIF(TRIM(v.tname),''), '未分区')
-            ) y
-            WHERE y.rn<=3
-            ORDER BY y.uid ASC, y.cnt DESC, y.tname ASC
-            """,
-            (channel, cutoff, *uid_rows),
-        ).fetchall()
-        for r in mix_rows:
-            mix_map.setdefault(int(r["uid"]), []).append(CreatorTnameMix(tname=r["tname"], cnt=int(r["cnt"] or 0)))
+        uid_rows = [int(r["uid"]) for r in base_rows]
 
-        if has_updated_ts:
-            state_rows = conn.execute(
+        sample_map = {}
+        mix_map = {}
+        hidden_map = {}
+        read_map = {}
+
+        if uid_rows:
+            uid_placeholders = ",".join(["?"] * len(uid_rows))
+
+            # stats_push_recent 保留每个 creator 最近 3 条推送，窗口内的最近 3 条必在其中
+            sample_rows = conn.execute(
                 f"""
-                SELECT v.uid AS uid,
-                       SUM(CASE WHEN s.state='HIDDEN' THEN 1 ELSE 0 END) AS hidden_cnt,
-                       SUM(CASE WHEN s.state='READ' THEN 1 ELSE 0 END) AS read_cnt
-                FROM video_state s
-                JOIN videos v ON v.bvid=s.bvid
-                WHERE s.updated_ts>=?
-                  AND v.uid IN ({uid_placeholders})
-                GROUP BY v.uid
+                SELECT uid, bvid
+                FROM stats_push_recent
+                WHERE channel=?
+                  AND pushed_ts>=?
+                  AND uid IN ({uid_placeholders})
+                ORDER BY uid ASC, pushed_ts DESC, bvid ASC
                 """,
-                (cutoff, *uid_rows),
+                (channel, cutoff, *uid_rows),
             ).fetchall()
-        else:
-            note = "video_state 无时间字段，read/hidden 使用 all_time 统计"
+            for r in sample_rows:
+                sample_map.setdefault(int(r["uid"]), []).append(r["bvid"])
+
+            mix_rows = conn.execute(
+                f"""
+                WITH pushed AS ({pushed_sql})
+                SELECT y.uid, y.tname, y.cnt
+                FROM (
+                    SELECT uid, tname, SUM(cnt) AS cnt,
+                           ROW_NUMBER() OVER (PARTITION BY uid ORDER BY SUM(cnt) DESC, tname ASC) AS rn
+                    FROM pushed
+                    WHERE uid IN ({uid_placeholders})
+                    GROUP BY uid, tname
+                ) y
+                WHERE y.rn<=3
+                ORDER BY y.uid ASC, y.cnt DESC, y.tname ASC
+                """,
+                (*pushed_params, *uid_rows),
+            ).fetchall()
+            for r in mix_rows:
+                mix_map.setdefault(int(r["uid"]), []).append(CreatorTnameMix(tname=r["tname"], cnt=int(r["cnt"] or 0)))
+
+            state_sql, state_params = state_window_sql(cutoff)
             state_rows = conn.execute(
                 f"""
-                SELECT v.uid AS uid,
-                       SUM(CASE WHEN s.state='HIDDEN' THEN 1 ELSE 0 END) AS hidden_cnt,
-                       SUM(CASE WHEN s.state='READ' THEN 1 ELSE 0 END) AS read_cnt
-                FROM video_state s
-                JOIN videos v ON v.bvid=s.bvid
-                WHERE v.uid IN ({uid_placeholders})
-                GROUP BY v.uid
+                WITH st AS ({state_sql})
+                SELECT uid, SUM(hidden_cnt) AS hidden_cnt, SUM(read_cnt) AS read_cnt
+                FROM st
+                WHERE uid IN ({uid_placeholders})
+                GROUP BY uid
                 """,
-                tuple(uid_rows),
+                (*state_params, *uid_rows),
             ).fetchall()
+            for r in state_rows:
+                uid = int(r["uid"])
+                hidden_map[uid] = int(r["hidden_cnt"] or 0)
+                read_map[uid] = int(r["read_cnt"] or 0)
+
+        now_ts = int(time.time())
+        window_start = now_ts - days * 86400
 
-        for r in state_rows:
+        out: List[CreatorStatsOut] = []
+        for r in base_rows:
             uid = int(r["uid"])
-            hidden_map[uid] = int(r["hidden_cnt"] or 0)
-            read_map[uid] = int(r["read_cnt"] or 0)
-
-    now_ts = int(time.time())
-    window_start = now_ts - days * 86400
-
-    out: List[CreatorStatsOut] = []
-    for r in base_rows:
-        uid = int(r["uid"])
-        pushed_count = int(r["pushed_count"] or 0)
-        last_pub_ts = r["last_pub_ts"]
-        freshness_hours = None
-        if last_pub_ts is not None:
-            freshness_hours = round((now_ts - int(last_pub_ts)) / 3600.0, 1)
-
-        has_new_video_in_window = last_pub_ts is not None and int(last_pub_ts) >= window_start
-        enabled = bool(r["enabled"])
-        priority = int(r["priority"] or 0)
-
-        if not enabled:
-            suppression_hint = "enabled=false"
-        elif pushed_count == 0 and has_new_video_in_window and priority > 0:
-            suppression_hint = f"priority>0 但近{days}天未推送(检查 cooldown/tname cap)"
-        elif pushed_count == 0 and has_new_video_in_window:
-            suppression_hint = f"近{days}天未推送但有新视频"
-        elif last_pub_ts is None:
-            suppression_hint = "暂无可见视频"
-        else:
-            suppression_hint = ""
-
-        hidden_window = hidden_map.get(uid, 0) if has_updated_ts else 0
-        read_window = read_map.get(uid, 0) if has_updated_ts else 0
-        hidden_all = hidden_map.get(uid, 0) if not has_updated_ts else 0
-        read_all = read_map.get(uid, 0) if not has_updated_ts else 0
-
-        out.append(
-            CreatorStatsOut(
-                uid=uid,
-                author_name=r["author_name"],
-                enabled=enabled,
-                priority=priority,
-                weight=max(1, int(r["weight"] or 1)),
-                last_pub_ts=last_pub_ts,
-                last_pushed_ts=r["last_pushed_ts"],
-                pushed_count=pushed_count,
-                pushed_bvids_sample=sample_map.get(uid, []),
-                pushed_tname_mix=mix_map.get(uid, []),
-                hidden_count_window=hidden_window,
-                read_count_window=read_window,
-                hidden_count_all_time=hidden_all,
-                read_count_all_time=read_all,
-                freshness_hours=freshness_hours,
-                suppression_hint=suppression_hint,
-                note=note,
+            pushed_count = int(r["pushed_count"] or 0)
+            last_pub_ts = r["last_pub_ts"]
+            freshness_hours = None
+            if last_pub_ts is not None:
+                freshness_hours = round((now_ts - int(last_pub_ts)) / 3600.0, 1)
+
+            has_new_video_in_window = last_pub_ts is not None and int(last_pub_ts) >= window_start
+            enabled = bool(r["enabled"])
+            priority = int(r["priority"] or 0)
+
+            if not enabled:
+                suppression_hint = "enabled=false"
+            elif pushed_count == 0 and has_new_video_in_window and priority > 0:
+                suppression_hint = f"priority>0 但近{days}天未推送(检查 cooldown/tname cap)"
+            elif pushed_count == 0 and has_new_video_in_window:
+                suppression_hint = f"近{days}天未推送但有新视频"
+            elif last_pub_ts is None:
+                suppression_hint = "暂无可见视频"
+            else:
+                suppression_hint = ""
+
+            out.append(
+                CreatorStatsOut(
+                    uid=uid,
+                    author_name=r["author_name"],
+                    enabled=enabled,
+                    priority=priority,
+                    weight=max(1, int(r["weight"] or 1)),
+                    last_pub_ts=last_pub_ts,
+                    last_pushed_ts=r["last_pushed_ts"],
+                    pushed_count=pushed_count,
+                    pushed_bvids_sample=sample_map.get(uid, []),
+                    pushed_tname_mix=mix_map.get(uid, []),
+                    hidden_count_window=hidden_map.get(uid, 0),
+                    read_count_window=read_map.get(uid, 0),
+                    freshness_hours=freshness_hours,
+                    suppression_hint=suppression_hint,
+                )
             )
-        )
 
-    conn.close()
     return out
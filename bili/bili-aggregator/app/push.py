@@ -69,6 +69,8 @@ def fetch_daily_via_db(params: Dict[str, Any]) -> List[Dict[str, Any]]:
         hours=params.get("hours", 24),
         limit=params.get("limit", 50),
         sample=params.get("sample", 5),
+        # 直接调用 handler 时 Query(...) 默认值不会被解析，必须显式传
+        seed=params.get("seed"),
     )
     out: List[Dict[str, Any]] = []
     for v in videos:
@@ -96,6 +98,12 @@ def fetch_daily_candidates(config: dict) -> List[Dict[str, Any]]:
     try:
         return fetch_daily_via_http(base_url, params)
     except Exception:
+        # web 服务没在跑：直接读库，此时没有经过 web 启动时的 schema 迁移
+        conn = db.connect((config.get("app") or {}).get("db_path", "data/app.db"))
+        try:
+            db.migrate(conn)
+        finally:
+            conn.close()
         return fetch_daily_via_db(params)
 
 
@@ -323,7 +331,7 @@ def build_daily_message(config: dict) -> Dict[str, Any]:
         return {"title": title, "content": content, "videos": []}
 
     conn = db.connect((config.get("app") or {}).get("db_path", "data/app.db"))
-    db.init_db(conn)
+    db.migrate(conn)
     channel = push_cfg.get("provider", "serverchan")
 
     before_dedup = len(videos)
@@ -399,7 +407,7 @@ def send_daily_push(config: dict) -> int:
         return 1
 
     conn = db.connect((config.get("app") or {}).get("db_path", "data/app.db"))
-    db.init_db(conn)
+    db.migrate(conn)
     inserted = write_push_log(conn, provider, videos)
     print(f"push_log 写入成功：{inserted} 条")
     conn.close()
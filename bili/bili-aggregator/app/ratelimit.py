@@ -0,0 +1,57 @@
+import threading
+import time
+from typing import Dict, Optional
+
+
+class TokenBucket:
+    """
+    线程安全的令牌桶限速器：所有 worker 共享同一个实例。
+    - rate_per_sec：每秒补充的令牌数（即全局允许的请求速率）
+    - burst：桶容量，允许的瞬时突发请求数
+    每发一次请求前调用 acquire()，拿不到令牌就阻塞等待。
+    """
+
+    def __init__(self, rate_per_sec: float, burst: int = 1):
+        if rate_per_sec <= 0:
+            raise ValueError("rate_per_sec must be > 0")
+        self.rate = float(rate_per_sec)
+        self.capacity = max(1, int(burst))
+        self._tokens = float(self.capacity)
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+        self.acquired = 0
+        self.waited_sec = 0.0
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self._last
+        if elapsed > 0:
+            self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+            self._last = now
+
+    def acquire(self, tokens: int = 1) -> float:
+        """阻塞直到拿到 tokens 个令牌，返回本次等待的秒数。"""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    self.acquired += tokens
+                    self.waited_sec += waited
+                    return waited
+                wait = (tokens - self._tokens) / self.rate
+            time.sleep(wait)
+            waited += wait
+
+
+def build_limiter(fetch_cfg: Optional[Dict]) -> TokenBucket:
+    """
+    从 fetch.rate_limit 构造全局限速器。
+    默认 0.5 次/秒，与原先每次请求前 1~2s 随机 sleep 的礼貌程度相当。
+    """
+    rl = (fetch_cfg or {}).get("rate_limit") or {}
+    return TokenBucket(
+        rate_per_sec=float(rl.get("rate_per_sec", 0.5)),
+        burst=int(rl.get("burst", 1)),
+    )
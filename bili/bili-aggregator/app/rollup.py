@@ -0,0 +1,71 @@
+import sqlite3
+from typing import Tuple
+
+# /api/stats/* 的时间窗读取。整日部分读 stats_* 预聚合表（见 db.ROLLUP_DDL）；
+# 窗口起点所在的那一天只有一部分落在窗口内，这一段回原表按时间戳精确统计（至多一天的数据），
+# 结果与直接按 pushed_ts / updated_ts / pub_ts >= cutoff 过滤原表一致。
+
+DAY_SEC = 86400
+
+
+def split_window(cutoff: int) -> Tuple[int, int]:
+    """
+    返回 (first_full_day, boundary_end)：
+    day >= first_full_day 的日桶整体落在窗口内；[cutoff, boundary_end) 这一段需查原表。
+    """
+    first_full_day = cutoff // DAY_SEC + 1
+    return first_full_day, first_full_day * DAY_SEC
+
+
+def pushed_window_sql(channel: str, cutoff: int) -> Tuple[str, tuple]:
+    """
+    窗口内推送的部分计数，列为 uid / tname / cnt / last_pushed_ts，
+    同一 (uid, tname) 可能有多行，调用方用 WITH pushed AS (...) 包起来再 GROUP BY 汇总。
+    """
+    first_full_day, boundary_end = split_window(cutoff)
+    sql = """
+        SELECT uid, tname, cnt, last_pushed_ts
+        FROM stats_push_daily
+        WHERE channel = ? AND day >= ?
+        UNION ALL
+        SELECT v.uid, COALESCE(NULLIF(TRIM(v.tname), ''), '未分区'), 1, pl.pushed_ts
+        FROM push_log pl
+        JOIN videos v ON v.bvid = pl.bvid
+        WHERE pl.channel = ? AND pl.pushed_ts >= ? AND pl.pushed_ts < ?
+    """
+    return sql, (channel, first_full_day, channel, cutoff, boundary_end)
+
+
+def state_window_sql(cutoff: int) -> Tuple[str, tuple]:
+    """窗口内（按 updated_ts）处于 HIDDEN / READ 的部分计数，列为 uid / hidden_cnt / read_cnt。"""
+    first_full_day, boundary_end = split_window(cutoff)
+    sql = """
+        SELECT uid, hidden_cnt, read_cnt
+        FROM stats_state_daily
+        WHERE day >= ?
+        UNION ALL
+        SELECT v.uid, s.state = 'HIDDEN', s.state = 'READ'
+        FROM video_state s
+        JOIN videos v ON v.bvid = s.bvid
+        WHERE s.state IN ('HIDDEN', 'READ') AND s.updated_ts >= ? AND s.updated_ts < ?
+    """
+    return sql, (first_full_day, cutoff, boundary_end)
+
+
+def count_visible_videos(conn: sqlite3.Connection, cutoff: int) -> int:
+    """pub_ts >= cutoff 且未隐藏的视频数。"""
+    first_full_day, boundary_end = split_window(cutoff)
+    row = conn.execute(
+        """
+        SELECT
+          (SELECT COALESCE(SUM(visible_cnt), 0) FROM stats_video_daily WHERE day >= ?)
+          +
+          (SELECT COUNT(*)
+           FROM videos v
+           WHERE v.pub_ts >= ? AND v.pub_ts < ?
+             AND NOT EXISTS (SELECT 1 FROM video_state hs WHERE hs.bvid = v.bvid AND hs.state = 'HIDDEN'))
+          AS c
+        """,
+        (first_full_day, cutoff, boundary_end),
+    ).fetchone()
+    return int(row["c"] or 0)
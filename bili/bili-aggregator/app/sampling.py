@@ -0,0 +1,60 @@
+import heapq
+import math
+import random
+from typing import Callable, List, Optional, Sequence, TypeVar
+
+T = TypeVar("T")
+
+# 加权不放回抽样（Efraimidis–Spirakis A-Res）：
+# 每个元素取 key = ln(u) / w（u ~ U(0,1]），取 key 最大的 k 个。
+# 与“按权重逐个抽、抽中即移出”的分布相同，按 key 降序即为依次抽中的顺序；
+# 只扫一遍 + 大小为 k 的堆，O(n log k)。
+
+
+def _key(rng: random.Random, weight: float) -> float:
+    # 1 - random() 落在 (0, 1]，避免 log(0)
+    return math.log(1.0 - rng.random()) / weight
+
+
+def weighted_sample_without_replacement(
+    items: Sequence[T],
+    k: int,
+    rng: random.Random,
+    weight: Optional[Callable[[T], float]] = None,
+) -> List[T]:
+    """
+    按权重不放回抽 k 个，返回顺序即抽中顺序。
+    weight 默认取 item["weight"]，权重 <1 按 1 计（与 creators.weight 的约定一致）。
+    同一个 rng 种子、同样的 items 顺序得到同样的结果。
+    """
+    if k <= 0 or not items:
+        return []
+    if weight is None:
+        weight = lambda it: it.get("weight", 1)  # noqa: E731
+
+    keyed = ((_key(rng, max(1.0, float(weight(it)))), idx) for idx, it in enumerate(items))
+    return [items[idx] for _, idx in heapq.nlargest(k, keyed)]
+
+
+def sample_indices_batch(
+    weights: Sequence[float],
+    k: int,
+    trials: int,
+    seed: Optional[int] = None,
+) -> List[List[int]]:
+    """
+    模拟用的批量形式：同一组权重独立抽 trials 次，每次返回 k 个下标（抽中顺序）。
+    权重只预处理一次（1/w），单次抽样仍是 O(n log k)。
+    """
+    if k <= 0 or trials <= 0 or not weights:
+        return []
+    rng = random.Random(seed)
+    inv = [1.0 / max(1.0, float(w)) for w in weights]
+    rand = rng.random
+    log = math.log
+    n = len(inv)
+    out: List[List[int]] = []
+    for _ in range(trials):
+        keys = [log(1.0 - rand()) * inv[i] for i in range(n)]
+        out.append(heapq.nlargest(k, range(n), key=keys.__getitem__))
+    return out
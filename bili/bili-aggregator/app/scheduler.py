@@ -0,0 +1,103 @@
+import heapq
+import sqlite3
+from typing import Dict, List, Optional, Tuple
+
+# 轮询调度：根据 creator 近期投稿频率 + priority/weight 估算下一次该抓的时间，
+# 用小顶堆按 next_due 排队，每轮只抓到期的 creator。
+
+
+def compute_poll_interval(
+    upload_count: int,
+    last_pub_ts: Optional[int],
+    priority: int,
+    weight: int,
+    now_ts: int,
+    sched_cfg: Dict,
+) -> int:
+    """
+    估算单个 creator 的轮询间隔（秒）：
+    - 平均投稿间隔 = history_days / 近期投稿数；平均间隔内轮询 polls_per_upload 次
+    - 只有 0~1 条近期投稿时，用“距上次投稿多久”兜底（越久越不频繁）
+    - weight、priority>0 按倍数缩短间隔；最后夹在 [min_interval, max_interval]
+    """
+    history_sec = max(1, int(sched_cfg.get("history_days", 60))) * 86400
+    polls_per_upload = max(1.0, float(sched_cfg.get("polls_per_upload", 4)))
+    min_interval = max(60, int(float(sched_cfg.get("min_interval_min", 30)) * 60))
+    max_interval = max(min_interval, int(float(sched_cfg.get("max_interval_hours", 72)) * 3600))
+    priority_boost = max(1.0, float(sched_cfg.get("priority_boost", 2)))
+
+    if upload_count >= 2:
+        gap = history_sec / upload_count
+    elif last_pub_ts:
+        gap = max(history_sec, now_ts - int(last_pub_ts))
+    else:
+        return max_interval
+
+    boost = max(1, int(weight or 1)) * (priority_boost if int(priority or 0) > 0 else 1.0)
+    interval = gap / polls_per_upload / boost
+    return int(min(max_interval, max(min_interval, interval)))
+
+
+def build_schedule(conn: sqlite3.Connection, sched_cfg: Dict, now_ts: int) -> List[Tuple[int, int, int]]:
+    """
+    为所有 enabled creator 计算 next_due，返回堆：[(next_due_ts, -priority, uid), ...]
+    从没抓过的 creator next_due=0，排在最前。
+    """
+    history_sec = max(1, int(sched_cfg.get("history_days", 60))) * 86400
+    rows = conn.execute(
+        """
+        SELECT c.uid AS uid,
+               COALESCE(c.priority, 0) AS priority,
+               COALESCE(c.weight, 1) AS weight,
+               CAST(strftime('%s', c.last_fetch_at) AS INTEGER) AS last_fetch_ts,
+               COALESCE(h.cnt, 0) AS upload_count,
+               COALESCE(
+                   c.hwm_pub_ts,
+                   (SELECT MAX(v2.pub_ts) FROM videos v2 WHERE v2.uid = c.uid)
+               ) AS last_pub_ts
+        FROM creators c
+        LEFT JOIN (
+            SELECT v.uid AS uid, COUNT(*) AS cnt
+            FROM videos v
+            WHERE v.pub_ts >= ?
+            GROUP BY v.uid
+        ) h ON h.uid = c.uid
+        WHERE c.enabled = 1
+        """,
+        (now_ts - history_sec,),
+    ).fetchall()
+
+    heap: List[Tuple[int, int, int]] = []
+    for r in rows:
+        last_fetch_ts = r["last_fetch_ts"]
+        if last_fetch_ts is None:
+            next_due = 0
+        else:
+            interval = compute_poll_interval(
+                int(r["upload_count"]),
+                r["last_pub_ts"],
+                int(r["priority"]),
+                int(r["weight"]),
+                now_ts,
+                sched_cfg,
+            )
+            next_due = int(last_fetch_ts) + interval
+        heap.append((next_due, -int(r["priority"]), int(r["uid"])))
+
+    heapq.heapify(heap)
+    return heap
+
+
+def pop_due(heap: List[Tuple[int, int, int]], now_ts: int, budget: int = 0) -> List[int]:
+    """从堆里弹出所有已到期的 uid（最早到期的在前）；budget>0 时最多弹 budget 个。"""
+    due: List[int] = []
+    while heap and heap[0][0] <= now_ts:
+        if budget > 0 and len(due) >= budget:
+            break
+        _, _, uid = heapq.heappop(heap)
+        due.append(uid)
+    return due
+
+
+def next_due_ts(heap: List[Tuple[int, int, int]]) -> Optional[int]:
+    return heap[0][0] if heap else None
@@ -0,0 +1,46 @@
+from typing import List, Optional, Tuple
+
+# /api/videos?q= 的检索条件构造。
+# video_fts 使用 trigram 分词，3 个字符以上的词走它；2 个字符的词（大部分中文词）走二元组索引
+# video_fts_bigram（见 db.FTS_DDL），词里有标点 / 符号时二元组会被 unicode61 拆开，这种词和单字一样退回 LIKE。
+# 每个词各自作为短语（双引号转义），多个词之间为 AND。
+
+FTS_MIN_TERM_LEN = 3
+BIGRAM_TERM_LEN = 2
+
+# bm25 列权重：title / desc / tags（两张索引列相同）
+BM25_WEIGHTS = (10.0, 1.0, 5.0)
+
+
+def _quote_phrase(term: str) -> str:
+    return '"' + term.replace('"', '""') + '"'
+
+
+def _is_bigram_term(term: str) -> bool:
+    # 两个字符都得是 unicode61 的词内字符（字母 / 数字，含汉字），否则索引里没有对应的二元组
+    return len(term) == BIGRAM_TERM_LEN and all(ch.isalnum() for ch in term)
+
+
+def split_query(q: Optional[str]) -> Tuple[Optional[str], Optional[str], List[str]]:
+    """
+    返回 (fts_match, bigram_match, like_terms)：
+    - fts_match：可以交给 video_fts MATCH 的表达式；没有 3 字以上的词时为 None
+    - bigram_match：可以交给 video_fts_bigram MATCH 的表达式；没有可用的 2 字词时为 None
+    - like_terms：两张索引都用不上的词，需要用 LIKE 过滤 title / desc / tags
+    """
+    terms = [t for t in (q or "").split() if t]
+    fts_terms = [t for t in terms if len(t) >= FTS_MIN_TERM_LEN]
+    bigram_terms = [t for t in terms if _is_bigram_term(t)]
+    like_terms = [t for t in terms if len(t) < FTS_MIN_TERM_LEN and not _is_bigram_term(t)]
+    fts_match = " ".join(_quote_phrase(t) for t in fts_terms) if fts_terms else None
+    bigram_match = " ".join(_quote_phrase(t) for t in bigram_terms) if bigram_terms else None
+    return fts_match, bigram_match, like_terms
+
+
+def like_pattern(term: str) -> str:
+    escaped = term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+def bm25_expr(table: str = "video_fts") -> str:
+    return f"bm25({table}, {', '.join(str(w) for w in BM25_WEIGHTS)})"
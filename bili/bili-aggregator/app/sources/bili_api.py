@@ -4,6 +4,19 @@ from typing import Dict, List, Optional
 import requests
 import random
 
+from .resilience import CircuitOpenError, SourceGuard, request_json
+
+DEFAULT_API_BASE = "https://api.bilibili.com"
+
+
+def _reached_high_water(it: Dict, since_ts: Optional[int], since_bvid: Optional[str]) -> bool:
+    """列表按发布时间倒序：碰到上次见过的 bvid，或比高水位更旧，就不用再往后看了。"""
+    if since_bvid and it.get("bvid") == since_bvid:
+        return True
+    if since_ts and int(it.get("pubdate") or 0) < int(since_ts):
+        return True
+    return False
+
 
 class BiliClient:
     """
@@ -12,8 +25,17 @@ class BiliClient:
     - tag 接口：尽量拿 tag；失败就返回空列表
     """
 
-    def __init__(self, cookie: Optional[str] = None, timeout_sec: int = 15):
-        self.s = requests.Session()
+    def __init__(
+        self,
+        cookie: Optional[str] = None,
+        timeout_sec: int = 15,
+        limiter=None,
+        session: Optional[requests.Session] = None,
+        api_base: Optional[str] = None,
+        guard: Optional[SourceGuard] = None,
+    ):
+        # session 可由 SourceRegistry 注入（共享连接池）；否则自建
+        self.s = session or requests.Session()
         self.s.headers.update({
             "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
                           "AppleWebKit/537.36 (KHTML, like Gecko) "
@@ -25,86 +47,147 @@ class BiliClient:
             # cookie 放原始字符串即可：SESSDATA=...; bili_jct=...; ...
             self.s.headers["Cookie"] = cookie
         self.timeout_sec = timeout_sec
+        # 可指向本地替身服务（tools/fake_bili_server.py）做压测
+        self.api_base = (api_base or DEFAULT_API_BASE).rstrip("/")
+        # 共享限速器（app.ratelimit.TokenBucket）；未提供时退回每次请求前随机 sleep
+        self.limiter = limiter
+        # 风控感知的重试/熔断；SourceRegistry 会让各客户端共享同一个
+        self.guard = guard or SourceGuard()
+
+    def _request(self, url: str, params: Dict) -> Dict:
+        if self.limiter is not None:
+            self.limiter.acquire()
+        else:
+            time.sleep(random.uniform(1.0, 2.0))
+        return request_json(self.s, url, params, self.timeout_sec)
 
     def _get_json(self, url: str, params: Dict) -> Dict:
-        time.sleep(random.uniform(1.0, 2.0))
-        r = self.s.get(url, params=params, timeout=self.timeout_sec)
-        r.raise_for_status()
-        return r.json()
-
-
-    def fetch_creator_videos(self, uid: int, limit: int) -> List[Dict]:
+        """非 0 code 会按类别抛出 BiliApiError；重试/熔断由 guard 处理。"""
+        return self.guard.call(self._request, url, params)
+
+
+    def fetch_creator_videos(
+        self,
+        uid: int,
+        limit: int,
+        since_ts: Optional[int] = None,
+        since_bvid: Optional[str] = None,
+        page_size: int = 5,
+    ) -> List[Dict]:
         """
         【未经验证】常见空间投稿列表接口：
-        https://api.bilibili.com/x/space/arc/search?mid={uid}&pn=1&ps={ps}&order=pubdate
-        """
-        ps = max(1, min(limit, 50))
-        url = "https://api.bilibili.com/x/space/arc/search"
-        data = self._get_json(url, params={"mid": uid, "pn": 1, "ps": ps, "order": "pubdate"})
-        if data.get("code") != 0:
-           print("BILI API ERROR:", data.get("code"), data.get("message"), data.get("ttl"))
-           return []
+        https://api.bilibili.com/x/space/arc/search?mid={uid}&pn={pn}&ps={ps}&order=pubdate
 
-
-        vlist = (((data.get("data") or {}).get("list") or {}).get("vlist")) or []
+        since_ts / since_bvid：该 creator 上次见过的最新视频（高水位）。
+        有高水位时按 page_size 小页翻，碰到已见过的视频立即停止；
+        稳态下（没有新投稿）只需要一次小请求。
+        """
+        incremental = bool(since_ts or since_bvid)
+        ps = max(1, min(page_size if incremental else limit, 50))
+        url = f"{self.api_base}/x/space/arc/search"
         out: List[Dict] = []
         now = int(time.time())
-
-        for it in vlist[:limit]:
-            bvid = it.get("bvid") or ""
-            if not bvid:
-                continue
-
-            # 时间字段：pubdate
-            pub_ts = int(it.get("pubdate") or now)
-
-            stat = it.get("stat") or {}
-            # tid/tname 在 vlist 里通常存在；没有就置空
-            tid = it.get("tid")
-            tname = it.get("tname")
-
-            aid = it.get("aid")
-            tags = []
-            if aid:
-                tags = []  # 先关掉，等列表稳定后再开
-
-            out.append({
-                "bvid": bvid,
-                "aid": aid,
-                "uid": uid,
-                "title": it.get("title") or "",
-                "pub_ts": pub_ts,
-                "duration_sec": it.get("length"),  # 可能是 "mm:ss" 或秒；后端暂不依赖
-                "url": f"https://www.bilibili.com/video/{bvid}",
-                "cover_url": it.get("pic"),
-                "desc": it.get("description"),
-                "tid": tid,
-                "tname": tname,
-                "stats": {
-                    "view": stat.get("view"),
-                    "like": stat.get("like"),
-                    "reply": stat.get("reply"),
-                    "danmaku": stat.get("danmaku"),
-                    "favorite": stat.get("favorite"),
-                    "coin": stat.get("coin"),
-                    "share": stat.get("share"),
-                },
-                "tags": tags,
-            })
+        pn = 1
+
+        while len(out) < limit:
+            data = self._get_json(url, params={"mid": uid, "pn": pn, "ps": ps, "order": "pubdate"})
+
+            vlist = (((data.get("data") or {}).get("list") or {}).get("vlist")) or []
+            reached = False
+            for it in vlist:
+                if _reached_high_water(it, since_ts, since_bvid):
+                    reached = True
+                    break
+                item = self._parse_vlist_item(it, uid, now)
+                if item is None:
+                    continue
+                out.append(item)
+                if len(out) >= limit:
+                    break
+
+            if reached or len(vlist) < ps:
+                break
+            pn += 1
 
         return out
 
-    def fetch_tags_by_aid(self, aid: int) -> List[str]:
+    def _parse_vlist_item(self, it: Dict, uid: int, now: int) -> Optional[Dict]:
+        bvid = it.get("bvid") or ""
+        if not bvid:
+            return None
+
+        # 时间字段：pubdate
+        pub_ts = int(it.get("pubdate") or now)
+
+        stat = it.get("stat") or {}
+        # tid/tname 在 vlist 里通常存在；没有就置空
+        tid = it.get("tid")
+        tname = it.get("tname")
+
+        aid = it.get("aid")
+        tags = []
+        if aid:
+            tags = []  # 先关掉，等列表稳定后再开
+
+        return {
+            "bvid": bvid,
+            "aid": aid,
+            "uid": uid,
+            "title": it.get("title") or "",
+            "pub_ts": pub_ts,
+            "duration_sec": it.get("length"),  # 可能是 "mm:ss" 或秒；后端暂不依赖
+            "url": f"https://www.bilibili.com/video/{bvid}",
+            "cover_url": it.get("pic"),
+            "desc": it.get("description"),
+            "tid": tid,
+            "tname": tname,
+            "stats": {
+                "view": stat.get("view"),
+                "like": stat.get("like"),
+                "reply": stat.get("reply"),
+                "danmaku": stat.get("danmaku"),
+                "favorite": stat.get("favorite"),
+                "coin": stat.get("coin"),
+                "share": stat.get("share"),
+            },
+            "tags": tags,
+        }
+
+    def fetch_video_stats(self, bvid: str) -> Optional[Dict]:
+        """
+        【未经验证】稿件统计接口：
+        https://api.bilibili.com/x/web-interface/archive/stat?bvid={bvid}
+        只返回统计字段（键名与列表接口的 stats 一致）；失败返回 None。
+        """
+        try:
+            url = f"{self.api_base}/x/web-interface/archive/stat"
+            data = self._get_json(url, params={"bvid": bvid})
+            stat = data.get("data") or {}
+            return {
+                "view": stat.get("view"),
+                "like": stat.get("like"),
+                "reply": stat.get("reply"),
+                "danmaku": stat.get("danmaku"),
+                "favorite": stat.get("favorite"),
+                "coin": stat.get("coin"),
+                "share": stat.get("share"),
+            }
+        except CircuitOpenError:
+            raise
+        except Exception as exc:
+            print("BILI STAT ERROR:", bvid, repr(exc))
+            return None
+
+    def fetch_tags_by_aid(self, aid: int, raise_errors: bool = False) -> List[str]:
         """
         【未经验证】常见稿件 tag 接口之一：
         https://api.bilibili.com/x/tag/archive/tags?aid={aid}
         可能需要登录态/可能被风控；失败则返回 []。
+        raise_errors=True 时失败直接抛出（补全队列据此区分“没有 tag”和“请求失败”）。
         """
         try:
-            url = "https://api.bilibili.com/x/tag/archive/tags"
+            url = f"{self.api_base}/x/tag/archive/tags"
             data = self._get_json(url, params={"aid": aid})
-            if data.get("code") != 0:
-                return []
             arr = data.get("data") or []
             tags = []
             for t in arr:
@@ -112,5 +195,9 @@ class BiliClient:
                 if name:
                     tags.append(name)
             return tags
+        except CircuitOpenError:
+            raise
         except Exception:
+            if raise_errors:
+                raise
             return []
@@ -4,6 +4,10 @@ from typing import Dict, List, Optional
 
 import requests
 
+from .resilience import SourceGuard, request_json
+
+DEFAULT_API_BASE = "https://api.bilibili.com"
+
 
 def parse_play_count(s: Optional[str]) -> Optional[int]:
     """
@@ -33,8 +37,16 @@ class BiliDynamicWebClient:
     GET https://api.bilibili.com/x/polymer/web-dynamic/v1/feed/all
     认证：Cookie (SESSDATA)
     """
-    def __init__(self, cookie: str, timeout_sec: int = 15):
-        self.s = requests.Session()
+    def __init__(
+        self,
+        cookie: str,
+        timeout_sec: int = 15,
+        limiter=None,
+        session: Optional[requests.Session] = None,
+        api_base: Optional[str] = None,
+        guard: Optional[SourceGuard] = None,
+    ):
+        self.s = session or requests.Session()
         self.s.headers.update({
             "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
                           "AppleWebKit/537.36 (KHTML, like Gecko) "
@@ -44,12 +56,27 @@ class BiliDynamicWebClient:
             "Cookie": cookie or "",
         })
         self.timeout_sec = timeout_sec
-
-    def fetch_following_videos(self, limit: int = 30, offset: Optional[str] = None) -> Dict:
+        self.api_base = (api_base or DEFAULT_API_BASE).rstrip("/")
+        self.limiter = limiter
+        self.guard = guard or SourceGuard()
+
+    def _request(self, url: str, params: Dict) -> Dict:
+        if self.limiter is not None:
+            self.limiter.acquire()
+        return request_json(self.s, url, params, self.timeout_sec)
+
+    def fetch_following_videos(
+        self,
+        limit: int = 30,
+        offset: Optional[str] = None,
+        since_id: Optional[str] = None,
+        since_ts: Optional[int] = None,
+    ) -> Dict:
         """
-        返回 dict：{"videos": [...], "next_offset": ..., "update_baseline": ...}
+        返回 dict：{"videos": [...], "next_offset": ..., "update_baseline": ..., "has_more": ..., "reached_since": ...}
+        since_id / since_ts：上一轮已见过的动态 id / 最新 pub_ts，遇到即停止解析（reached_since=True）
         """
-        url = "https://api.bilibili.com/x/polymer/web-dynamic/v1/feed/all"
+        url = f"{self.api_base}/x/polymer/web-dynamic/v1/feed/all"
         params = {
             "type": "video",          # 只取视频投稿流（文档支持）
             "platform": "web",
@@ -57,13 +84,8 @@ class BiliDynamicWebClient:
         if offset:
             params["offset"] = offset
 
-        r = self.s.get(url, params=params, timeout=self.timeout_sec)
-        r.raise_for_status()
-        j = r.json()
-
-        if j.get("code") != 0:
-            # 直接抛出给上层处理/记录；不要静默吞掉
-            raise RuntimeError(f"DYNAMIC_WEB_ERROR code={j.get('code')} msg={j.get('message')}")
+        # 非 0 code 按类别抛出 BiliApiError（直接抛给上层，不要静默吞掉）；重试/熔断由 guard 处理
+        j = self.guard.call(self._request, url, params)
 
         data = j.get("data") or {}
         items = data.get("items") or []
@@ -71,7 +93,12 @@ class BiliDynamicWebClient:
         out: List[Dict] = []
         now = int(time.time())
 
+        reached_since = False
         for it in items:
+            if since_id and str(it.get("id_str") or "") == str(since_id):
+                reached_since = True
+                break
+
             # ✅ 关键：只保留“投稿视频动态”
             if it.get("type") != "DYNAMIC_TYPE_AV":
                 continue
@@ -94,6 +121,10 @@ class BiliDynamicWebClient:
             jump_url = archive.get("jump_url") or ""
             desc = archive.get("desc")
             pub_ts = ma.get("pub_ts") or now
+            if since_ts and int(pub_ts) < int(since_ts):
+                # feed 按时间倒序：比上一轮最新的还旧，后面都已见过
+                reached_since = True
+                break
             author_name = (ma.get("name") or "").strip()
 
 
@@ -146,4 +177,49 @@ class BiliDynamicWebClient:
             "videos": out,
             "next_offset": data.get("offset"),
             "update_baseline": data.get("update_baseline"),
+            "has_more": bool(data.get("has_more")),
+            "reached_since": reached_since,
+        }
+
+    def fetch_following_since(
+        self,
+        since_id: Optional[str] = None,
+        since_ts: Optional[int] = None,
+        max_pages: int = 10,
+        page_limit: int = 50,
+        offset: Optional[str] = None,
+    ) -> Dict:
+        """
+        整个关注 feed 一轮只拉一次：从 offset（None 即第一页）沿 next_offset 翻页，直到碰到上一轮的
+        update_baseline / 最新 pub_ts，或没有更多，或达到 max_pages。
+        返回 dict：{"videos": [...], "pages": n, "update_baseline": 第一页的 baseline, "newest_pub_ts": ...,
+                   "complete": 是否已翻到上一轮的位置（或 feed 到底）, "next_offset": 未完成时下一页的 offset}
+        """
+        videos: List[Dict] = []
+        baseline = None
+        pages = 0
+        complete = False
+
+        while pages < max(1, max_pages):
+            page = self.fetch_following_videos(
+                limit=page_limit, offset=offset, since_id=since_id, since_ts=since_ts
+            )
+            pages += 1
+            if baseline is None:
+                baseline = page.get("update_baseline")
+            videos.extend(page["videos"])
+
+            offset = page.get("next_offset")
+            if page.get("reached_since") or not page.get("has_more") or not offset:
+                complete = True
+                break
+
+        newest = max((int(v["pub_ts"]) for v in videos), default=None)
+        return {
+            "videos": videos,
+            "pages": pages,
+            "update_baseline": baseline,
+            "newest_pub_ts": newest,
+            "complete": complete,
+            "next_offset": None if complete else offset,
         }
@@ -0,0 +1,98 @@
+import threading
+from typing import Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .resilience import SourceGuard
+
+
+def build_http_adapter(http_cfg: Optional[Dict]) -> HTTPAdapter:
+    """
+    所有 source 共享同一个 HTTPAdapter（即同一个 urllib3 连接池），
+    keep-alive 连接和 TLS 会话在 creator 之间、轮次之间复用。
+    pool_maxsize 建议 >= fetch.concurrency。
+    """
+    cfg = http_cfg or {}
+    return HTTPAdapter(
+        pool_connections=max(1, int(cfg.get("pool_connections", 4))),
+        pool_maxsize=max(1, int(cfg.get("pool_maxsize", 16))),
+    )
+
+
+class SourceRegistry:
+    """
+    每个 source 客户端只构造一次：普通模式下每轮一次，daemon 模式下每进程一次。
+    get() 可以在 worker 线程里并发调用。
+    """
+
+    def __init__(self, config: Dict, limiter=None):
+        self.config = config
+        self.limiter = limiter
+        # bili_api / bili_dynamic 走同一账号同一出口，共享一个熔断器：
+        # 任一客户端被风控，所有请求一起暂停
+        self.guard = SourceGuard((config.get("fetch") or {}).get("resilience"))
+        self._adapter = build_http_adapter(config.get("http"))
+        self._clients: Dict[str, object] = {}
+        self._lock = threading.Lock()
+
+    def new_session(self) -> requests.Session:
+        s = requests.Session()
+        s.mount("https://", self._adapter)
+        s.mount("http://", self._adapter)
+        return s
+
+    def get(self, source: str):
+        with self._lock:
+            client = self._clients.get(source)
+            if client is None:
+                client = self._build(source)
+                self._clients[source] = client
+            return client
+
+    def _build(self, source: str):
+        bcfg = self.config.get("bilibili", {}) or {}
+        timeout_sec = int(bcfg.get("timeout_sec", 15))
+
+        if source == "stub":
+            return None
+
+        if source == "rsshub":
+            # rsshub 是函数式 source，这里只提供共享的 Session
+            return self.new_session()
+
+        if source == "bili_api":
+            from .bili_api import BiliClient
+            return BiliClient(
+                cookie=bcfg.get("cookie"),
+                timeout_sec=timeout_sec,
+                limiter=self.limiter,
+                session=self.new_session(),
+                api_base=bcfg.get("api_base"),
+                guard=self.guard,
+            )
+
+        if source == "bili_dynamic":
+            from .bili_dynamic import BiliDynamicWebClient
+            cookie = (bcfg.get("cookie") or "").strip()
+            if not cookie:
+                raise RuntimeError("bili_dynamic requires bilibili.cookie")
+            return BiliDynamicWebClient(
+                cookie=cookie,
+                timeout_sec=timeout_sec,
+                limiter=self.limiter,
+                session=self.new_session(),
+                api_base=bcfg.get("api_base"),
+                guard=self.guard,
+            )
+
+        raise RuntimeError(f"Unknown source: {source}")
+
+    def close(self) -> None:
+        with self._lock:
+            for client in self._clients.values():
+                s = getattr(client, "s", client)
+                if isinstance(s, requests.Session):
+                    s.close()
+            self._clients.clear()
+        self._adapter.close()
@@ -0,0 +1,152 @@
+import random
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+import requests
+
+# Bilibili 风控感知的重试 / 退避 / 熔断层，bili_api 与 bili_dynamic 共用。
+# 错误码分三类：
+# - throttled：风控/限频（-412 请求被拦截、-352 风控校验失败、-509/-799 请求过于频繁、HTTP 412/429）
+#              -> 熔断：整个 source 暂停 cooldown，再从原处继续
+# - retryable：服务端临时错误（-500/-502/-503/-504、HTTP 5xx、网络超时/断连）-> 抖动指数退避重试
+# - fatal：其余（-101 未登录、-400 参数错误、-404 不存在 ...）-> 不重试，直接抛给上层
+
+THROTTLED_CODES = {-412, -352, -509, -799}
+RETRYABLE_CODES = {-500, -502, -503, -504}
+THROTTLED_HTTP_STATUS = {412, 429}
+
+
+class BiliApiError(RuntimeError):
+    kind = "fatal"
+
+    def __init__(self, code: Optional[int], message: str = ""):
+        super().__init__(f"BILI API ERROR code={code} msg={message}")
+        self.code = code
+        self.message = message
+
+
+class RetryableApiError(BiliApiError):
+    kind = "retryable"
+
+
+class ThrottledApiError(BiliApiError):
+    kind = "throttled"
+
+
+class CircuitOpenError(BiliApiError):
+    """本轮熔断次数用尽：调用方应停止本轮，剩下的 creator 留到下一轮。"""
+    kind = "circuit_open"
+
+
+def classify_code(code: int) -> str:
+    if code in THROTTLED_CODES:
+        return "throttled"
+    if code in RETRYABLE_CODES:
+        return "retryable"
+    return "fatal"
+
+
+def _error_for(code: Optional[int], message: str, kind: str) -> BiliApiError:
+    if kind == "throttled":
+        return ThrottledApiError(code, message)
+    if kind == "retryable":
+        return RetryableApiError(code, message)
+    return BiliApiError(code, message)
+
+
+def request_json(session: requests.Session, url: str, params: Dict, timeout_sec: int) -> Dict:
+    """发一次 GET，并把 HTTP 错误、网络错误、非 0 code 统一转换成分类后的 BiliApiError。"""
+    try:
+        r = session.get(url, params=params, timeout=timeout_sec)
+    except (requests.ConnectionError, requests.Timeout) as exc:
+        raise RetryableApiError(None, repr(exc))
+
+    if r.status_code in THROTTLED_HTTP_STATUS:
+        raise ThrottledApiError(r.status_code, f"HTTP {r.status_code}")
+    if r.status_code >= 500:
+        raise RetryableApiError(r.status_code, f"HTTP {r.status_code}")
+    r.raise_for_status()
+
+    data = r.json()
+    code = data.get("code")
+    if code != 0:
+        code_int = int(code) if isinstance(code, int) else None
+        kind = classify_code(code_int) if code_int is not None else "fatal"
+        raise _error_for(code_int, str(data.get("message") or ""), kind)
+    return data
+
+
+class SourceGuard:
+    """
+    一个 source（同一账号/出口）共享一个 guard：
+    - retryable：按 backoff_base_sec * 2^n（带抖动，封顶 backoff_max_sec）重试，最多 max_retries 次
+    - throttled：打开熔断，所有线程在 circuit_cooldown_sec 内暂停发请求，冷却后继续重试
+    - 本轮熔断超过 max_circuit_trips 次：之后所有调用直接抛 CircuitOpenError
+    """
+
+    def __init__(self, cfg: Optional[Dict] = None):
+        cfg = cfg or {}
+        self.max_retries = max(0, int(cfg.get("max_retries", 3)))
+        self.backoff_base_sec = float(cfg.get("backoff_base_sec", 2))
+        self.backoff_max_sec = float(cfg.get("backoff_max_sec", 60))
+        self.cooldown_sec = float(cfg.get("circuit_cooldown_sec", 300))
+        self.max_trips = max(1, int(cfg.get("max_circuit_trips", 3)))
+        self._lock = threading.Lock()
+        self._open_until = 0.0
+        self.trips = 0
+        self.broken = False
+        self.stats = {"retries": 0, "throttled": 0, "trips": 0}
+
+    def reset(self) -> None:
+        """新一轮开始时调用：清零计数；仍在冷却中的熔断保持不变。"""
+        with self._lock:
+            self.trips = 0
+            self.broken = False
+            self.stats = {"retries": 0, "throttled": 0, "trips": 0}
+
+    def _backoff(self, attempt: int) -> float:
+        delay = min(self.backoff_max_sec, self.backoff_base_sec * (2 ** attempt))
+        return delay * random.uniform(0.5, 1.5)
+
+    def _wait_if_open(self) -> None:
+        while True:
+            with self._lock:
+                if self.broken:
+                    raise CircuitOpenError(None, "circuit open, run stopped")
+                wait = self._open_until - time.monotonic()
+            if wait <= 0:
+                return
+            time.sleep(wait)
+
+    def _trip(self) -> None:
+        with self._lock:
+            self.stats["throttled"] += 1
+            now = time.monotonic()
+            if now < self._open_until:
+                # 已经有别的线程打开了熔断，这次不重复计数
+                return
+            self.trips += 1
+            self.stats["trips"] += 1
+            if self.trips > self.max_trips:
+                self.broken = True
+                return
+            cooldown = self.cooldown_sec * random.uniform(1.0, 1.2)
+            self._open_until = now + cooldown
+            print(f"CIRCUIT OPEN: cooldown {cooldown:.0f}s (trip {self.trips}/{self.max_trips})")
+
+    def call(self, fn: Callable, *args, **kwargs):
+        attempt = 0
+        while True:
+            self._wait_if_open()
+            try:
+                return fn(*args, **kwargs)
+            except ThrottledApiError:
+                self._trip()
+            except RetryableApiError:
+                if attempt >= self.max_retries:
+                    raise
+                time.sleep(self._backoff(attempt))
+            attempt += 1
+            with self._lock:
+                self.stats["retries"] += 1
@@ -1,12 +1,27 @@
 import feedparser
 import time
-from typing import Dict, List
+from typing import Dict, List, Optional
 from urllib.parse import urljoin
 
-def fetch_creator_videos(uid: int, limit: int, base_url: str, route_template: str) -> List[Dict]:
+def fetch_creator_videos(
+    uid: int,
+    limit: int,
+    base_url: str,
+    route_template: str,
+    since_ts: Optional[int] = None,
+    since_bvid: Optional[str] = None,
+    session=None,
+    timeout_sec: int = 15,
+) -> List[Dict]:
     route = route_template.format(uid=uid)
     feed_url = urljoin(base_url.rstrip("/") + "/", route.lstrip("/"))
-    feed = feedparser.parse(feed_url)
+    if session is not None:
+        # 走共享的 requests.Session（连接复用），feedparser 只负责解析
+        r = session.get(feed_url, timeout=timeout_sec)
+        r.raise_for_status()
+        feed = feedparser.parse(r.content)
+    else:
+        feed = feedparser.parse(feed_url)
 
     out: List[Dict] = []
     for e in feed.entries[:limit]:
@@ -22,6 +37,10 @@ def fetch_creator_videos(uid: int, limit: int, base_url: str, route_template: st
         # bvid：RSS 不一定能直接提供；这里用 link 做降级主键（仍可能重复）
         bvid = link.split("/")[-1] if link else f"RSS{uid}{pub_ts}"
 
+        # feed 按时间倒序：碰到上次见过的视频（高水位）就停止
+        if (since_bvid and bvid == since_bvid) or (since_ts and pub_ts < since_ts):
+            break
+
         out.append({
             "bvid": bvid,
             "aid": None,
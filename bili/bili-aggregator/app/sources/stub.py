@@ -1,11 +1,18 @@
 import time
-from typing import Dict, List
+from typing import Dict, List, Optional
 
-def fetch_creator_videos(uid: int, limit: int) -> List[Dict]:
+def fetch_creator_videos(
+    uid: int,
+    limit: int,
+    since_ts: Optional[int] = None,
+    since_bvid: Optional[str] = None,
+) -> List[Dict]:
     now = int(time.time())
     out = []
     for i in range(min(limit, 5)):
         bvid = f"BVSTUB{uid}{i}"
+        if since_bvid and bvid == since_bvid:
+            break
         out.append({
             "bvid": bvid,
             "aid": None,
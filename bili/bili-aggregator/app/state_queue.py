@@ -0,0 +1,112 @@
+import threading
+import time
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+# 状态写入合并：/api/state 与 /api/state/batch 的写入先进队列，后台线程攒 window_ms 后一次事务提交。
+# 同一 bvid 在窗口内被连续改动（已读 -> 撤销 -> 隐藏）只写最后一次；
+# 提交请求的线程会等到自己那一批落盘才返回（group commit），所以响应返回时数据已提交。
+
+StateItems = Dict[str, Tuple[str, int]]  # bvid -> (state, updated_ts)
+
+
+class _Batch:
+    def __init__(self):
+        self.items: StateItems = {}
+        self.done = threading.Event()
+        self.error: Optional[BaseException] = None
+
+
+class StateWriteQueue:
+    """
+    write_fn(items) 在后台线程里执行，负责一次事务写入 {bvid: (state, updated_ts)}；抛异常时该批所有提交方都会收到。
+    window_sec <= 0 时不排队，submit 在调用线程里直接写。
+    """
+
+    def __init__(self, write_fn: Callable[[StateItems], None], window_sec: float = 0.05):
+        self.write_fn = write_fn
+        self.window_sec = max(0.0, float(window_sec))
+        self._cond = threading.Condition()
+        self._pending: Optional[_Batch] = None
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+        self.stats = {"submitted": 0, "written": 0, "commits": 0}
+
+    def submit(self, items: Iterable[Tuple[str, str]], timeout_sec: float = 30.0) -> int:
+        """写入 [(bvid, state)]，等本批提交后返回 updated_ts；写库失败时原样抛出。"""
+        updated_ts = int(time.time())
+        items = list(items)
+        if not items:
+            return updated_ts
+
+        if self.window_sec <= 0:
+            merged = {bvid: (state, updated_ts) for bvid, state in items}
+            self.write_fn(merged)
+            with self._cond:
+                self.stats["submitted"] += len(items)
+                self.stats["written"] += len(merged)
+                self.stats["commits"] += 1
+            return updated_ts
+
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("state write queue is closed")
+            if self._pending is None:
+                self._pending = _Batch()
+                self._cond.notify_all()
+            batch = self._pending
+            for bvid, state in items:
+                batch.items[bvid] = (state, updated_ts)
+            self.stats["submitted"] += len(items)
+            self._ensure_thread()
+
+        if not batch.done.wait(timeout_sec):
+            raise RuntimeError(f"state write not committed within {timeout_sec}s")
+        if batch.error is not None:
+            raise batch.error
+        return updated_ts
+
+    def _ensure_thread(self) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="state-writer", daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while self._pending is None and not self._closed:
+                    self._cond.wait()
+                if self._pending is None and self._closed:
+                    return
+            # 第一条进来后再等一个窗口，让紧跟着的改动并进同一批
+            if not self._closed:
+                time.sleep(self.window_sec)
+            with self._cond:
+                batch, self._pending = self._pending, None
+            self._flush(batch)
+
+    def _flush(self, batch: _Batch) -> None:
+        try:
+            self.write_fn(batch.items)
+            with self._cond:
+                self.stats["written"] += len(batch.items)
+                self.stats["commits"] += 1
+        except BaseException as exc:
+            batch.error = exc
+            print("STATE WRITE FAILED:", repr(exc))
+        finally:
+            batch.done.set()
+
+    def close(self) -> None:
+        """停止后台线程；还没落盘的一批会先写完。"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+            thread = self._thread
+        if thread is not None:
+            thread.join()
+        with self._cond:
+            batch, self._pending = self._pending, None
+            self._closed = False
+            self._thread = None
+        if batch is not None:
+            self._flush(batch)
@@ -0,0 +1,84 @@
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+# 近期视频统计刷新：列表抓取停在高水位后，老视频的播放量不会再被顺带更新，
+# 这里单独挑出 only_update_recent_days_stats 窗口内、stats_ts 过期的视频，
+# 分批走限速器拉统计，只回写统计列。
+
+_UPDATE_STATS_SQL = """
+    UPDATE videos SET
+      view=COALESCE(?, view),
+      like_cnt=COALESCE(?, like_cnt),
+      reply_cnt=COALESCE(?, reply_cnt),
+      danmaku=COALESCE(?, danmaku),
+      favorite=COALESCE(?, favorite),
+      coin=COALESCE(?, coin),
+      share=COALESCE(?, share),
+      stats_ts=?
+    WHERE bvid=?
+"""
+
+
+def select_stale_videos(
+    conn: sqlite3.Connection,
+    recent_days: int,
+    stale_hours: float,
+    max_rows: int,
+    now_ts: int,
+) -> List[str]:
+    """窗口内统计最旧（或从没刷新过）的视频优先。"""
+    rows = conn.execute(
+        """
+        SELECT bvid
+        FROM videos
+        WHERE pub_ts >= ?
+          AND (stats_ts IS NULL OR stats_ts < ?)
+        ORDER BY COALESCE(stats_ts, 0) ASC, pub_ts DESC
+        LIMIT ?
+        """,
+        (now_ts - recent_days * 86400, now_ts - int(stale_hours * 3600), max_rows),
+    ).fetchall()
+    return [r["bvid"] for r in rows]
+
+
+def refresh_recent_stats(conn: sqlite3.Connection, client, fetch_cfg: Dict, concurrency: int = 1) -> Dict[str, int]:
+    """
+    client 需提供 fetch_video_stats(bvid) -> Optional[dict]（见 BiliClient），请求走其限速器。
+    每批一个事务；返回 {"candidates": n, "refreshed": n, "failed": n}
+    """
+    refresh_cfg = fetch_cfg.get("stats_refresh") or {}
+    recent_days = int(fetch_cfg.get("only_update_recent_days_stats", 7) or 0)
+    counts = {"candidates": 0, "refreshed": 0, "failed": 0}
+    if recent_days <= 0 or not refresh_cfg.get("enabled", True):
+        return counts
+
+    stale_hours = float(refresh_cfg.get("stale_hours", 6))
+    batch_size = max(1, int(refresh_cfg.get("batch_size", 50)))
+    max_per_run = max(0, int(refresh_cfg.get("max_per_run", 200)))
+
+    bvids = select_stale_videos(conn, recent_days, stale_hours, max_per_run, int(time.time()))
+    counts["candidates"] = len(bvids)
+
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+        for i in range(0, len(bvids), batch_size):
+            batch = bvids[i:i + batch_size]
+            results = list(pool.map(client.fetch_video_stats, batch))
+            stats_ts = int(time.time())
+            rows = []
+            for bvid, stats in zip(batch, results):
+                if not stats:
+                    counts["failed"] += 1
+                    continue
+                rows.append((
+                    stats.get("view"), stats.get("like"), stats.get("reply"),
+                    stats.get("danmaku"), stats.get("favorite"), stats.get("coin"), stats.get("share"),
+                    stats_ts, bvid,
+                ))
+            if rows:
+                conn.executemany(_UPDATE_STATS_SQL, rows)
+                conn.commit()
+                counts["refreshed"] += len(rows)
+
+    return counts
@@ -0,0 +1,123 @@
+import random
+import sqlite3
+import time
+from typing import Dict, List
+
+from .ratelimit import TokenBucket
+from .sources.resilience import CircuitOpenError
+
+# tag 补全队列：ingest 时把没有 tag 的新视频放进 tag_queue（bvid 主键天然去重），
+# 这里低优先级地按自己的请求预算慢慢消化，失败按指数退避重试，超过次数放弃。
+
+
+def _backoff_sec(attempts: int, base_sec: float, max_sec: float) -> int:
+    delay = min(max_sec, base_sec * (2 ** max(0, attempts - 1)))
+    return int(delay * random.uniform(0.8, 1.2))
+
+
+def drain_tag_queue(conn: sqlite3.Connection, client, enrich_cfg: Dict) -> Dict[str, int]:
+    """
+    client 需提供 fetch_tags_by_aid(aid, raise_errors=True)（见 BiliClient）。
+    每次请求先从本队列自己的令牌桶拿令牌，再走 client 上的全局限速器。
+    返回 {"picked": n, "tagged": n, "retry": n, "dropped": n}
+    """
+    counts = {"picked": 0, "tagged": 0, "retry": 0, "dropped": 0}
+    max_per_run = max(0, int(enrich_cfg.get("max_per_run", 50)))
+    if max_per_run == 0:
+        return counts
+
+    budget = TokenBucket(float(enrich_cfg.get("rate_per_sec", 0.2)), burst=1)
+    max_attempts = max(1, int(enrich_cfg.get("max_attempts", 5)))
+    base_sec = float(enrich_cfg.get("backoff_base_sec", 600))
+    max_sec = float(enrich_cfg.get("backoff_max_sec", 86400))
+
+    now_ts = int(time.time())
+    rows = conn.execute(
+        """
+        SELECT bvid, aid, attempts
+        FROM tag_queue
+        WHERE next_try_ts <= ?
+        ORDER BY next_try_ts ASC
+        LIMIT ?
+        """,
+        (now_ts, max_per_run),
+    ).fetchall()
+    counts["picked"] = len(rows)
+
+    done: List[str] = []
+    tag_rows: List[tuple] = []
+    retry_rows: List[tuple] = []
+    for r in rows:
+        budget.acquire()
+        try:
+            tags = client.fetch_tags_by_aid(int(r["aid"]), raise_errors=True)
+        except CircuitOpenError as exc:
+            # 熔断用尽：剩下的原样留在队列里，下一轮再说（不计入 attempts）
+            print("TAG ENRICH STOPPED:", repr(exc))
+            break
+        except Exception as exc:
+            attempts = int(r["attempts"]) + 1
+            if attempts >= max_attempts:
+                print("TAG ENRICH DROP:", r["bvid"], repr(exc))
+                done.append(r["bvid"])
+                counts["dropped"] += 1
+            else:
+                retry_rows.append((
+                    attempts,
+                    int(time.time()) + _backoff_sec(attempts, base_sec, max_sec),
+                    str(exc)[:200],
+                    r["bvid"],
+                ))
+                counts["retry"] += 1
+            continue
+
+        done.append(r["bvid"])
+        for t in tags:
+            t2 = (t or "").strip()
+            if t2:
+                tag_rows.append((r["bvid"], t2))
+        counts["tagged"] += 1
+
+    try:
+        if tag_rows:
+            conn.executemany(
+                "INSERT OR IGNORE INTO video_tags(bvid, tag) VALUES(?,?)",
+                tag_rows,
+            )
+        if retry_rows:
+            conn.executemany(
+                "UPDATE tag_queue SET attempts=?, next_try_ts=?, last_error=? WHERE bvid=?",
+                retry_rows,
+            )
+        if done:
+            conn.executemany("DELETE FROM tag_queue WHERE bvid=?", [(b,) for b in done])
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+    return counts
+
+
+def main() -> int:
+    """单独消化补全队列（例如另开一个低频 cron）：python -m app.tag_enrich"""
+    from .config import load_config
+    from .db import connect, migrate
+    from .ratelimit import build_limiter
+    from .sources.registry import SourceRegistry
+
+    config = load_config()
+    conn = connect((config.get("app") or {}).get("db_path", "data/app.db"))
+    migrate(conn)
+    registry = SourceRegistry(config, build_limiter(config.get("fetch")))
+    try:
+        enrich_cfg = (config.get("fetch") or {}).get("tag_enrich") or {}
+        print("tag_enrich:", drain_tag_queue(conn, registry.get("bili_api"), enrich_cfg))
+    finally:
+        registry.close()
+        conn.close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
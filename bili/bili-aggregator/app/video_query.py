@@ -0,0 +1,122 @@
+import sqlite3
+from typing import Dict, List, Optional, Tuple
+
+from .search import bm25_expr, like_pattern, split_query
+
+# /api/videos 与导出（app/export.py）共用的筛选 / 排序构造，保证两边同一组参数筛出同一批视频。
+# 生成的 SQL 约定别名：v = videos，c = creators（LEFT JOIN），s = video_state（LEFT JOIN），f = 全文索引子查询。
+
+
+def video_filters(
+    q: Optional[str] = None,
+    uid: Optional[int] = None,
+    tid: Optional[int] = None,
+    tag: Optional[str] = None,
+    group: Optional[str] = None,
+    view_min: Optional[int] = None,
+    view_max: Optional[int] = None,
+    state: Optional[str] = None,
+    only_whitelist: bool = True,
+    hide_seen: bool = True,
+) -> Tuple[str, list, List[str], list]:
+    """
+    返回 (fts_join, fts_params, where, params)：
+    - fts_join：q 里有可索引的词时为 JOIN 全文索引的片段（带 f.fts_rank），否则为空串
+    - where / params：WHERE 条件列表与对应参数，调用方可以继续追加（如 cursor 条件）
+    未指定 state 且 hide_seen 时排除 HIDDEN / READ（列表页默认行为）。
+    """
+    where: List[str] = []
+    params: list = []
+
+    # q 走全文索引（title / desc / tags）：3 字以上的词查 video_fts，2 字的词查 video_fts_bigram，
+    # 两边都有时按 docid 取交集、相关度取 video_fts 的；只有单字等索引用不上的词退回 LIKE
+    fts_match, bigram_match, like_terms = split_query(q)
+    fts_join = ""
+    fts_params: list = []
+    hits = None
+    if fts_match:
+        hits = f"SELECT rowid AS docid, {bm25_expr('video_fts')} AS score FROM video_fts WHERE video_fts MATCH ?"
+        fts_params.append(fts_match)
+        if bigram_match:
+            # 交集写成 +rowid IN (...)：子查询只物化一次。写成 JOIN 或不带 + 时，
+            # SQLite 会按每个 rowid 重跑一次 video_fts 的 MATCH
+            hits += " AND +rowid IN (SELECT rowid FROM video_fts_bigram WHERE video_fts_bigram MATCH ?)"
+            fts_params.append(bigram_match)
+    elif bigram_match:
+        hits = (
+            f"SELECT rowid AS docid, {bm25_expr('video_fts_bigram')} AS score "
+            "FROM video_fts_bigram WHERE video_fts_bigram MATCH ?"
+        )
+        fts_params.append(bigram_match)
+    if hits:
+        fts_join = f"""
+          JOIN (
+            SELECT i.bvid AS fts_bvid, h.score AS fts_rank
+            FROM ({hits}) h
+            JOIN video_fts_ids i ON i.docid = h.docid
+          ) f ON f.fts_bvid = v.bvid"""
+    for term in like_terms:
+        where.append(
+            "(v.title LIKE ? ESCAPE '\\' OR v.\"desc\" LIKE ? ESCAPE '\\'"
+            " OR EXISTS (SELECT 1 FROM video_tags lt WHERE lt.bvid=v.bvid AND lt.tag LIKE ? ESCAPE '\\'))"
+        )
+        params.extend([like_pattern(term)] * 3)
+    if uid:
+        where.append("v.uid=?")
+        params.append(uid)
+    if tid:
+        where.append("v.tid=?")
+        params.append(tid)
+    if view_min is not None:
+        where.append("COALESCE(v.view,0) >= ?")
+        params.append(view_min)
+    if view_max is not None:
+        where.append("COALESCE(v.view,0) <= ?")
+        params.append(view_max)
+    if tag:
+        where.append("EXISTS (SELECT 1 FROM video_tags vt WHERE vt.bvid=v.bvid AND vt.tag=?)")
+        params.append(tag)
+    if only_whitelist:
+        # 写成 COALESCE：c.enabled=1 会让 SQLite 把 LEFT JOIN 化简为内连接并从 creators 驱动，
+        # 整个结果再临时排序；这样写保持 videos 在外层，沿排序索引走并在 LIMIT 处停下
+        where.append("COALESCE(c.enabled, 0)=1")
+    if group:
+        where.append("c.group_name=?")
+        params.append(group)
+
+    if state:
+        where.append("COALESCE(s.state, 'NEW')=?")
+        params.append(state)
+    elif hide_seen:
+        where.append("COALESCE(s.state, 'NEW') NOT IN ('HIDDEN', 'READ')")
+
+    return fts_join, fts_params, where, params
+
+
+def video_order(sort: Optional[str], has_fts: bool) -> Tuple[str, str]:
+    """
+    返回 (实际排序, ORDER BY 子句)。未指定排序时：有全文检索按相关度，否则按最新；
+    排序键补上 bvid 使顺序唯一，cursor 才能精确接续。
+    """
+    if sort is None or (sort == "rank" and not has_fts):
+        sort = "rank" if has_fts else "pub"
+    if sort == "rank":
+        return sort, "ORDER BY f.fts_rank ASC, v.pub_ts DESC, v.bvid DESC"
+    if sort == "view":
+        return sort, "ORDER BY COALESCE(v.view,0) DESC, v.pub_ts DESC, v.bvid DESC"
+    return sort, "ORDER BY v.pub_ts DESC, v.bvid DESC"
+
+
+def load_tags(conn: sqlite3.Connection, bvids: List[str]) -> Dict[str, List[str]]:
+    """一页视频的 tags 一次查出（IN 查询，按 500 个一组），返回 bvid -> 排好序的 tags。"""
+    tags_by_bvid: Dict[str, List[str]] = {}
+    unique = list(dict.fromkeys(bvids))
+    for i in range(0, len(unique), 500):
+        chunk = unique[i:i + 500]
+        placeholders = ",".join(["?"] * len(chunk))
+        for t in conn.execute(
+            f"SELECT bvid, tag FROM video_tags WHERE bvid IN ({placeholders}) ORDER BY bvid, tag",
+            chunk,
+        ):
+            tags_by_bvid.setdefault(t["bvid"], []).append(t["tag"])
+    return tags_by_bvid
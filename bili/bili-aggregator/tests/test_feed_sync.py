@@ -0,0 +1,110 @@
+"""
+bili_dynamic 关注 feed 同步：已有 baseline 时翻满 feed_max_pages 仍没追上，baseline 不能前移，
+下一轮要从记下的 offset 接着翻，直到补齐中间的全部视频。
+
+    python -m unittest tests.test_feed_sync
+"""
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+
+from app import db
+from app.fetcher import FEED_BASELINE_KEY, FEED_RESUME_OFFSET_KEY, run_fetch
+from tools.fake_bili_server import FakeBiliServer
+
+CREATORS = 10
+VIDEOS_PER_CREATOR = 20
+PAGE_SIZE = 10
+
+
+class FeedSyncPageCapTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmp.name, "feed.db")
+        self.server = FakeBiliServer(
+            creators=CREATORS, videos_per_creator=VIDEOS_PER_CREATOR, feed_page_size=PAGE_SIZE
+        ).start()
+        self.full_feed = list(self.server.data.feed())
+
+    def tearDown(self):
+        self.server.stop()
+        self.tmp.cleanup()
+
+    def _config(self, max_pages: int) -> dict:
+        return {
+            "app": {"db_path": self.db_path},
+            "fetch": {
+                "source": "bili_dynamic",
+                "per_creator_limit": 50,
+                "polite_sleep_ms": [0, 0],
+                "feed_max_pages": max_pages,
+                "rate_limit": {"rate_per_sec": 1000, "burst": 10},
+                "only_update_recent_days_stats": 0,
+                "tag_enrich": {"enabled": False},
+            },
+            "api": {"daily_cache": {"warm_after_fetch": False}},
+            "bilibili": {"cookie": "SESSDATA=test", "timeout_sec": 5, "api_base": self.server.url},
+            "creators": [{"uid": uid, "name": f"UP{uid}"} for uid in range(1, CREATORS + 1)],
+        }
+
+    def _run(self, max_pages: int) -> None:
+        with contextlib.redirect_stdout(io.StringIO()):
+            run_fetch(self._config(max_pages))
+
+    def _state(self, key: str):
+        conn = db.connect(self.db_path)
+        try:
+            return db.get_fetch_state(conn, key)
+        finally:
+            conn.close()
+
+    def _video_count(self) -> int:
+        conn = db.connect(self.db_path)
+        try:
+            return conn.execute("SELECT COUNT(*) FROM videos").fetchone()[0]
+        finally:
+            conn.close()
+
+    def test_page_cap_with_baseline_resumes_instead_of_skipping(self):
+        # 首轮只看到最旧的 20 条（一轮翻完），建立 baseline
+        self.server.data._feed = self.full_feed[-20:]
+        self._run(max_pages=10)
+        old_baseline = self._state(FEED_BASELINE_KEY)
+        self.assertEqual(old_baseline, self.full_feed[-20]["id_str"])
+        self.assertEqual(self._video_count(), 20)
+
+        # 之后冒出 180 条新动态，每轮只能翻 3 页（30 条）
+        self.server.data._feed = self.full_feed
+        self._run(max_pages=3)
+        self.assertEqual(self._state(FEED_BASELINE_KEY), old_baseline)
+        self.assertEqual(self._state(FEED_RESUME_OFFSET_KEY), "30")
+        self.assertEqual(self._video_count(), 50)
+
+        for _ in range(10):
+            if self._state(FEED_RESUME_OFFSET_KEY) is None:
+                break
+            self._run(max_pages=3)
+
+        self.assertIsNone(self._state(FEED_RESUME_OFFSET_KEY))
+        self.assertEqual(self._video_count(), CREATORS * VIDEOS_PER_CREATOR)
+        # 追上后 baseline 推进到追赶开始时的 feed 顶部
+        self.assertEqual(self._state(FEED_BASELINE_KEY), self.full_feed[0]["id_str"])
+
+    def test_first_run_backfills_across_runs(self):
+        self._run(max_pages=2)
+        self.assertEqual(self._video_count(), 2 * PAGE_SIZE)
+        self.assertIsNone(self._state(FEED_BASELINE_KEY))
+        self.assertEqual(self._state(FEED_RESUME_OFFSET_KEY), str(2 * PAGE_SIZE))
+
+        for _ in range(20):
+            if self._state(FEED_RESUME_OFFSET_KEY) is None:
+                break
+            self._run(max_pages=2)
+
+        self.assertEqual(self._video_count(), CREATORS * VIDEOS_PER_CREATOR)
+        self.assertEqual(self._state(FEED_BASELINE_KEY), self.full_feed[0]["id_str"])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,89 @@
+"""
+/api/videos?q= 的全文检索：3 字以上走 video_fts，2 字走 video_fts_bigram，其余退回 LIKE；
+不论走哪条路，结果都要与逐行 LIKE 一致，且 VACUUM 之后依然一致。
+
+    python -m unittest tests.test_search
+"""
+import contextlib
+import io
+import os
+import random
+import tempfile
+import unittest
+
+from app.db import connect, migrate
+from app.search import split_query
+from app.video_query import video_filters
+
+WORDS = ("游戏", "实况", "篮球", "复盘", "深度", "解析", "AI", "4K", "教程", "测评", "Python", "合集", "第一期")
+TAGS = ("游戏", "知识", "科技区", "AI绘画", "生活vlog", "教程")
+QUERIES = (
+    "游戏", "复盘", "篮球复盘", "AI", "4k", "深度 解析", "游戏 篮球复盘", "戏实", "a", "游", "第一期",
+    "A-", "实况 AI教程", "不存在", "python", "科技", "科技区",
+)
+
+
+def like_reference(conn, q: str) -> set:
+    cond, params = [], []
+    for term in q.split():
+        cond.append(
+            '(v.title LIKE ? OR v."desc" LIKE ? '
+            "OR EXISTS (SELECT 1 FROM video_tags t WHERE t.bvid = v.bvid AND t.tag LIKE ?))"
+        )
+        params.extend([f"%{term}%"] * 3)
+    return {r[0] for r in conn.execute(f"SELECT v.bvid FROM videos v WHERE {' AND '.join(cond)}", params)}
+
+
+def search(conn, q: str) -> set:
+    fts_join, fts_params, where, params = video_filters(q=q, only_whitelist=False, hide_seen=False)
+    where_sql = f" WHERE {' AND '.join(where)}" if where else ""
+    return {r[0] for r in conn.execute(f"SELECT v.bvid FROM videos v{fts_join}{where_sql}", fts_params + params)}
+
+
+class SearchTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.conn = connect(os.path.join(self.tmp.name, "search.db"))
+        with contextlib.redirect_stdout(io.StringIO()):
+            migrate(self.conn)
+        rng = random.Random(7)
+        for i in range(300):
+            bvid = f"BV{i:08d}"
+            title = "".join(rng.choice(WORDS) for _ in range(rng.randint(1, 4)))
+            desc = " ".join(rng.choice(WORDS) for _ in range(rng.randint(0, 6))) or None
+            self.conn.execute(
+                'INSERT INTO videos(bvid, uid, title, pub_ts, url, "desc", fetched_ts) VALUES (?, ?, ?, ?, ?, ?, 0)',
+                (bvid, i % 10, title, 1_700_000_000 + i, f"https://b23.tv/{bvid}", desc),
+            )
+            for tag in rng.sample(TAGS, rng.randint(0, 2)):
+                self.conn.execute("INSERT INTO video_tags(bvid, tag) VALUES (?, ?)", (bvid, tag))
+        self.conn.commit()
+
+    def tearDown(self):
+        self.conn.close()
+        self.tmp.cleanup()
+
+    def _assert_all_queries_match_like(self):
+        for q in QUERIES:
+            self.assertEqual(search(self.conn, q), like_reference(self.conn, q), q)
+
+    def test_term_routing(self):
+        self.assertEqual(split_query("篮球复盘 游戏 游 A-"), ('"篮球复盘"', '"游戏"', ["游", "A-"]))
+
+    def test_matches_like(self):
+        self._assert_all_queries_match_like()
+
+    def test_updates_and_vacuum_keep_index_in_sync(self):
+        self.conn.execute("DELETE FROM videos WHERE CAST(substr(bvid, 3) AS INTEGER) % 3 = 0")
+        self.conn.execute("UPDATE videos SET title = title || '实况' WHERE CAST(substr(bvid, 3) AS INTEGER) % 5 = 0")
+        self.conn.execute("DELETE FROM video_tags WHERE tag = '游戏'")
+        self.conn.commit()
+        # videos 的隐式 rowid 会被 VACUUM 重排；索引按 docid 关联，不受影响
+        self.conn.execute("VACUUM")
+        self.conn.execute("INSERT INTO video_tags(bvid, tag) SELECT bvid, '复盘' FROM videos LIMIT 20")
+        self.conn.commit()
+        self._assert_all_queries_match_like()
+
+
+if __name__ == "__main__":
+    unittest.main()
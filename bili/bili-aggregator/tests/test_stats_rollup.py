@@ -0,0 +1,249 @@
+"""
+stats_* 预聚合表由触发器维护：随机改库（入库 / 隐藏 / 取消隐藏 / 删状态 / 改发布日 / 改分区 / 推送）后，
+/api/stats/* 的结果必须与直接按原表逐行统计的结果一致。
+
+    python -m unittest tests.test_stats_rollup
+"""
+import os
+import random
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+from app import main as app_main
+from app.config import set_config
+from app.db import connect, migrate
+
+NOW = 1_760_000_000
+CHANNELS = ("serverchan", "bark")
+TNAMES = ("游戏", "知识", "科技", "", None, " 生活 ")
+STATES = ("NEW", "READ", "HIDDEN")
+WINDOWS = (1, 3, 7, 30, 3650)
+TNAME_SQL = "COALESCE(NULLIF(TRIM(v.tname), ''), '未分区')"
+
+
+def raw_overview(conn, days: int, channel: str) -> dict:
+    cutoff = NOW - days * 86400
+    videos = conn.execute(
+        """
+        SELECT COUNT(*) FROM videos v
+        LEFT JOIN video_state hs ON hs.bvid = v.bvid AND hs.state = 'HIDDEN'
+        WHERE hs.bvid IS NULL AND v.pub_ts >= ?
+        """,
+        (cutoff,),
+    ).fetchone()[0]
+    pushed, creators = conn.execute(
+        """
+        SELECT COUNT(*), COUNT(DISTINCT v.uid) FROM push_log pl JOIN videos v ON v.bvid = pl.bvid
+        WHERE pl.channel = ? AND pl.pushed_ts >= ?
+        """,
+        (channel, cutoff),
+    ).fetchone()
+    tnames = conn.execute(
+        f"""
+        SELECT {TNAME_SQL} AS tn, COUNT(*) AS cnt FROM push_log pl JOIN videos v ON v.bvid = pl.bvid
+        WHERE pl.channel = ? AND pl.pushed_ts >= ?
+        GROUP BY tn ORDER BY cnt DESC, tn ASC LIMIT 5
+        """,
+        (channel, cutoff),
+    ).fetchall()
+    top = conn.execute(
+        """
+        SELECT v.uid, COUNT(*) AS cnt FROM push_log pl JOIN videos v ON v.bvid = pl.bvid
+        WHERE pl.channel = ? AND pl.pushed_ts >= ?
+        GROUP BY v.uid ORDER BY cnt DESC, v.uid ASC LIMIT 10
+        """,
+        (channel, cutoff),
+    ).fetchall()
+    return {
+        "videos_in_window": videos,
+        "pushed_in_window": pushed,
+        "distinct_creators_pushed": creators,
+        "top_tnames_pushed": [(r[0], r[1]) for r in tnames],
+        "top_creators_pushed": [(r[0], r[1]) for r in top],
+    }
+
+
+def raw_creator_stats(conn, days: int, channel: str) -> dict:
+    cutoff = NOW - days * 86400
+    out = {}
+    for (uid,) in conn.execute("SELECT uid FROM creators").fetchall():
+        pushed_count, last_pushed_ts = conn.execute(
+            """
+            SELECT COUNT(*), MAX(pl.pushed_ts) FROM push_log pl JOIN videos v ON v.bvid = pl.bvid
+            WHERE pl.channel = ? AND pl.pushed_ts >= ? AND v.uid = ?
+            """,
+            (channel, cutoff, uid),
+        ).fetchone()
+        last_pub_ts = conn.execute(
+            """
+            SELECT MAX(v.pub_ts) FROM videos v
+            LEFT JOIN video_state hs ON hs.bvid = v.bvid AND hs.state = 'HIDDEN'
+            WHERE hs.bvid IS NULL AND v.uid = ?
+            """,
+            (uid,),
+        ).fetchone()[0]
+        sample = conn.execute(
+            """
+            SELECT pl.bvid FROM push_log pl JOIN videos v ON v.bvid = pl.bvid
+            WHERE pl.channel = ? AND pl.pushed_ts >= ? AND v.uid = ?
+            ORDER BY pl.pushed_ts DESC, pl.bvid ASC LIMIT 3
+            """,
+            (channel, cutoff, uid),
+        ).fetchall()
+        mix = conn.execute(
+            f"""
+            SELECT {TNAME_SQL} AS tn, COUNT(*) AS cnt FROM push_log pl JOIN videos v ON v.bvid = pl.bvid
+            WHERE pl.channel = ? AND pl.pushed_ts >= ? AND v.uid = ?
+            GROUP BY tn ORDER BY cnt DESC, tn ASC LIMIT 3
+            """,
+            (channel, cutoff, uid),
+        ).fetchall()
+        hidden, read = conn.execute(
+            """
+            SELECT COALESCE(SUM(s.state = 'HIDDEN'), 0), COALESCE(SUM(s.state = 'READ'), 0)
+            FROM video_state s JOIN videos v ON v.bvid = s.bvid
+            WHERE s.updated_ts >= ? AND v.uid = ?
+            """,
+            (cutoff, uid),
+        ).fetchone()
+        out[uid] = {
+            "pushed_count": pushed_count,
+            "last_pushed_ts": last_pushed_ts,
+            "last_pub_ts": last_pub_ts,
+            "pushed_bvids_sample": [r[0] for r in sample],
+            "pushed_tname_mix": [(r[0], r[1]) for r in mix],
+            "hidden_count_window": hidden,
+            "read_count_window": read,
+        }
+    return out
+
+
+class StatsRollupConsistencyTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmp.name, "bili.db")
+        set_config({"app": {"db_path": self.db_path}})
+        self.conn = connect(self.db_path)
+        migrate(self.conn)
+        self.rng = random.Random(20261016)
+        self.uids = list(range(1, 9))
+        for uid in self.uids:
+            self.conn.execute(
+                "INSERT INTO creators(uid, name, author_name, enabled, priority) VALUES (?, ?, ?, 1, ?)",
+                (uid, f"up{uid}", f"up{uid}", uid % 3),
+            )
+        self.conn.commit()
+        self.next_id = 0
+
+    def tearDown(self):
+        app_main.close_pool()
+        self.conn.close()
+        self.tmp.cleanup()
+
+    def _ts(self, max_days: int = 40) -> int:
+        return NOW - self.rng.randrange(max_days * 86400)
+
+    def _bvid(self):
+        row = self.conn.execute("SELECT bvid FROM videos ORDER BY RANDOM() LIMIT 1").fetchone()
+        return row[0] if row else None
+
+    def _set_state(self, bvid: str, state: str) -> None:
+        self.conn.execute(
+            """
+            INSERT INTO video_state(bvid, state, updated_ts) VALUES (?, ?, ?)
+            ON CONFLICT(bvid) DO UPDATE SET state=excluded.state, updated_ts=excluded.updated_ts
+            """,
+            (bvid, state, self._ts()),
+        )
+
+    def _insert_video(self) -> None:
+        self.next_id += 1
+        bvid = f"BV{self.next_id:08d}"
+        if self.rng.random() < 0.2:
+            # 先有状态、后入库（含入库时就已隐藏、发布日还没有别的视频）
+            self._set_state(bvid, self.rng.choice(STATES))
+        # 偶尔落在很早的、不会再有别的视频的日子
+        pub_ts = self._ts(400) if self.rng.random() < 0.1 else self._ts()
+        self.conn.execute(
+            """
+            INSERT INTO videos(bvid, uid, title, pub_ts, url, tname, fetched_ts)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            """,
+            (bvid, self.rng.choice(self.uids), bvid, pub_ts, f"https://b23.tv/{bvid}", self.rng.choice(TNAMES), NOW),
+        )
+
+    def _mutate(self) -> None:
+        op = self.rng.random()
+        bvid = self._bvid()
+        if bvid is None or op < 0.25:
+            self._insert_video()
+        elif op < 0.45:
+            self._set_state(bvid, self.rng.choice(STATES))
+        elif op < 0.55:
+            self.conn.execute("DELETE FROM video_state WHERE bvid = ?", (bvid,))
+        elif op < 0.70:
+            self.conn.execute("UPDATE videos SET pub_ts = ? WHERE bvid = ?", (self._ts(400), bvid))
+        elif op < 0.80:
+            self.conn.execute("UPDATE videos SET tname = ? WHERE bvid = ?", (self.rng.choice(TNAMES), bvid))
+        else:
+            self.conn.execute(
+                "INSERT OR IGNORE INTO push_log(bvid, channel, pushed_ts) VALUES (?, ?, ?)",
+                (bvid, self.rng.choice(CHANNELS), self._ts()),
+            )
+
+    def _assert_matches_raw(self) -> None:
+        with mock.patch.object(time, "time", return_value=NOW):
+            for channel in CHANNELS:
+                for days in WINDOWS:
+                    got = app_main.stats_overview(days=days, channel=channel)
+                    got = {
+                        "videos_in_window": got.videos_in_window,
+                        "pushed_in_window": got.pushed_in_window,
+                        "distinct_creators_pushed": got.distinct_creators_pushed,
+                        "top_tnames_pushed": [(t.tname, t.cnt) for t in got.top_tnames_pushed],
+                        "top_creators_pushed": [(c.uid, c.cnt) for c in got.top_creators_pushed],
+                    }
+                    self.assertEqual(got, raw_overview(self.conn, days, channel), (channel, days))
+
+                    got = {
+                        r.uid: {
+                            "pushed_count": r.pushed_count,
+                            "last_pushed_ts": r.last_pushed_ts,
+                            "last_pub_ts": r.last_pub_ts,
+                            "pushed_bvids_sample": r.pushed_bvids_sample,
+                            "pushed_tname_mix": [(m.tname, m.cnt) for m in r.pushed_tname_mix],
+                            "hidden_count_window": r.hidden_count_window,
+                            "read_count_window": r.read_count_window,
+                        }
+                        for r in app_main.list_creator_stats(days=days, channel=channel, limit=2000)
+                    }
+                    self.assertEqual(got, raw_creator_stats(self.conn, days, channel), (channel, days))
+
+    def test_random_mutations_keep_rollups_exact(self):
+        for step in range(1, 1201):
+            self._mutate()
+            if step % 200 == 0:
+                self.conn.commit()
+                self._assert_matches_raw()
+
+    def test_unhide_after_redate_to_empty_day(self):
+        self._insert_video()
+        bvid = self._bvid()
+        self._set_state(bvid, "HIDDEN")
+        # 隐藏期间改到一个没有任何视频的日子，再取消隐藏 / 删掉状态
+        self.conn.execute("UPDATE videos SET pub_ts = ? WHERE bvid = ?", (NOW - 3600, bvid))
+        self.conn.execute("UPDATE video_state SET state = 'READ' WHERE bvid = ?", (bvid,))
+        self.conn.commit()
+        self._assert_matches_raw()
+
+        self._set_state(bvid, "HIDDEN")
+        self.conn.execute("UPDATE videos SET pub_ts = ? WHERE bvid = ?", (NOW - 7200 - 86400, bvid))
+        self.conn.execute("DELETE FROM video_state WHERE bvid = ?", (bvid,))
+        self.conn.commit()
+        self._assert_matches_raw()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,236 @@
+"""
+API 基准：在进程内直接调用 app.main 的 ASGI app（不起 uvicorn、不走网络），
+对每个读接口统计 p50 / p95 / p99 延迟与每个请求执行的 SQL 条数。
+
+    python -m tools.gen_library --out data/bench.db
+    python -m tools.bench_api --db data/bench.db --json bench_api.json
+    python -m tools.bench_api --db data/bench.db --cases videos_latest,stats_creators_3650 --requests 200
+
+SQL 条数来自连接池连接上的 sqlite3 trace 回调（不含 BEGIN / COMMIT）。
+默认关闭 /api/daily 的结果缓存，测的是查询本身；--daily-cache 打开后测稳态命中。
+结果写入 --json，版本间对比时请用同一个库、同一组参数。
+"""
+import argparse
+import asyncio
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlencode
+
+from app import main as app_main
+from app.config import load_config, set_config
+from app.db import connect, migrate
+
+_TXN_PREFIXES = ("BEGIN", "COMMIT", "ROLLBACK", "--")
+
+
+def build_cases(conn: sqlite3.Connection) -> List[Tuple[str, str, Dict]]:
+    """(名字, 路径, 参数)；uid / tag / 关键词从库里挑真实存在的值。"""
+    top_uid = conn.execute("SELECT uid FROM videos GROUP BY uid ORDER BY COUNT(*) DESC LIMIT 1").fetchone()
+    top_tag = conn.execute("SELECT tag FROM video_tags GROUP BY tag ORDER BY COUNT(*) DESC LIMIT 1").fetchone()
+    group = conn.execute(
+        "SELECT group_name FROM creators WHERE enabled=1 AND group_name IS NOT NULL "
+        "GROUP BY group_name ORDER BY COUNT(*) DESC LIMIT 1"
+    ).fetchone()
+    title = conn.execute("SELECT title FROM videos ORDER BY pub_ts DESC LIMIT 1").fetchone()
+    uid = top_uid[0] if top_uid else 1
+    tag = top_tag[0] if top_tag else "tag"
+    group_name = group[0] if group else "默认"
+    # 取最新标题里连续 3 个汉字作为关键词（3 字走 video_fts，截成 2 字的 videos_q_short 走 video_fts_bigram）
+    keyword = "视频标题"
+    m = re.search(r"[\u4e00-\u9fff]{3,}", title[0]) if title else None
+    if m:
+        keyword = m.group(0)[:3]
+
+    return [
+        ("videos_latest", "/api/videos", {"limit": 50}),
+        ("videos_view", "/api/videos", {"limit": 50, "sort": "view"}),
+        ("videos_offset_5000", "/api/videos", {"limit": 50, "offset": 5000}),
+        ("videos_q", "/api/videos", {"limit": 50, "q": keyword}),
+        ("videos_q_short", "/api/videos", {"limit": 50, "q": keyword[:2]}),
+        ("videos_uid", "/api/videos", {"limit": 50, "uid": uid}),
+        ("videos_tag", "/api/videos", {"limit": 50, "tag": tag}),
+        ("videos_group", "/api/videos", {"limit": 50, "group": group_name}),
+        ("daily", "/api/daily", {"group": "", "hours": 48, "limit": 50, "seed": 1}),
+        ("daily_group", "/api/daily", {"group": group_name, "hours": 168, "limit": 50, "seed": 1}),
+        ("creators", "/api/creators", {}),
+        ("creator_groups", "/api/creator-groups", {}),
+        ("state", "/api/state", {"limit": 200}),
+        ("stats_overview_7", "/api/stats/overview", {"days": 7}),
+        ("stats_overview_3650", "/api/stats/overview", {"days": 3650}),
+        ("stats_creators_30", "/api/stats/creators", {"days": 30}),
+        ("stats_creators_3650", "/api/stats/creators", {"days": 3650}),
+    ]
+
+
+class QueryCounter:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.count = 0
+
+    def __call__(self, sql: str) -> None:
+        if sql.lstrip().upper().startswith(_TXN_PREFIXES):
+            return
+        with self._lock:
+            self.count += 1
+
+    def take(self) -> int:
+        with self._lock:
+            n, self.count = self.count, 0
+        return n
+
+
+async def asgi_get(app, path: str, params: Dict) -> Tuple[int, bytes]:
+    """最小 ASGI 客户端：发一个 GET，收集状态码与响应体。"""
+    query = urlencode(params).encode("ascii")
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode("ascii"),
+        "query_string": query,
+        "root_path": "",
+        "headers": [(b"host", b"bench")],
+        "client": ("127.0.0.1", 0),
+        "server": ("bench", 80),
+    }
+    done = asyncio.Event()
+    request_sent = False
+    status = 0
+    chunks: List[bytes] = []
+
+    async def receive():
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await done.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body", False):
+                done.set()
+
+    await app(scope, receive, send)
+    return status, b"".join(chunks)
+
+
+def _percentile(sorted_values: List[float], p: float) -> Optional[float]:
+    if not sorted_values:
+        return None
+    idx = min(len(sorted_values) - 1, max(0, int(round(p / 100.0 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[idx]
+
+
+async def run_case(app, counter: QueryCounter, path: str, params: Dict, warmup: int, requests: int) -> Dict:
+    for _ in range(warmup):
+        await asgi_get(app, path, params)
+    counter.take()
+
+    latencies: List[float] = []
+    queries: List[int] = []
+    errors = 0
+    body_bytes = 0
+    for _ in range(requests):
+        started = time.perf_counter()
+        status, body = await asgi_get(app, path, params)
+        latencies.append((time.perf_counter() - started) * 1000.0)
+        queries.append(counter.take())
+        body_bytes = len(body)
+        if status != 200:
+            errors += 1
+
+    latencies.sort()
+    return {
+        "requests": requests,
+        "errors": errors,
+        "p50_ms": round(_percentile(latencies, 50), 3),
+        "p95_ms": round(_percentile(latencies, 95), 3),
+        "p99_ms": round(_percentile(latencies, 99), 3),
+        "max_ms": round(latencies[-1], 3),
+        "queries_per_request": round(sum(queries) / len(queries), 2),
+        "response_bytes": body_bytes,
+    }
+
+
+def library_size(conn: sqlite3.Connection) -> Dict[str, int]:
+    out = {}
+    for table in ("creators", "videos", "video_tags", "video_state", "push_log"):
+        out[table] = int(conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0])
+    return out
+
+
+async def run_all(cases, args, counter: QueryCounter) -> List[Dict]:
+    results = []
+    for name, path, params in cases:
+        row = {"case": name, "path": path, "params": params}
+        row.update(await run_case(app_main.app, counter, path, params, args.warmup, args.requests))
+        results.append(row)
+        print(
+            f"{name:<22} p50={row['p50_ms']:>9.2f}ms p95={row['p95_ms']:>9.2f}ms "
+            f"p99={row['p99_ms']:>9.2f}ms queries={row['queries_per_request']:<6} errors={row['errors']}"
+        )
+    return results
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="In-process ASGI benchmark of the read API")
+    parser.add_argument("--db", required=True, help="database to benchmark (see tools.gen_library)")
+    parser.add_argument("--requests", type=int, default=50, help="timed requests per case")
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--cases", default="", help="comma separated case names (default: all)")
+    parser.add_argument("--daily-cache", action="store_true", help="keep the /api/daily result cache enabled")
+    parser.add_argument("--json", dest="json_out", default=None, help="write results to this JSON file")
+    args = parser.parse_args()
+    if not os.path.exists(args.db):
+        parser.error(f"{args.db} does not exist (generate one with python -m tools.gen_library)")
+
+    config = load_config()
+    config["app"] = dict(config.get("app") or {}, db_path=args.db)
+    api_cfg = dict(config.get("api") or {})
+    api_cfg["daily_cache"] = dict(api_cfg.get("daily_cache") or {}, enabled=args.daily_cache, warm_after_fetch=False)
+    config["api"] = api_cfg
+    set_config(config)
+
+    conn = connect(args.db)
+    migrate(conn)
+    sizes = library_size(conn)
+    cases = build_cases(conn)
+    conn.close()
+    wanted = {c.strip() for c in args.cases.split(",") if c.strip()}
+    if wanted:
+        cases = [c for c in cases if c[0] in wanted]
+    print("library:", ", ".join(f"{k}={v}" for k, v in sizes.items()))
+
+    counter = QueryCounter()
+    app_main.get_pool().trace_callback = counter
+    try:
+        results = asyncio.run(run_all(cases, args, counter))
+    finally:
+        app_main.close_pool()
+
+    if args.json_out:
+        with open(args.json_out, "w", encoding="utf-8") as f:
+            json.dump(
+                {"args": vars(args), "library": sizes, "sqlite_version": sqlite3.sqlite_version, "results": results},
+                f,
+                ensure_ascii=False,
+                indent=2,
+            )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,111 @@
+"""
+抓取吞吐基准：对本地替身服务跑 run_fetch，统计墙钟时间、请求数、写库行数、峰值内存。
+
+    python -m tools.bench_fetch
+    python -m tools.bench_fetch --sizes 10,100 --source bili_dynamic --latency-ms 80 --concurrency 8
+
+每个规模跑两轮：cold（空库首轮）与 warm（紧接着再跑一轮，即稳态增量抓取）。
+峰值内存用 tracemalloc 统计，会拖慢墙钟时间；版本间对比时请保持同一组参数。
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+from typing import Dict, List
+
+from app.fetcher import run_fetch
+from tools.fake_bili_server import FakeBiliServer
+
+
+def build_config(db_path: str, api_base: str, creators: int, args) -> Dict:
+    return {
+        "app": {"db_path": db_path},
+        "fetch": {
+            "source": args.source,
+            "per_creator_limit": args.per_creator_limit,
+            "polite_sleep_ms": [0, 0],
+            "concurrency": args.concurrency,
+            "rate_limit": {"rate_per_sec": args.rate, "burst": max(1, args.concurrency)},
+            "only_update_recent_days_stats": 0,
+            "tag_enrich": {"enabled": False},
+        },
+        "http": {"pool_maxsize": max(4, args.concurrency)},
+        "bilibili": {"cookie": "SESSDATA=bench", "timeout_sec": 15, "api_base": api_base},
+        "creators": [{"uid": uid, "name": f"UP{uid}", "group": "bench"} for uid in range(1, creators + 1)],
+    }
+
+
+def run_pass(config: Dict, server: FakeBiliServer, verbose: bool) -> Dict:
+    server.reset_counters()
+    sink = io.StringIO()
+    tracemalloc.start()
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(sink) if not verbose else contextlib.nullcontext():
+        creators, written = run_fetch(config)
+    wall = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "creators": creators,
+        "wall_sec": round(wall, 3),
+        "requests": server.total_requests,
+        "db_writes": written,
+        "peak_mem_mb": round(peak / 1024 / 1024, 2),
+        "creators_per_sec": round(creators / wall, 2) if wall > 0 else None,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Fetch throughput benchmark against a local Bilibili stand-in")
+    parser.add_argument("--sizes", default="10,100,1000", help="comma separated creator counts")
+    parser.add_argument("--source", default="bili_api", choices=["bili_api", "bili_dynamic"])
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--rate", type=float, default=1000.0, help="token bucket rate (requests/s)")
+    parser.add_argument("--latency-ms", type=float, default=20)
+    parser.add_argument("--videos-per-creator", type=int, default=30)
+    parser.add_argument("--per-creator-limit", type=int, default=30)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-code", type=int, default=-412)
+    parser.add_argument("--json", dest="json_out", default=None, help="write results to this JSON file")
+    parser.add_argument("--verbose", action="store_true", help="show run_fetch output")
+    args = parser.parse_args()
+
+    results: List[Dict] = []
+    for size in [int(s) for s in args.sizes.split(",") if s.strip()]:
+        server = FakeBiliServer(
+            creators=size,
+            videos_per_creator=args.videos_per_creator,
+            latency_ms=args.latency_ms,
+            error_rate=args.error_rate,
+            error_code=args.error_code,
+            seed=size,
+        ).start()
+        try:
+            with tempfile.TemporaryDirectory() as tmp:
+                config = build_config(os.path.join(tmp, "bench.db"), server.url, size, args)
+                for phase in ("cold", "warm"):
+                    row = {"size": size, "phase": phase, **run_pass(config, server, args.verbose)}
+                    results.append(row)
+                    print(
+                        f"size={size:<5} phase={phase:<4} "
+                        f"wall={row['wall_sec']:>8.3f}s "
+                        f"requests={row['requests']:<6} "
+                        f"db_writes={row['db_writes']:<7} "
+                        f"peak_mem={row['peak_mem_mb']:>7.2f}MB "
+                        f"creators/s={row['creators_per_sec']}"
+                    )
+        finally:
+            server.stop()
+
+    if args.json_out:
+        with open(args.json_out, "w", encoding="utf-8") as f:
+            json.dump({"args": vars(args), "results": results}, f, ensure_ascii=False, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,100 @@
+"""
+/api/daily 加权抽样的微基准：旧的逐个抽样（每次重算总权重 + 线性扫描，O(n·k)）
+对比 app/sampling.py 的 Efraimidis–Spirakis 堆实现（O(n log k)）。
+
+    python -m tools.bench_sampler
+    python -m tools.bench_sampler --n 10000 --k 50,200,1000 --repeat 5
+
+同时用 --trials 次批量抽样核对首个被抽中元素的频率与权重占比一致（分布没变）。
+"""
+import argparse
+import json
+import random
+import time
+from typing import Dict, List
+
+from app.sampling import sample_indices_batch, weighted_sample_without_replacement
+
+
+def linear_scan_sample(items: List[dict], k: int, rng: random.Random) -> List[dict]:
+    """旧实现（原 app.main._weighted_sample_without_replacement），仅作基准对照。"""
+    if k <= 0 or not items:
+        return []
+    pool = list(items)
+    chosen: List[dict] = []
+    while pool and len(chosen) < k:
+        total_weight = sum(max(1, int(it.get("weight", 1))) for it in pool)
+        pick = rng.uniform(0, total_weight)
+        acc = 0.0
+        chosen_index = len(pool) - 1
+        for idx, it in enumerate(pool):
+            acc += max(1, int(it.get("weight", 1)))
+            if acc >= pick:
+                chosen_index = idx
+                break
+        chosen.append(pool.pop(chosen_index))
+    return chosen
+
+
+def best_of(fn, repeat: int) -> float:
+    best = float("inf")
+    for i in range(repeat):
+        started = time.perf_counter()
+        fn(i)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def first_pick_deviation(weights: List[int], trials: int, seed: int) -> float:
+    """批量抽样 trials 次，首个抽中元素的经验频率与 w/sum(w) 的最大绝对偏差（按权重档汇总）。"""
+    picks = sample_indices_batch(weights, 1, trials, seed=seed)
+    total = float(sum(weights))
+    by_weight: Dict[int, float] = {}
+    expected: Dict[int, float] = {}
+    for w in weights:
+        expected[w] = expected.get(w, 0.0) + w / total
+    for p in picks:
+        w = weights[p[0]]
+        by_weight[w] = by_weight.get(w, 0.0) + 1.0 / trials
+    return max(abs(by_weight.get(w, 0.0) - e) for w, e in expected.items())
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Weighted sampler micro-benchmark")
+    parser.add_argument("--n", type=int, default=10000, help="number of creators in the pool")
+    parser.add_argument("--k", default="10,50,200", help="comma separated sample sizes")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--trials", type=int, default=2000, help="batched trials for the distribution check")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", dest="json_out", default=None, help="write results to this JSON file")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    items = [{"uid": i, "weight": rng.choice([1, 1, 1, 2, 3, 5])} for i in range(args.n)]
+
+    results = []
+    for k in [int(x) for x in args.k.split(",") if x.strip()]:
+        old = best_of(lambda i: linear_scan_sample(items, k, random.Random(i)), args.repeat)
+        new = best_of(lambda i: weighted_sample_without_replacement(items, k, random.Random(i)), args.repeat)
+        row = {
+            "n": args.n,
+            "k": k,
+            "linear_ms": round(old * 1000, 3),
+            "heap_ms": round(new * 1000, 3),
+            "speedup": round(old / new, 1) if new > 0 else None,
+        }
+        results.append(row)
+        print(f"n={args.n} k={k:<5} linear={row['linear_ms']:>10.3f}ms heap={row['heap_ms']:>8.3f}ms speedup={row['speedup']}x")
+
+    weights = [it["weight"] for it in items[:50]]
+    deviation = first_pick_deviation(weights, args.trials, args.seed)
+    print(f"distribution check: max |freq - w/sum(w)| by weight class = {deviation:.4f} ({args.trials} trials)")
+
+    if args.json_out:
+        with open(args.json_out, "w", encoding="utf-8") as f:
+            json.dump({"args": vars(args), "results": results, "first_pick_deviation": deviation}, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,235 @@
+"""
+本地 Bilibili 接口替身：不带真实 cookie、不打扰 B 站也能压测抓取链路。
+
+提供：
+- /x/space/arc/search                  空间投稿列表（bili_api）
+- /x/polymer/web-dynamic/v1/feed/all   关注动态 feed（bili_dynamic）
+- /x/tag/archive/tags                  稿件 tag
+- /x/web-interface/archive/stat        稿件统计
+
+单独启动：
+    python -m tools.fake_bili_server --port 9100 --creators 100 --latency-ms 50
+然后把 bilibili.api_base 指向 http://127.0.0.1:9100 即可。
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+
+class FakeBiliData:
+    """确定性的假数据：creator uid 为 1..creators，每人 videos_per_creator 条视频，越新 j 越小。"""
+
+    def __init__(self, creators: int, videos_per_creator: int, base_ts: Optional[int] = None):
+        self.creators = creators
+        self.videos_per_creator = videos_per_creator
+        self.base_ts = int(base_ts or time.time())
+        self._feed: Optional[List[Dict]] = None
+        self._lock = threading.Lock()
+
+    def video(self, mid: int, j: int) -> Dict:
+        aid = mid * 1000 + j + 1
+        return {
+            "aid": aid,
+            "bvid": f"BVF{mid:07d}{j:03d}",
+            "title": f"[fake] uid={mid} video {j}",
+            "pubdate": self.base_ts - (mid * 7919) % 86400 - j * 86400,
+            "length": "12:34",
+            "pic": None,
+            "description": f"fake video {j} of {mid}",
+            "tid": 17 + mid % 5,
+            "tname": f"分区{mid % 5}",
+            "stat": {"view": aid * 7 % 100000, "like": aid % 1000, "reply": aid % 100},
+        }
+
+    def vlist(self, mid: int, pn: int, ps: int) -> List[Dict]:
+        if mid < 1 or mid > self.creators:
+            return []
+        start = (pn - 1) * ps
+        end = min(self.videos_per_creator, start + ps)
+        return [self.video(mid, j) for j in range(start, end)]
+
+    def feed(self) -> List[Dict]:
+        with self._lock:
+            if self._feed is None:
+                items = []
+                for mid in range(1, self.creators + 1):
+                    for j in range(self.videos_per_creator):
+                        v = self.video(mid, j)
+                        items.append({
+                            "id_str": f"D{v['aid']}",
+                            "type": "DYNAMIC_TYPE_AV",
+                            "modules": {
+                                "module_author": {"mid": str(mid), "name": f"UP{mid}", "pub_ts": v["pubdate"]},
+                                "module_dynamic": {"major": {"archive": {
+                                    "aid": v["aid"],
+                                    "bvid": v["bvid"],
+                                    "title": v["title"],
+                                    "cover": None,
+                                    "desc": v["description"],
+                                    "jump_url": f"//www.bilibili.com/video/{v['bvid']}",
+                                    "stat": {"play": str(v["stat"]["view"])},
+                                }}},
+                            },
+                        })
+                items.sort(key=lambda it: -it["modules"]["module_author"]["pub_ts"])
+                self._feed = items
+            return self._feed
+
+
+class FakeBiliServer:
+    """
+    latency_ms：每个请求的固定延迟；error_rate / error_code：按概率返回风控错误（如 -412 / -352）。
+    requests 记录各路径被请求的次数。
+    """
+
+    def __init__(
+        self,
+        creators: int = 100,
+        videos_per_creator: int = 30,
+        feed_page_size: int = 12,
+        latency_ms: float = 0,
+        error_rate: float = 0.0,
+        error_code: int = -412,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        seed: Optional[int] = None,
+    ):
+        self.data = FakeBiliData(creators, videos_per_creator)
+        self.feed_page_size = max(1, feed_page_size)
+        self.latency_ms = latency_ms
+        self.error_rate = error_rate
+        self.error_code = error_code
+        self.requests: Dict[str, int] = {}
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self._httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def total_requests(self) -> int:
+        with self._lock:
+            return sum(self.requests.values())
+
+    def reset_counters(self) -> None:
+        with self._lock:
+            self.requests.clear()
+
+    def start(self) -> "FakeBiliServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self) -> None:
+        try:
+            self._httpd.serve_forever()
+        finally:
+            self._httpd.server_close()
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def _record(self, path: str) -> bool:
+        """记一次请求，返回本次是否注入错误。"""
+        with self._lock:
+            self.requests[path] = self.requests.get(path, 0) + 1
+            return self.error_rate > 0 and self._rng.random() < self.error_rate
+
+    def handle(self, path: str, qs: Dict[str, str]) -> Dict:
+        if path == "/x/space/arc/search":
+            vlist = self.data.vlist(int(qs.get("mid", 0)), int(qs.get("pn", 1)), int(qs.get("ps", 30)))
+            return {"code": 0, "data": {"list": {"vlist": vlist}}}
+
+        if path == "/x/polymer/web-dynamic/v1/feed/all":
+            feed = self.data.feed()
+            start = int(qs.get("offset") or 0)
+            end = start + self.feed_page_size
+            return {"code": 0, "data": {
+                "items": feed[start:end],
+                "offset": str(end),
+                "has_more": end < len(feed),
+                "update_baseline": feed[0]["id_str"] if feed else "",
+            }}
+
+        if path == "/x/tag/archive/tags":
+            aid = int(qs.get("aid", 0))
+            return {"code": 0, "data": [{"tag_name": f"tag{aid % 7}"}, {"tag_name": f"tag{aid % 11}"}]}
+
+        if path == "/x/web-interface/archive/stat":
+            bvid = qs.get("bvid", "")
+            return {"code": 0, "data": {"view": len(bvid) * 1000 + int(time.time()) % 1000, "like": 1, "reply": 1}}
+
+        return {"code": -404, "message": "啥都木有"}
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                parsed = urlparse(self.path)
+                qs = {k: v[0] for k, v in parse_qs(parsed.query).items()}
+                inject_error = server._record(parsed.path)
+                if server.latency_ms > 0:
+                    time.sleep(server.latency_ms / 1000.0)
+                if inject_error:
+                    payload = {"code": server.error_code, "message": "请求被拦截", "ttl": 1}
+                else:
+                    payload = server.handle(parsed.path, qs)
+                body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Local Bilibili API stand-in")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--creators", type=int, default=100)
+    parser.add_argument("--videos-per-creator", type=int, default=30)
+    parser.add_argument("--feed-page-size", type=int, default=12)
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-code", type=int, default=-412)
+    args = parser.parse_args()
+
+    server = FakeBiliServer(
+        creators=args.creators,
+        videos_per_creator=args.videos_per_creator,
+        feed_page_size=args.feed_page_size,
+        latency_ms=args.latency_ms,
+        error_rate=args.error_rate,
+        error_code=args.error_code,
+        host=args.host,
+        port=args.port,
+    )
+    print(f"fake bilibili api on {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,216 @@
+"""
+合成视频库：按给定规模与随机种子生成一个接近真实分布的库，用于压测 API 与检查执行计划。
+
+    python -m tools.gen_library --out data/bench.db
+    python -m tools.gen_library --out data/bench.db --creators 10000 --videos 1000000 --states 100000 --seed 1
+
+分布：
+- creator 投稿量服从 Zipf（少数高产 UP 占大头），每个 creator 有主分区，约 80% 投稿在主分区
+- 发布时间偏向近期（history_days 内，越近越密）
+- tag：主题词 + 从 Zipf 词表里抽 0~4 个；标题由词表拼出，中文检索能命中
+- 状态偏向较新的视频（READ 为主，少量 HIDDEN / STAR / LATER / WATCHED），updated_ts 晚于发布时间
+- 推送历史：近 push_days 天内每天推送若干条当时的新视频（channel=serverchan）
+
+同一组参数与 --seed 生成的库内容一致（时间相对生成时刻）。
+灌数据期间暂停触发器，结束后一次性重建 video_fts 与 stats_* 预聚合表。
+"""
+import argparse
+import array
+import bisect
+import os
+import random
+import time
+from typing import Dict, List
+
+from app.db import connect, migrate, triggers_suspended
+
+TNAMES = [
+    (17, "单机游戏"), (36, "知识"), (188, "科技"), (160, "生活"), (3, "音乐"), (181, "影视"),
+    (1, "动画"), (211, "美食"), (234, "运动"), (223, "汽车"), (95, "数码"), (155, "时尚"),
+    (5, "娱乐"), (119, "鬼畜"), (129, "舞蹈"), (217, "动物圈"),
+]
+GROUPS = [("必看", 0.05), ("默认", 0.55), ("分组A", 0.15), ("分组B", 0.15), ("分组C", 0.10)]
+STATES = [("READ", 0.70), ("HIDDEN", 0.12), ("STAR", 0.08), ("LATER", 0.06), ("WATCHED", 0.04)]
+
+_TOPICS = [
+    "原神", "显卡", "机械键盘", "咖啡", "露营", "编程", "Python", "数据库", "相机", "旅行", "健身", "钢琴",
+    "吉他", "手机", "耳机", "装修", "理财", "历史", "宇宙", "化学", "数学", "英语", "日语", "红烧肉",
+    "火锅", "猫咪", "柴犬", "赛车", "篮球", "足球", "羽毛球", "滑雪", "潜水", "电影", "纪录片", "动画",
+]
+_PREFIXES = ["最全", "新手向", "硬核", "十分钟看懂", "实测", "深度解析", "保姆级", "沉浸式", "挑战", "盘点"]
+_SUFFIXES = ["教程", "测评", "开箱", "Vlog", "合集", "攻略", "对比", "日常", "复盘", "杂谈"]
+
+
+def _zipf_cum_weights(n: int, s: float) -> List[float]:
+    cum, total = [], 0.0
+    for rank in range(1, n + 1):
+        total += 1.0 / rank ** s
+        cum.append(total)
+    return cum
+
+
+def _pick(rng: random.Random, choices) -> str:
+    r = rng.random()
+    for value, p in choices:
+        r -= p
+        if r < 0:
+            return value
+    return choices[-1][0]
+
+
+def bvid_of(i: int) -> str:
+    return f"BVG{i:09d}"
+
+
+def gen_creators(conn, rng: random.Random, n: int) -> None:
+    rows = []
+    for uid in range(1, n + 1):
+        rows.append((
+            uid, f"UP主{uid}", f"UP主{uid}", _pick(rng, GROUPS),
+            int(rng.random() < 0.9), rng.choice([1, 2, 3]) if rng.random() < 0.03 else 0, rng.randint(1, 5),
+        ))
+    conn.executemany(
+        "INSERT INTO creators(uid, name, author_name, group_name, enabled, priority, weight) VALUES(?,?,?,?,?,?,?)",
+        rows,
+    )
+
+
+def gen_videos(conn, rng: random.Random, args, now: int) -> Dict[str, array.array]:
+    """返回 {"uid": array, "pub_ts": array}，下标即视频序号（bvid_of(i)），后面抽状态 / 推送用。"""
+    creator_cum = _zipf_cum_weights(args.creators, args.creator_skew)
+    tag_cum = _zipf_cum_weights(args.tag_vocab, 1.05)
+    main_tname = [rng.randrange(len(TNAMES)) for _ in range(args.creators + 1)]
+    history = args.history_days * 86400
+
+    uids = array.array("q")
+    pubs = array.array("q")
+    uid_range = range(1, args.creators + 1)
+    for start in range(0, args.videos, args.batch):
+        count = min(args.batch, args.videos - start)
+        batch_uids = rng.choices(uid_range, cum_weights=creator_cum, k=count)
+        video_rows, tag_rows = [], []
+        for j, uid in enumerate(batch_uids):
+            i = start + j
+            bvid = bvid_of(i)
+            pub_ts = now - int(history * rng.random() ** 1.6) - rng.randint(0, 3600)
+            tid, tname = TNAMES[main_tname[uid]] if rng.random() < 0.8 else rng.choice(TNAMES)
+            topic = rng.choice(_TOPICS)
+            title = f"【{rng.choice(_PREFIXES)}】{topic}{rng.choice(_SUFFIXES)} 第{rng.randint(1, 300)}期"
+            view = int(rng.paretovariate(1.1) * 500)
+            video_rows.append((
+                bvid, 100000000 + i, uid, f"UP主{uid}", title, pub_ts, rng.randint(30, 3600),
+                f"https://www.bilibili.com/video/{bvid}", None, f"{topic} {tname} 相关内容，UP主{uid} 出品",
+                tid, tname, view, view // 20, view // 100, view // 50, view // 40, view // 60, view // 200,
+                now, now,
+            ))
+            tag_rows.append((bvid, topic))
+            for tag_idx in set(rng.choices(range(args.tag_vocab), cum_weights=tag_cum, k=rng.randint(0, 4))):
+                tag_rows.append((bvid, f"标签{tag_idx}"))
+            uids.append(uid)
+            pubs.append(pub_ts)
+        conn.executemany(
+            """
+            INSERT INTO videos(
+              bvid, aid, uid, author_name, title, pub_ts, duration_sec, url, cover_url, "desc",
+              tid, tname, view, like_cnt, reply_cnt, danmaku, favorite, coin, share, fetched_ts, stats_ts
+            )
+            VALUES(?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?)
+            """,
+            video_rows,
+        )
+        conn.executemany("INSERT OR IGNORE INTO video_tags(bvid, tag) VALUES(?,?)", tag_rows)
+        conn.commit()
+        print(f"videos: {start + count}/{args.videos}")
+    return {"uid": uids, "pub_ts": pubs}
+
+
+def gen_states(conn, rng: random.Random, args, videos: Dict[str, array.array], now: int) -> None:
+    # 按发布时间倒序排好，用 u^3 偏向较新的视频
+    pubs = videos["pub_ts"]
+    by_recent = sorted(range(len(pubs)), key=lambda i: -pubs[i])
+    target = min(args.states, len(by_recent))
+    if target > len(by_recent) // 2:
+        chosen = set(rng.sample(by_recent, target))
+    else:
+        chosen = set()
+        while len(chosen) < target:
+            chosen.add(by_recent[int(len(by_recent) * rng.random() ** 3)])
+    rows = []
+    for i in chosen:
+        updated_ts = min(now, pubs[i] + int(rng.expovariate(1 / 86400.0)))
+        rows.append((bvid_of(i), _pick(rng, STATES), updated_ts))
+    conn.executemany("INSERT INTO video_state(bvid, state, updated_ts) VALUES(?,?,?)", rows)
+    conn.commit()
+    print(f"video_state: {len(rows)}")
+
+
+def gen_pushes(conn, rng: random.Random, args, videos: Dict[str, array.array], now: int) -> None:
+    pubs = videos["pub_ts"]
+    order = sorted(range(len(pubs)), key=lambda i: pubs[i])
+    sorted_pubs = [pubs[i] for i in order]
+    pushed = set()
+    rows = []
+    for day in range(args.push_days):
+        day_end = now - day * 86400
+        lo = bisect.bisect_left(sorted_pubs, day_end - 86400)
+        hi = bisect.bisect_left(sorted_pubs, day_end)
+        candidates = order[lo:hi]
+        if not candidates:
+            continue
+        for i in rng.sample(candidates, min(len(candidates), args.pushes_per_day)):
+            if i in pushed:
+                continue
+            pushed.add(i)
+            rows.append((bvid_of(i), "serverchan", min(now, max(pubs[i], day_end - rng.randint(0, 3600)))))
+    conn.executemany("INSERT INTO push_log(bvid, channel, pushed_ts) VALUES(?,?,?)", rows)
+    conn.commit()
+    print(f"push_log: {len(rows)}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Generate a synthetic video library for benchmarks")
+    parser.add_argument("--out", required=True, help="database file to create")
+    parser.add_argument("--force", action="store_true", help="overwrite an existing file")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--creators", type=int, default=10000)
+    parser.add_argument("--videos", type=int, default=1000000)
+    parser.add_argument("--states", type=int, default=100000)
+    parser.add_argument("--push-days", type=int, default=730)
+    parser.add_argument("--pushes-per-day", type=int, default=20)
+    parser.add_argument("--history-days", type=int, default=3650)
+    parser.add_argument("--creator-skew", type=float, default=1.1, help="Zipf exponent of uploads per creator")
+    parser.add_argument("--tag-vocab", type=int, default=5000)
+    parser.add_argument("--batch", type=int, default=50000)
+    parser.add_argument("--analyze", action="store_true", help="run ANALYZE at the end (the app itself never does)")
+    args = parser.parse_args()
+
+    if os.path.exists(args.out):
+        if not args.force:
+            parser.error(f"{args.out} exists (use --force to overwrite)")
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(args.out + suffix):
+                os.remove(args.out + suffix)
+
+    rng = random.Random(args.seed)
+    now = int(time.time())
+    started = time.perf_counter()
+    conn = connect(args.out)
+    migrate(conn)
+    # 一次性灌库：不需要逐次 fsync
+    conn.execute("PRAGMA synchronous=OFF")
+    with triggers_suspended(conn):
+        gen_creators(conn, rng, args.creators)
+        videos = gen_videos(conn, rng, args, now)
+        gen_states(conn, rng, args, videos, now)
+        gen_pushes(conn, rng, args, videos, now)
+        print("rebuilding video_fts / stats rollups ...")
+    if args.analyze:
+        conn.execute("ANALYZE")
+        conn.commit()
+    conn.close()
+    print(f"gen_library: {args.out} done in {time.perf_counter() - started:.1f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,297 @@
+"""
+索引检查：从源码里抽出 SQL，对一个有数据的库跑 EXPLAIN QUERY PLAN，标出对大表的全表 SCAN。
+
+    python -m tools.index_advisor
+    python -m tools.index_advisor --db data/app.db --verbose
+    python -m tools.index_advisor --files app/main.py,app/push.py --large videos,push_log
+
+SQL 用 ast 静态抽取：以 SELECT / WITH / INSERT / UPDATE / DELETE 开头的字符串常量与 f-string。
+f-string 里的 {片段} 按 FRAGMENTS 展开成若干代表值（取笛卡尔积），拼出来在库上编译失败的组合直接跳过；
+一条语句所有组合都编译失败时报 unresolved，通常是新增了片段、需要在 FRAGMENTS 里补代表值。
+参数一律绑定 1，只看执行计划，不执行语句。
+
+不给 --db 时建一个临时库：迁移到最新 schema，灌一批合成数据并 ANALYZE，让规划器按真实分布选索引。
+计划里的 SCAN 分两类：
+- SCAN：大表全表扫描（没有可用索引），退出码为 1，可以挂在 CI 上
+- INDEX SCAN：沿索引顺序遍历（如 /api/videos 按排序索引走到 LIMIT 为止），只提示，不影响退出码
+"""
+import argparse
+import ast
+import glob
+import itertools
+import os
+import random
+import re
+import sqlite3
+import tempfile
+import time
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+from app.db import connect, migrate
+from app.ingest import _COMPARE_COLUMNS
+from app.rollup import pushed_window_sql, state_window_sql
+from app.search import bm25_expr
+from app.video_query import video_filters, video_order
+
+# app/ 下全部模块；db.py 只有迁移 / 全量重建（本来就整表扫）和小表读写，不查
+DEFAULT_FILES = tuple(
+    p for p in sorted(glob.glob("app/**/*.py", recursive=True)) if os.path.normpath(p) != os.path.normpath("app/db.py")
+)
+DEFAULT_LARGE = ("videos", "video_tags", "video_state", "push_log", "video_fts", "video_fts_bigram", "video_fts_ids", "tag_queue")
+
+_SQL_START = re.compile(r"^\s*(SELECT|WITH|INSERT|UPDATE|DELETE|REPLACE)\b", re.IGNORECASE)
+_TABLE_ALIAS = re.compile(r"\b(?:FROM|JOIN|UPDATE|INTO)\s+([A-Za-z_][A-Za-z0-9_]*)(?:\s+(?:AS\s+)?([A-Za-z_][A-Za-z0-9_]*))?", re.IGNORECASE)
+_SCAN = re.compile(r"^SCAN ([A-Za-z_][A-Za-z0-9_]*)(.*)$")
+_SQL_KEYWORDS = {
+    "where", "on", "join", "left", "inner", "cross", "group", "order", "limit", "union", "set",
+    "values", "select", "using", "natural", "outer", "having", "window", "as",
+}
+
+_VIDEOS_STATE_DEFAULT = "WHERE COALESCE(s.state, 'NEW') NOT IN ('HIDDEN', 'READ')"
+
+# f-string 片段（源码里 {} 内的表达式文本）-> 代表值；覆盖各接口的主要分支
+FRAGMENTS: Dict[str, List[str]] = {
+    "placeholders": ["?,?,?"],
+    "uid_placeholders": ["?,?,?"],
+    "bm25_expr()": [bm25_expr()],
+    "bm25_expr('video_fts')": [bm25_expr("video_fts")],
+    "bm25_expr('video_fts_bigram')": [bm25_expr("video_fts_bigram")],
+    # 与 /api/videos、导出用同一个构造函数：无关键词 / 3 字以上 / 2 字 / 两者都有
+    "fts_join": [video_filters(q=q)[0] for q in ("", "篮球复盘", "游戏", "篮球复盘 游戏")],
+    "where_sql": [
+        "",
+        # list_videos：默认 / cursor 翻页 / 白名单 + 分组 / uid
+        _VIDEOS_STATE_DEFAULT,
+        "WHERE (v.pub_ts, v.bvid) < (?, ?) AND COALESCE(s.state, 'NEW') NOT IN ('HIDDEN', 'READ')",
+        "WHERE COALESCE(v.view,0) <= ? AND (COALESCE(v.view,0), v.pub_ts, v.bvid) < (?, ?, ?)"
+        " AND COALESCE(s.state, 'NEW') NOT IN ('HIDDEN', 'READ')",
+        "WHERE COALESCE(c.enabled, 0)=1 AND c.group_name=? AND COALESCE(s.state, 'NEW') NOT IN ('HIDDEN', 'READ')",
+        "WHERE v.uid=? AND COALESCE(s.state, 'NEW') NOT IN ('HIDDEN', 'READ')",
+        # list_state
+        "WHERE bvid=?",
+        "WHERE state=?",
+    ],
+    "order_sql": [video_order(sort, True)[1] for sort in ("pub", "view", "rank")],
+    "' AND '.join(creator_where)": ["c.enabled=1", "c.enabled=1 AND c.group_name=?"],
+    "pushed_sql": [pushed_window_sql("serverchan", int(time.time()) - 7 * 86400)[0]],
+    "state_sql": [state_window_sql(int(time.time()) - 7 * 86400)[0]],
+    "cols": [", ".join(f'"{c}"' for c in _COMPARE_COLUMNS)],
+}
+
+
+class Statement:
+    def __init__(self, path: str, lineno: int, func: str, parts: List[object]):
+        self.path = path
+        self.lineno = lineno
+        self.func = func
+        # parts：字符串为字面量，元组 (expr,) 为 f-string 片段
+        self.parts = parts
+
+    @property
+    def where(self) -> str:
+        return f"{self.path}:{self.lineno} {self.func}"
+
+    def fragments(self) -> List[str]:
+        return [p[0] for p in self.parts if isinstance(p, tuple)]
+
+    def expand(self) -> Iterator[str]:
+        exprs = self.fragments()
+        choices = [FRAGMENTS.get(e, []) for e in exprs]
+        for combo in itertools.product(*choices):
+            values = iter(combo)
+            yield "".join(p if isinstance(p, str) else next(values) for p in self.parts)
+
+
+def _literal_text(node: ast.AST) -> Optional[List[object]]:
+    if isinstance(node, ast.Constant) and isinstance(node.value, str):
+        return [node.value]
+    if isinstance(node, ast.JoinedStr):
+        parts: List[object] = []
+        for v in node.values:
+            if isinstance(v, ast.Constant):
+                parts.append(v.value)
+            elif isinstance(v, ast.FormattedValue):
+                parts.append((ast.unparse(v.value),))
+        return parts
+    return None
+
+
+def extract_statements(path: str) -> List[Statement]:
+    with open(path, "r", encoding="utf-8") as f:
+        tree = ast.parse(f.read(), filename=path)
+
+    out: List[Statement] = []
+    skip: Set[int] = set()
+
+    def visit(node: ast.AST, func: str) -> None:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            func = node.name
+        if isinstance(node, ast.JoinedStr):
+            # f-string 内部的字面量片段不单独算语句
+            for v in ast.walk(node):
+                if v is not node:
+                    skip.add(id(v))
+        if id(node) not in skip:
+            parts = _literal_text(node)
+            if parts and isinstance(parts[0], str) and _SQL_START.match(parts[0]):
+                out.append(Statement(path, node.lineno, func, parts))
+        for child in ast.iter_child_nodes(node):
+            visit(child, func)
+
+    visit(tree, "<module>")
+    return out
+
+
+def _count_params(sql: str) -> int:
+    # 去掉字符串字面量里的 ? 再数
+    return re.sub(r"'(?:[^']|'')*'", "''", sql).count("?")
+
+
+def _alias_map(sql: str) -> Dict[str, str]:
+    out: Dict[str, str] = {}
+    for table, alias in _TABLE_ALIAS.findall(sql):
+        out[table] = table
+        if alias and alias.lower() not in _SQL_KEYWORDS:
+            out[alias] = table
+    return out
+
+
+def explain(conn: sqlite3.Connection, sql: str) -> List[str]:
+    rows = conn.execute("EXPLAIN QUERY PLAN " + sql, [1] * _count_params(sql)).fetchall()
+    return [r[3] for r in rows]
+
+
+def find_scans(plan: List[str], sql: str, large: Set[str]) -> List[Tuple[str, str]]:
+    """返回 [(kind, detail)]，kind 为 "SCAN"（全表）或 "INDEX SCAN"（沿索引遍历）。"""
+    aliases = _alias_map(sql)
+    found = []
+    for detail in plan:
+        m = _SCAN.match(detail)
+        if not m:
+            continue
+        table = aliases.get(m.group(1), m.group(1))
+        rest = m.group(2)
+        if table not in large or "VIRTUAL TABLE" in rest:
+            continue
+        kind = "INDEX SCAN" if "INDEX" in rest else "SCAN"
+        found.append((kind, detail if table == m.group(1) else f"{detail}  ({table})"))
+    return found
+
+
+def seed_db(path: str, videos: int = 20000, creators: int = 500, seed: int = 1) -> None:
+    """合成数据：够让 ANALYZE 给出接近真实的选择性即可（大规模数据见 tools/gen_library.py）。"""
+    rng = random.Random(seed)
+    now = int(time.time())
+    conn = connect(path)
+    migrate(conn)
+    conn.executemany(
+        "INSERT INTO creators(uid, name, author_name, group_name, enabled, priority, weight) VALUES(?,?,?,?,?,?,?)",
+        [
+            (uid, f"UP{uid}", f"UP{uid}", f"g{uid % 8}", int(uid % 10 != 0), int(uid % 17 == 0), 1 + uid % 3)
+            for uid in range(1, creators + 1)
+        ],
+    )
+    rows = []
+    for i in range(videos):
+        uid = 1 + int(rng.paretovariate(1.2)) % creators
+        rows.append((
+            f"BVA{i:09d}", i + 1, uid, f"UP{uid}", f"视频标题 {i} 第{i % 97}期", now - rng.randint(0, 3 * 365 * 86400),
+            f"https://www.bilibili.com/video/BVA{i:09d}", f"简介 {i}", 17 + i % 20, f"分区{i % 20}", rng.randint(0, 10 ** 6), now,
+        ))
+    conn.executemany(
+        """
+        INSERT INTO videos(bvid, aid, uid, author_name, title, pub_ts, url, "desc", tid, tname, view, fetched_ts)
+        VALUES(?,?,?,?,?,?,?,?,?,?,?,?)
+        """,
+        rows,
+    )
+    conn.executemany(
+        "INSERT OR IGNORE INTO video_tags(bvid, tag) VALUES(?,?)",
+        [(r[0], f"tag{rng.randint(0, 300)}") for r in rows for _ in range(2)],
+    )
+    bvids = [r[0] for r in rows]
+    conn.executemany(
+        "INSERT INTO video_state(bvid, state, updated_ts) VALUES(?,?,?)",
+        [
+            (b, rng.choice(["READ", "READ", "HIDDEN", "STAR", "LATER"]), now - rng.randint(0, 365 * 86400))
+            for b in rng.sample(bvids, videos // 5)
+        ],
+    )
+    conn.executemany(
+        "INSERT INTO push_log(bvid, channel, pushed_ts) VALUES(?,?,?)",
+        [(b, "serverchan", now - rng.randint(0, 365 * 86400)) for b in rng.sample(bvids, videos // 10)],
+    )
+    conn.commit()
+    conn.execute("ANALYZE")
+    conn.commit()
+    conn.close()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="EXPLAIN QUERY PLAN every SQL statement and flag full scans")
+    parser.add_argument("--db", default=None, help="existing database (default: seed a temporary one)")
+    parser.add_argument("--files", default=",".join(DEFAULT_FILES), help="comma separated source files")
+    parser.add_argument("--large", default=",".join(DEFAULT_LARGE), help="tables whose SCAN is flagged")
+    parser.add_argument("--seed-videos", type=int, default=20000)
+    parser.add_argument("--verbose", action="store_true", help="print every plan, not only flagged ones")
+    args = parser.parse_args()
+
+    large = {t.strip() for t in args.large.split(",") if t.strip()}
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = args.db
+        if not db_path:
+            db_path = os.path.join(tmp, "advisor.db")
+            seed_db(db_path, videos=args.seed_videos)
+        conn = sqlite3.connect(db_path)
+
+        flagged_total = 0
+        index_scans = 0
+        unresolved: List[Tuple[Statement, str]] = []
+        checked = 0
+        for path in [p.strip() for p in args.files.split(",") if p.strip()]:
+            for stmt in extract_statements(path):
+                missing = [e for e in stmt.fragments() if e not in FRAGMENTS]
+                if missing:
+                    unresolved.append((stmt, "no FRAGMENTS entry for " + ", ".join(missing)))
+                    continue
+                seen: Set[Tuple[str, ...]] = set()
+                ok = 0
+                last_error = ""
+                for sql in stmt.expand():
+                    try:
+                        plan = explain(conn, sql)
+                    except sqlite3.Error as exc:
+                        last_error = str(exc)
+                        continue
+                    ok += 1
+                    scans = tuple(find_scans(plan, sql, large))
+                    if args.verbose:
+                        print(f"-- {stmt.where}")
+                        for detail in plan:
+                            print("   ", detail)
+                    if scans and scans not in seen:
+                        seen.add(scans)
+                        full = any(kind == "SCAN" for kind, _ in scans)
+                        if full:
+                            flagged_total += 1
+                        else:
+                            index_scans += 1
+                        print(f"{'SCAN' if full else 'INDEX SCAN'}  {stmt.where}")
+                        for kind, detail in scans:
+                            print(f"      [{kind}] {detail}")
+                checked += 1
+                if ok == 0:
+                    unresolved.append((stmt, last_error))
+        conn.close()
+
+    for stmt, reason in unresolved:
+        print(f"UNRESOLVED  {stmt.where}: {reason}")
+    print(
+        f"index_advisor: statements={checked}, flagged={flagged_total}, "
+        f"index_scans={index_scans}, unresolved={len(unresolved)}"
+    )
+    return 1 if flagged_total else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -6,6 +6,9 @@ const STATE = {
 };
 
 let currentVideos = [];
+// /api/videos 的翻页游标（响应头 X-Next-Cursor）；为空表示没有下一页
+let nextCursor = null;
+let lastParams = null;
 
 async function loadGroups() {
   const select = document.getElementById("group");
@@ -24,7 +27,7 @@ async function loadGroups() {
   }
 }
 
-async function load() {
+function buildVideoParams() {
   const q = document.getElementById("q").value.trim();
   const tag = document.getElementById("tag").value.trim();
   const viewMin = document.getElementById("viewMin").value.trim();
@@ -42,17 +45,47 @@ async function load() {
   if (!onlyWhitelist) params.set("only_whitelist", "false");
   params.set("sort", sort);
   params.set("limit", "50");
+  return params;
+}
+
+function setNextCursor(cursor) {
+  nextCursor = cursor || null;
+  document.getElementById("moreBtn").classList.toggle("hidden", !nextCursor);
+}
 
-  const res = await fetch(`/api/videos?${params.toString()}`);
+async function load() {
+  lastParams = buildVideoParams();
+  const res = await fetch(`/api/videos?${lastParams.toString()}`);
   const data = await res.json();
   currentVideos = data;
+  setNextCursor(res.headers.get("X-Next-Cursor"));
   renderList(currentVideos);
 }
 
+async function loadMore() {
+  if (!nextCursor || !lastParams) return;
+  const params = new URLSearchParams(lastParams);
+  params.set("cursor", nextCursor);
+  const btn = document.getElementById("moreBtn");
+  btn.disabled = true;
+  try {
+    const res = await fetch(`/api/videos?${params.toString()}`);
+    if (!res.ok) return;
+    const data = await res.json();
+    const seen = new Set(currentVideos.map((v) => v.bvid));
+    currentVideos = currentVideos.concat(data.filter((v) => !seen.has(v.bvid)));
+    setNextCursor(res.headers.get("X-Next-Cursor"));
+    renderList(currentVideos);
+  } finally {
+    btn.disabled = false;
+  }
+}
+
 async function loadDaily() {
   const res = await fetch("/api/daily");
   const data = await res.json();
   currentVideos = data;
+  setNextCursor(null);
   renderList(currentVideos);
 }
 
@@ -114,6 +147,19 @@ async function postVideoState(bvid, state) {
   return res.json();
 }
 
+async function postVideoStates(items) {
+  const res = await fetch("/api/state/batch", {
+    method: "POST",
+    headers: { "Content-Type": "application/json" },
+    body: JSON.stringify(items),
+  });
+  if (!res.ok) {
+    const text = await res.text();
+    throw new Error(text || `HTTP ${res.status}`);
+  }
+  return res.json();
+}
+
 async function postCreatorUpdate(uid, patch) {
   const payload = [{ uid, ...patch }];
   const res = await fetch("/api/creators", {
@@ -167,6 +213,22 @@ async function handleVideoRead(bvid) {
   }
 }
 
+async function handleReadAll() {
+  // 当前列表一次请求提交（服务端单次最多 1000 条，超出部分分批）
+  const bvids = currentVideos.map((v) => v.bvid);
+  if (!bvids.length) return;
+  try {
+    for (let i = 0; i < bvids.length; i += 1000) {
+      await postVideoStates(bvids.slice(i, i + 1000).map((bvid) => ({ bvid, state: STATE.READ })));
+    }
+    const done = new Set(bvids);
+    currentVideos = currentVideos.filter((item) => !done.has(item.bvid));
+    renderList(currentVideos);
+  } catch (err) {
+    console.warn("mark all read failed", err);
+  }
+}
+
 async function handleVideoHidden(bvid) {
   try {
     await postVideoState(bvid, STATE.HIDDEN);
@@ -259,6 +321,8 @@ function formatAuthor(v) {
 
 document.getElementById("btn").addEventListener("click", load);
 document.getElementById("dailyBtn").addEventListener("click", loadDaily);
+document.getElementById("readAllBtn").addEventListener("click", handleReadAll);
+document.getElementById("moreBtn").addEventListener("click", loadMore);
 document.addEventListener("click", (event) => {
   if (!event.target.closest(".inline-menu") && !event.target.closest(".state-btn") && !event.target.closest(".creator-mini-btn")) {
     closeAllMenus();